@@ -0,0 +1,201 @@
+from __future__ import annotations
+import weakref
+from dataclasses import dataclass
+from typing import Dict, Iterable, List, Sequence, Tuple, Union, TYPE_CHECKING
+from student import Student
+from instrumentation import instrumented
+
+if TYPE_CHECKING:
+    import numpy as np
+    from student_store import StudentStore
+
+GROUPINGS = ('class', 'subject', 'age_band')
+PASS_MARK = 50.0
+PERCENTILES = (10, 25, 75, 90)
+# Lowest grade for each band, best band first
+GRADE_BANDS: Tuple[Tuple[str, float], ...] = (('A', 80), ('B', 70), ('C', 60), ('D', 50), ('E', 40), ('F', 0))
+AGE_BAND_WIDTH = 2
+
+
+@dataclass
+class GroupStats:
+    count: int
+    mean: float
+    median: float
+    std: float
+    lowest: float
+    highest: float
+    percentiles: Dict[str, float]
+    passed: int
+    failed: int
+    bands: Dict[str, int]
+
+    @property
+    def pass_rate(self) -> float:
+        return self.passed / self.count if self.count else 0.0
+
+    def to_dict(self) -> dict:
+        return {'count': self.count, 'mean': self.mean, 'median': self.median, 'std': self.std,
+                'lowest': self.lowest, 'highest': self.highest, 'percentiles': dict(self.percentiles),
+                'passed': self.passed, 'failed': self.failed, 'pass_rate': self.pass_rate,
+                'bands': dict(self.bands)}
+
+
+GroupKey = Union[str, Tuple[str, ...]]
+
+# Results per store, dropped with the store; each entry remembers the store
+# version it was computed at and is recomputed once the store has changed
+_cache: 'weakref.WeakKeyDictionary[StudentStore, Dict[tuple, Tuple[int, Dict[GroupKey, GroupStats]]]]' = \
+    weakref.WeakKeyDictionary()
+
+
+def _as_store(students: Union[StudentStore, Iterable[Student]]) -> StudentStore:
+    from student_store import StudentStore
+    if isinstance(students, StudentStore):
+        return students
+    return StudentStore.from_students(students)
+
+
+def age_band(age: int, width: int = AGE_BAND_WIDTH) -> str:
+    """Label of the age band holding age, e.g. '16-17' for width 2"""
+    start = age // width * width
+    return f"{start}-{start + width - 1}" if width > 1 else str(age)
+
+
+def _group_columns(store: StudentStore, by: Sequence[str], rows: np.ndarray, columns: np.ndarray,
+                   age_band_width: int) -> Tuple[List[np.ndarray], List[List[str]]]:
+    """Per-grade integer codes and their labels for each grouping dimension"""
+    import numpy as np
+    codes, labels = [], []
+    for dimension in by:
+        if dimension == 'class':
+            codes.append(store.class_codes[rows])
+            labels.append(store.classes)
+        elif dimension == 'subject':
+            codes.append(columns)
+            labels.append(store.subjects)
+        elif dimension == 'age_band':
+            starts = store.ages // age_band_width
+            first = int(starts.min()) if len(starts) else 0
+            codes.append(starts[rows] - first)
+            labels.append([age_band((first + i) * age_band_width, age_band_width)
+                           for i in range(int(starts.max()) - first + 1 if len(starts) else 0)])
+        else:
+            raise ValueError(f"Cannot group by {dimension!r}. Use any of: {', '.join(GROUPINGS)}")
+    return codes, labels
+
+
+def _compute(store: StudentStore, by: Tuple[str, ...], percentiles: Tuple[float, ...], pass_mark: float,
+             bands: Tuple[Tuple[str, float], ...], age_band_width: int) -> Dict[GroupKey, GroupStats]:
+    import numpy as np
+    grades = store.grade_matrix
+    rows, columns = np.nonzero(~np.isnan(grades))
+    values = grades[rows, columns]
+    if not len(values):
+        return {}
+
+    codes, labels = _group_columns(store, by, rows, columns, age_band_width)
+    if codes:
+        combined = np.ravel_multi_index(codes, [max(len(names), 1) for names in labels])
+    else:
+        combined = np.zeros(len(values), dtype=np.int64)
+    keys, groups = np.unique(combined, return_inverse=True)
+    group_count = len(keys)
+
+    # Sort grades within each group once; every order statistic is an index into it.
+    # One argsort on group + grade scaled into [0, 1) is several times faster than
+    # lexsort, and grades closer than float precision can tell apart are equal anyway
+    base = values.min()
+    order = np.argsort(groups + (values - base) / (values.max() - base + 1))
+    ordered = values[order]
+    counts = np.bincount(groups, minlength=group_count)
+    starts = np.cumsum(counts) - counts
+    means = np.bincount(groups, weights=values, minlength=group_count) / counts
+    deviations = values - means[groups]
+    stds = np.sqrt(np.bincount(groups, weights=deviations * deviations, minlength=group_count) / counts)
+    passed = np.bincount(groups, weights=values >= pass_mark, minlength=group_count).astype(np.int64)
+
+    def quantile(q: float) -> np.ndarray:
+        position = starts + (counts - 1) * (q / 100)
+        below = np.floor(position).astype(np.int64)
+        above = np.ceil(position).astype(np.int64)
+        return ordered[below] + (ordered[above] - ordered[below]) * (position - below)
+
+    medians = quantile(50)
+    quantiles = {f"p{q:g}": quantile(q) for q in percentiles}
+
+    band_names = [name for name, _ in bands]
+    thresholds = np.array([threshold for _, threshold in bands][::-1])  # ascending
+    band_index = len(bands) - np.searchsorted(thresholds, values, side='right')
+    band_index = np.clip(band_index, 0, len(bands) - 1)  # below every band counts as the last one
+    histogram = np.bincount(groups * len(bands) + band_index,
+                            minlength=group_count * len(bands)).reshape(group_count, len(bands))
+
+    if labels:
+        indexes = np.unravel_index(keys, [max(len(names), 1) for names in labels])
+        group_labels = list(zip(*([names[i] for i in index.tolist()] for names, index in zip(labels, indexes))))
+        if len(labels) == 1:
+            group_labels = [label for label, in group_labels]
+    else:
+        group_labels = [()]
+
+    results: Dict[GroupKey, GroupStats] = {}
+    for group, label in enumerate(group_labels):
+        count = int(counts[group])
+        results[label] = GroupStats(
+            count=count,
+            mean=float(means[group]),
+            median=float(medians[group]),
+            std=float(stds[group]),
+            lowest=float(ordered[starts[group]]),
+            highest=float(ordered[starts[group] + count - 1]),
+            percentiles={name: float(value[group]) for name, value in quantiles.items()},
+            passed=int(passed[group]),
+            failed=count - int(passed[group]),
+            bands=dict(zip(band_names, histogram[group].tolist()))
+        )
+    return results
+
+
+@instrumented('analytics.group_stats')
+def group_stats(students: Union[StudentStore, Iterable[Student]], by: Union[str, Sequence[str]] = 'class',
+                percentiles: Sequence[float] = PERCENTILES, pass_mark: float = PASS_MARK,
+                bands: Sequence[Tuple[str, float]] = GRADE_BANDS,
+                age_band_width: int = AGE_BAND_WIDTH) -> Dict[GroupKey, GroupStats]:
+    """
+    Grade statistics for every group of grades, in one vectorized pass.
+
+    by is one of 'class', 'subject' and 'age_band', or a sequence of them:
+    by=('class', 'subject') gives each class's statistics per subject, keyed
+    by (class, subject) tuples; an empty sequence gives one group keyed (),
+    for the whole roster. Each grade is one observation: a student with
+    five grades counts five times, and passed/failed count grades at or
+    above pass_mark. bands are (name, lowest grade) pairs, best first.
+
+    Results for a StudentStore are cached until the store next changes.
+    """
+    by = (by,) if isinstance(by, str) else tuple(by)
+    if age_band_width < 1:
+        raise ValueError("age_band_width must be at least 1")
+    params = (by, tuple(percentiles), pass_mark, tuple(map(tuple, bands)), age_band_width)
+    store = _as_store(students)
+    entries = _cache.setdefault(store, {})
+    cached = entries.get(params)
+    if cached is not None and cached[0] == store.version:
+        return cached[1]
+    results = _compute(store, *params)
+    entries[params] = (store.version, results)
+    return results
+
+
+@instrumented('analytics.term_report')
+def term_report(students: Union[StudentStore, Iterable[Student]], pass_mark: float = PASS_MARK,
+                **options) -> Dict[str, dict]:
+    """Every class's overall statistics and per-subject breakdown, from two grouped passes"""
+    store = _as_store(students)
+    overall = group_stats(store, 'class', pass_mark=pass_mark, **options)
+    per_subject = group_stats(store, ('class', 'subject'), pass_mark=pass_mark, **options)
+    report = {class_name: {'overall': stats, 'subjects': {}} for class_name, stats in overall.items()}
+    for (class_name, subject), stats in per_subject.items():
+        report[class_name]['subjects'][subject] = stats
+    return report
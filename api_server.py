@@ -0,0 +1,447 @@
+import asyncio
+import json
+import re
+import threading
+from contextlib import asynccontextmanager
+from dataclasses import asdict, dataclass, field
+from http import HTTPStatus
+from typing import Awaitable, Callable, Dict, List, Optional, Set, Tuple
+from urllib.parse import parse_qs, unquote, urlsplit
+from student import Student
+from student_index import StudentIndex
+from student_store import StudentStore
+from operations import calculate_class_stats, calculate_subject_stats, search_student
+from autosave import AutoSaver
+
+MAX_BODY = 1 << 20
+MAX_HEADERS = 100
+DEFAULT_LIMIT = 100
+CACHE_SIZE = 256
+
+
+class HTTPError(Exception):
+    def __init__(self, status: int, message: str):
+        super().__init__(message)
+        self.status = status
+        self.message = message
+
+
+class ReadWriteLock:
+    """
+    asyncio lock letting any number of readers in at once, or one writer.
+    Waiting writers block new readers, so a stream of reads cannot starve them.
+    """
+
+    def __init__(self):
+        self._condition = asyncio.Condition()
+        self._readers = 0
+        self._writing = False
+        self._writers_waiting = 0
+
+    @asynccontextmanager
+    async def read(self):
+        async with self._condition:
+            await self._condition.wait_for(lambda: not self._writing and not self._writers_waiting)
+            self._readers += 1
+        try:
+            yield
+        finally:
+            async with self._condition:
+                self._readers -= 1
+                self._condition.notify_all()
+
+    @asynccontextmanager
+    async def write(self):
+        async with self._condition:
+            self._writers_waiting += 1
+            try:
+                await self._condition.wait_for(lambda: not self._writing and not self._readers)
+            finally:
+                self._writers_waiting -= 1
+            self._writing = True
+        try:
+            yield
+        finally:
+            async with self._condition:
+                self._writing = False
+                self._condition.notify_all()
+
+
+class StudentService:
+    """
+    The roster operations behind the HTTP API, free of any HTTP detail.
+
+    `version` goes up on every change; cached aggregate responses are keyed
+    on it. With an AutoSaver, mutations hold its lock and mark it dirty, so
+    changes reach the data file in the background.
+    """
+
+    def __init__(self, students: StudentStore, autosave: Optional[AutoSaver] = None):
+        self.students = students
+        self.index = StudentIndex(students)
+        self.autosave = autosave
+        self.lock = autosave.lock if autosave is not None else threading.RLock()
+        self.version = 0
+        if autosave is not None:
+            autosave.start(students.copy)
+
+    def _changed(self):
+        self.version += 1
+        if self.autosave is not None:
+            self.autosave.mark_dirty()
+
+    def _student(self, student_id: str) -> Student:
+        student = self.index.get(student_id)
+        if student is None:
+            raise KeyError(student_id)
+        return student
+
+    def search(self, query: str, by_id: bool = False, limit: int = DEFAULT_LIMIT, offset: int = 0) -> dict:
+        if query:
+            matches = search_student(self.students, query, by_id=by_id, index=self.index)
+        else:
+            matches = self.students
+        page = matches[offset:offset + limit]
+        return {'total': len(matches), 'offset': offset, 'students': [s.to_dict() for s in page]}
+
+    def get(self, student_id: str) -> dict:
+        return self._student(student_id).to_dict()
+
+    def set_grade(self, student_id: str, subject: str, grade: float) -> dict:
+        student = self._student(student_id)
+        with self.lock:
+            student.add_subject(subject, grade)
+            self._changed()
+        return student.to_dict()
+
+    def remove_grade(self, student_id: str, subject: str) -> dict:
+        student = self._student(student_id)
+        if subject not in student.subjects:
+            raise KeyError(subject)
+        with self.lock:
+            student.remove_subject(subject)
+            self._changed()
+        return student.to_dict()
+
+    def stats(self, by: str) -> dict:
+        if by == 'subject':
+            return {subject: asdict(s) for subject, s in calculate_subject_stats(self.students).items()}
+        return {class_name: asdict(s) for class_name, s in calculate_class_stats(self.students).items()}
+
+    def class_stats(self, class_name: str) -> dict:
+        summary = calculate_class_stats(self.students).get(class_name)
+        if summary is None:
+            raise KeyError(class_name)
+        members = [s for s in self.students if s.class_name == class_name]
+        return {'class_name': class_name, **asdict(summary),
+                'subjects': {subject: asdict(s) for subject, s in calculate_subject_stats(members).items()}}
+
+    def health(self) -> dict:
+        return {'students': len(self.students), 'version': self.version}
+
+
+@dataclass
+class Request:
+    method: str
+    path: str
+    query: Dict[str, List[str]]
+    version: str
+    headers: Dict[str, str]
+    body: bytes = b''
+    params: Tuple[str, ...] = ()
+
+    @property
+    def keep_alive(self) -> bool:
+        connection = self.headers.get('connection', '').lower()
+        if self.version == 'HTTP/1.0':
+            return connection == 'keep-alive'
+        return connection != 'close'
+
+    def arg(self, name: str, default: str = '') -> str:
+        return self.query.get(name, [default])[0]
+
+    def int_arg(self, name: str, default: int) -> int:
+        try:
+            value = int(self.arg(name, str(default)))
+        except ValueError:
+            raise HTTPError(400, f"{name} must be an integer") from None
+        if value < 0:
+            raise HTTPError(400, f"{name} must not be negative")
+        return value
+
+    def json(self):
+        try:
+            return json.loads(self.body or b'null')
+        except ValueError:
+            raise HTTPError(400, "Request body is not valid JSON") from None
+
+
+@dataclass
+class Response:
+    status: int
+    body: bytes
+    headers: Dict[str, str] = field(default_factory=dict)
+
+    @classmethod
+    def json(cls, status: int, data, **headers) -> 'Response':
+        return cls(status, json.dumps(data).encode('utf-8'), {'Content-Type': 'application/json', **headers})
+
+    def encode(self, keep_alive: bool) -> bytes:
+        lines = [f"HTTP/1.1 {self.status} {HTTPStatus(self.status).phrase}",
+                 f"Content-Length: {len(self.body)}",
+                 f"Connection: {'keep-alive' if keep_alive else 'close'}"]
+        lines.extend(f"{name}: {value}" for name, value in self.headers.items())
+        return ('\r\n'.join(lines) + '\r\n\r\n').encode('latin-1') + self.body
+
+
+Handler = Callable[[Request], Awaitable[Response]]
+
+
+class APIServer:
+    """
+    HTTP/1.1 JSON API over a StudentService, on asyncio streams.
+
+    Connections are kept alive between requests until the client closes
+    them or stays idle for `idle_timeout` seconds. Reads run on the default
+    thread pool under a shared read lock, so slow aggregates do not stall
+    the event loop; writes are serialized under the exclusive lock.
+
+        GET    /health
+        GET    /students?q=&by_id=&limit=&offset=
+        GET    /students/{id}
+        PUT    /students/{id}/grades/{subject}     {"grade": 90}
+        DELETE /students/{id}/grades/{subject}
+        GET    /stats?by=class|subject
+        GET    /classes/{class_name}/stats
+    """
+
+    def __init__(self, service: StudentService, host: str = '127.0.0.1', port: int = 8000,
+                 idle_timeout: float = 15.0, cache_size: int = CACHE_SIZE):
+        self.service = service
+        self.host = host
+        self.port = port
+        self.idle_timeout = idle_timeout
+        self.cache_size = cache_size
+        self.cache_hits = 0
+        self.cache_misses = 0
+        self._cache: Dict[str, Tuple[int, Response]] = {}
+        self._lock: Optional[ReadWriteLock] = None
+        self._server: Optional[asyncio.AbstractServer] = None
+        self._connections: Set[asyncio.Task] = set()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._thread: Optional[threading.Thread] = None
+        self._routes: List[Tuple[str, re.Pattern, Handler]] = [
+            ('GET', re.compile(r'/health'), self.get_health),
+            ('GET', re.compile(r'/students'), self.get_students),
+            ('GET', re.compile(r'/students/([^/]+)'), self.get_student),
+            ('PUT', re.compile(r'/students/([^/]+)/grades/([^/]+)'), self.put_grade),
+            ('DELETE', re.compile(r'/students/([^/]+)/grades/([^/]+)'), self.delete_grade),
+            ('GET', re.compile(r'/stats'), self.get_stats),
+            ('GET', re.compile(r'/classes/([^/]+)/stats'), self.get_class_stats),
+        ]
+
+    # -- lifecycle --------------------------------------------------------
+
+    async def start(self):
+        self._lock = ReadWriteLock()
+        self._server = await asyncio.start_server(self._handle_connection, self.host, self.port)
+        self.port = self._server.sockets[0].getsockname()[1]  # resolves port 0
+
+    async def serve_forever(self):
+        if self._server is None:
+            await self.start()
+        try:
+            await self._server.serve_forever()
+        except asyncio.CancelledError:
+            pass
+        finally:
+            await self.close()
+
+    async def close(self):
+        """Stop listening and drop open keep-alive connections"""
+        self._server.close()
+        for task in list(self._connections):
+            task.cancel()
+        await asyncio.gather(*self._connections, return_exceptions=True)
+        await self._server.wait_closed()
+
+    def start_in_thread(self) -> 'APIServer':
+        """Run the server on its own event loop thread; returns once it is listening"""
+        started = threading.Event()
+
+        async def run():
+            await self.start()
+            started.set()
+            await self.serve_forever()
+
+        self._loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self._loop.run_until_complete, args=(run(),),
+                                        name="api-server", daemon=True)
+        self._thread.start()
+        started.wait()
+        return self
+
+    def stop(self):
+        """Stop a server started with start_in_thread"""
+        if self._loop is not None and self._server is not None:
+            self._loop.call_soon_threadsafe(self._server.close)
+            self._thread.join(timeout=5)
+            self._loop.close()
+            self._loop = None
+
+    # -- HTTP -------------------------------------------------------------
+
+    async def _handle_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        task = asyncio.current_task()
+        self._connections.add(task)
+        try:
+            while True:
+                try:
+                    request = await asyncio.wait_for(self._read_request(reader), self.idle_timeout)
+                except HTTPError as e:
+                    writer.write(Response.json(e.status, {'error': e.message}).encode(keep_alive=False))
+                    await writer.drain()
+                    break
+                if request is None:
+                    break
+                response = await self._dispatch(request)
+                writer.write(response.encode(request.keep_alive))
+                await writer.drain()
+                if not request.keep_alive:
+                    break
+        except (asyncio.TimeoutError, asyncio.IncompleteReadError, ConnectionError, asyncio.CancelledError):
+            pass
+        finally:
+            self._connections.discard(task)
+            writer.close()
+
+    async def _read_request(self, reader: asyncio.StreamReader) -> Optional[Request]:
+        try:
+            line = await reader.readline()
+        except (asyncio.LimitOverrunError, ValueError):
+            raise HTTPError(414, "Request line too long") from None
+        if not line.strip():
+            return None
+        try:
+            method, target, version = line.decode('latin-1').split()
+        except ValueError:
+            raise HTTPError(400, "Malformed request line") from None
+
+        headers = {}
+        while True:
+            line = await reader.readline()
+            if line in (b'\r\n', b'\n', b''):
+                break
+            if len(headers) >= MAX_HEADERS:
+                raise HTTPError(431, "Too many headers")
+            name, _, value = line.decode('latin-1').partition(':')
+            headers[name.strip().lower()] = value.strip()
+
+        if 'chunked' in headers.get('transfer-encoding', '').lower():
+            raise HTTPError(411, "Chunked bodies are not supported; send Content-Length")
+        try:
+            length = int(headers.get('content-length', 0))
+        except ValueError:
+            raise HTTPError(400, "Invalid Content-Length") from None
+        if length > MAX_BODY:
+            raise HTTPError(413, f"Request body larger than {MAX_BODY} bytes")
+        body = await reader.readexactly(length) if length else b''
+
+        url = urlsplit(target)
+        return Request(method.upper(), url.path.rstrip('/') or '/', parse_qs(url.query), version,
+                       headers, body)
+
+    async def _dispatch(self, request: Request) -> Response:
+        allowed = []
+        for method, pattern, handler in self._routes:
+            match = pattern.fullmatch(request.path)
+            if match is None:
+                continue
+            if method != request.method:
+                allowed.append(method)
+                continue
+            request.params = tuple(unquote(param) for param in match.groups())
+            try:
+                return await handler(request)
+            except HTTPError as e:
+                return Response.json(e.status, {'error': e.message})
+            except Exception as e:
+                return Response.json(500, {'error': f"{type(e).__name__}: {e}"})
+        if allowed:
+            return Response.json(405, {'error': "Method not allowed"}, Allow=', '.join(allowed))
+        return Response.json(404, {'error': f"No route for {request.path}"})
+
+    async def _read(self, func: Callable, *args):
+        """Run a read-only service call on the thread pool alongside other readers"""
+        async with self._lock.read():
+            return await asyncio.get_running_loop().run_in_executor(None, func, *args)
+
+    async def _write(self, func: Callable, *args):
+        async with self._lock.write():
+            return func(*args)
+
+    async def _cached(self, request: Request, func: Callable, *args) -> Response:
+        """Serve an aggregate from the cache while the roster version is unchanged"""
+        key = f"{request.path}?{sorted(request.query.items())}"
+        version = self.service.version
+        cached = self._cache.get(key)
+        if cached is not None and cached[0] == version:
+            self.cache_hits += 1
+            response = cached[1]
+        else:
+            self.cache_misses += 1
+            response = Response.json(200, await self._read(func, *args), ETag=f'"{version}"')
+            if len(self._cache) >= self.cache_size:
+                del self._cache[next(iter(self._cache))]  # oldest first
+            self._cache[key] = (version, response)
+        if request.headers.get('if-none-match') == response.headers['ETag']:
+            return Response(304, b'', {'ETag': response.headers['ETag']})
+        return response
+
+    # -- handlers ---------------------------------------------------------
+
+    async def get_health(self, request: Request) -> Response:
+        return Response.json(200, self.service.health())
+
+    async def get_students(self, request: Request) -> Response:
+        data = await self._read(self.service.search, request.arg('q'), request.arg('by_id') in ('1', 'true'),
+                                request.int_arg('limit', DEFAULT_LIMIT), request.int_arg('offset', 0))
+        return Response.json(200, data)
+
+    async def get_student(self, request: Request) -> Response:
+        try:
+            return Response.json(200, await self._read(self.service.get, request.params[0]))
+        except KeyError:
+            raise HTTPError(404, f"Student {request.params[0]} not found") from None
+
+    async def put_grade(self, request: Request) -> Response:
+        student_id, subject = request.params
+        body = request.json()
+        grade = body.get('grade') if isinstance(body, dict) else None
+        if isinstance(grade, bool) or not isinstance(grade, (int, float)):
+            raise HTTPError(400, 'Body must be {"grade": <number>}')
+        try:
+            return Response.json(200, await self._write(self.service.set_grade, student_id, subject, grade))
+        except KeyError:
+            raise HTTPError(404, f"Student {student_id} not found") from None
+        except ValueError as e:
+            raise HTTPError(400, str(e)) from None
+
+    async def delete_grade(self, request: Request) -> Response:
+        student_id, subject = request.params
+        try:
+            return Response.json(200, await self._write(self.service.remove_grade, student_id, subject))
+        except KeyError as e:
+            raise HTTPError(404, f"{e.args[0]} not found") from None
+
+    async def get_stats(self, request: Request) -> Response:
+        by = request.arg('by', 'class')
+        if by not in ('class', 'subject'):
+            raise HTTPError(400, "by must be 'class' or 'subject'")
+        return await self._cached(request, self.service.stats, by)
+
+    async def get_class_stats(self, request: Request) -> Response:
+        try:
+            return await self._cached(request, self.service.class_stats, request.params[0])
+        except KeyError:
+            raise HTTPError(404, f"Class {request.params[0]} not found") from None
@@ -0,0 +1,115 @@
+import os
+import shutil
+import threading
+import time
+from pathlib import Path
+from typing import Callable, Iterable, Optional
+from student import Student
+from grades_fileio import save_to_file
+
+
+class AutoSaver:
+    """
+    Periodic background saving of a roster that changes in the foreground.
+
+    Callers hold `lock` while they mutate the roster and call mark_dirty()
+    afterwards. Every `interval` seconds a daemon thread takes the lock just
+    long enough to run the snapshot callable (which must return an
+    independent copy), then writes that copy to a temporary file beside the
+    target, fsyncs it and renames it into place, so the target is always a
+    complete file. Before each rename the previous file is kept as
+    `<filename>.1`, shifting older copies up to `<filename>.<backups>`.
+    """
+
+    def __init__(self, filename: str, interval: float = 30.0, backups: int = 3):
+        self.filename = filename
+        self.interval = interval
+        self.backups = backups
+        self.lock = threading.RLock()
+        self.saves = 0
+        self.last_seconds = 0.0
+        self.last_error: Optional[Exception] = None
+        self._snapshot: Optional[Callable[[], Iterable[Student]]] = None
+        self._version = 0
+        self._saved_version = 0
+        self._save_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def dirty(self) -> bool:
+        return self._version != self._saved_version
+
+    def mark_dirty(self):
+        """Note that the roster changed since the last save"""
+        self._version += 1
+
+    def start(self, snapshot: Callable[[], Iterable[Student]]):
+        """Begin saving whatever snapshot() returns whenever the roster is dirty"""
+        self._snapshot = snapshot
+        if self.interval > 0 and self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="autosave", daemon=True)
+            self._thread.start()
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            try:
+                self.save()
+            except Exception as e:
+                # Nowhere to raise to on this thread; the CLI reports it
+                self.last_error = e
+
+    def save(self, force: bool = False) -> bool:
+        """Save now if the roster is dirty (or always with force); returns whether it saved"""
+        with self._save_lock:
+            if self._snapshot is None or not (force or self.dirty):
+                return False
+            with self.lock:
+                version = self._version
+                students = self._snapshot()
+            self._write(students)
+            self._saved_version = version
+            self.saves += 1
+            self.last_error = None
+            return True
+
+    def _write(self, students: Iterable[Student]):
+        target = Path(self.filename)
+        # Same suffix as the target, so save_to_file picks the same format
+        tmp_name = str(target.with_name(f".{target.stem}.autosave{target.suffix}"))
+        start = time.perf_counter()
+        try:
+            save_to_file(students, tmp_name)
+            with open(tmp_name, 'rb') as f:
+                os.fsync(f.fileno())
+        except BaseException:
+            if os.path.exists(tmp_name):
+                os.unlink(tmp_name)
+            raise
+        self._rotate_backups()
+        os.replace(tmp_name, self.filename)
+        self.last_seconds = time.perf_counter() - start
+
+    def _rotate_backups(self):
+        if self.backups <= 0 or not os.path.exists(self.filename):
+            return
+        for n in range(self.backups - 1, 0, -1):
+            older = f"{self.filename}.{n}"
+            if os.path.exists(older):
+                os.replace(older, f"{self.filename}.{n + 1}")
+        newest = f"{self.filename}.1"
+        if os.path.exists(newest):
+            os.unlink(newest)  # only left in place when backups == 1
+        try:
+            # A hard link keeps the target in place until the rename replaces it
+            os.link(self.filename, newest)
+        except OSError:
+            shutil.copy2(self.filename, newest)
+
+    def close(self):
+        """Stop the timer thread and write any unsaved changes"""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        self.save()
@@ -0,0 +1,392 @@
+import argparse
+import csv
+import json
+import shlex
+import sys
+from pathlib import Path
+from typing import Dict, List, Optional, TextIO, Tuple
+from student import Student
+from student_index import StudentIndex
+from operations import (search_student, fuzzy_search_student, sort_students,
+                        calculate_batch_grade_stats, calculate_subject_stats, calculate_class_stats)
+from grades_fileio import load_from_file, save_to_file, apply_delta
+from bulk_import import bulk_import, DUPLICATE_POLICIES
+from validation import DecodeResult, RecordError, iter_decoded_records
+from instrumentation import instrumented
+
+
+class BatchSession:
+    """
+    Roster state shared by every command of one batch invocation. The data
+    file is read on first use and written back once, at the end, if any
+    command changed it.
+    """
+
+    def __init__(self, data_file: str, out: Optional[TextIO] = None, err: Optional[TextIO] = None):
+        self.data_file = data_file
+        self.out = out or sys.stdout
+        self.err = err or sys.stderr
+        self.dirty = False
+        self._students: Optional[List[Student]] = None
+        self._by_id: Optional[Dict[str, Student]] = None
+        self._index: Optional[StudentIndex] = None
+
+    @property
+    def students(self) -> List[Student]:
+        if self._students is None:
+            self._students = load_from_file(self.data_file) if Path(self.data_file).exists() else []
+        return self._students
+
+    @students.setter
+    def students(self, students: List[Student]):
+        self._students = students
+        self.changed()
+
+    @property
+    def index(self) -> StudentIndex:
+        if self._index is None:
+            self._index = StudentIndex(self.students)
+        return self._index
+
+    def by_id(self, student_id: str) -> Optional[Student]:
+        if self._by_id is None:
+            self._by_id = {student.student_id: student for student in self.students}
+        return self._by_id.get(student_id)
+
+    def changed(self):
+        self.dirty = True
+        self._by_id = None
+        self._index = None
+
+    def write(self, rows: List[List]):
+        """Write rows as tab-separated lines in one call"""
+        self.out.write(''.join('\t'.join(str(value) for value in row) + '\n' for row in rows))
+
+    def write_json(self, data):
+        self.out.write(json.dumps(data) + '\n')
+
+    def save(self):
+        if self.dirty:
+            save_to_file(self.students, self.data_file)
+            self.dirty = False
+
+
+def _open_input(filename: str) -> TextIO:
+    return sys.stdin if filename == '-' else open(filename, 'r', newline='')
+
+
+def _read_jsonl(f: TextIO) -> Tuple[List[Student], List[RecordError]]:
+    """Decode JSON Lines records, collecting every bad line instead of stopping at the first"""
+    records, errors = [], []
+    for number, line in enumerate(f, 1):
+        if not line.strip():
+            continue
+        try:
+            records.append((number, json.loads(line)))
+        except json.JSONDecodeError as e:
+            errors.append(RecordError(number, f"invalid JSON: {e.msg}", number))
+    result = DecodeResult()
+    for batch in iter_decoded_records(records, numbered=True):
+        result.extend(batch)
+    return result.students, sorted(errors + result.errors, key=lambda error: error.line)
+
+
+# -- commands -----------------------------------------------------------------
+
+@instrumented('batch.import')
+def cmd_import(session: BatchSession, args) -> int:
+    """Add or replace students from JSON, JSON Lines, CSV, snapshot or SQLite files"""
+    roster = list(session.students)
+    stdin_errors = []
+    if '-' in args.files:
+        students, stdin_errors = _read_jsonl(sys.stdin)
+        roster.extend(students)  # stdin records go in ahead of the files
+    try:
+        report = bulk_import([filename for filename in args.files if filename != '-'],
+                             on_duplicate=args.on_duplicate, workers=args.jobs, roster=roster)
+    except ValueError as e:  # a duplicate under --on-duplicate error; nothing is imported
+        session.err.write(f"Import failed: {e}\n")
+        return 1
+    session.students = report.students
+    session.err.write(f"{report}\n")
+    for error in stdin_errors:
+        session.err.write(f"<stdin>: {error}\n")
+    for error in report.errors:
+        session.err.write(f"{error}\n")
+    return 1 if stdin_errors or report.errors else 0
+
+
+@instrumented('batch.export')
+def cmd_export(session: BatchSession, args) -> int:
+    """Write the roster to a file whose extension picks the format"""
+    try:
+        save_to_file(session.students, args.output)
+    except (OSError, ValueError) as e:
+        session.err.write(f"Cannot export to {args.output}: {e}\n")
+        return 1
+    session.err.write(f"Exported {len(session.students)} students to {args.output}\n")
+    return 0
+
+
+def _student_rows(students: List[Student]) -> List[List]:
+    return [[s.student_id, s.name, s.age, s.class_name, f"{s.average_grade:.2f}"] for s in students]
+
+
+@instrumented('batch.apply_delta')
+def cmd_apply_delta(session: BatchSession, args) -> int:
+    """Bring the roster up to date with delta files saved from the menu, oldest first"""
+    for filename in args.deltas:
+        # Each delta applies whole or not at all; stop at the first bad one so
+        # the roster is left as of the last delta that applied
+        try:
+            upserted, deleted = apply_delta(session.students, filename)
+        except (OSError, ValueError) as e:
+            session.err.write(f"Cannot apply {filename}: {e}\n")
+            return 1
+        session.changed()
+        session.err.write(f"Applied {filename}: {upserted} updated or added, {deleted} deleted\n")
+    return 0
+
+
+@instrumented('batch.search')
+def cmd_search(session: BatchSession, args) -> int:
+    """Print students whose name (or ID) contains the query"""
+    if args.fuzzy:
+        ranked = fuzzy_search_student(session.students, args.query, args.limit, index=session.index)
+        results = [student for student, _ in ranked]
+        if args.json:
+            session.write_json([dict(s.to_dict(), score=round(score, 3)) for s, score in ranked])
+        else:
+            session.write([row + [f"{score:.2f}"] for row, (_, score) in zip(_student_rows(results), ranked)])
+        return 0 if results else 1
+
+    results = search_student(session.students, args.query, by_id=args.by_id, index=session.index)
+    if args.json:
+        session.write_json([s.to_dict() for s in results])
+    else:
+        session.write(_student_rows(results))
+    return 0 if results else 1
+
+
+@instrumented('batch.sort')
+def cmd_sort(session: BatchSession, args) -> int:
+    """Print the roster ordered by name or average grade"""
+    results = sort_students(session.students, by=args.by, descending=args.descending)
+    if args.limit is not None:
+        results = results[:args.limit]
+    if args.json:
+        session.write_json([s.to_dict() for s in results])
+    else:
+        session.write(_student_rows(results))
+    return 0
+
+
+@instrumented('batch.stats')
+def cmd_stats(session: BatchSession, args) -> int:
+    """Print grade statistics per student, subject or class"""
+    students = session.students
+    if args.by == 'student':
+        batch = calculate_batch_grade_stats(students)
+        rows = []
+        for i, student in enumerate(students):
+            stats = batch[i]
+            rows.append([student.student_id, student.name, f"{stats.average:.2f}", f"{stats.median:.2f}",
+                         stats.best_subject[0], stats.worst_subject[0]])
+    elif args.by == 'subject':
+        rows = [[subject, s.count, f"{s.average:.2f}", f"{s.median:.2f}", s.highest, s.lowest]
+                for subject, s in calculate_subject_stats(students).items()]
+    else:
+        rows = [[class_name, s.student_count, s.grade_count, f"{s.average:.2f}",
+                 f"{s.highest_average:.2f}", f"{s.lowest_average:.2f}"]
+                for class_name, s in calculate_class_stats(students).items()]
+    if args.json:
+        session.write_json(rows)
+    else:
+        session.write(rows)
+    return 0
+
+
+@instrumented('batch.report')
+def cmd_report(session: BatchSession, args) -> int:
+    """Print grouped grade statistics, e.g. per class and subject for term-end reports"""
+    from analytics import group_stats, PERCENTILES
+    by = ['class'] if args.by is None else args.by
+    groups = group_stats(session.students, by, pass_mark=args.pass_mark, age_band_width=args.age_band_width)
+    if args.json:
+        session.write_json([{**dict(zip(by, label if isinstance(label, tuple) else (label,))), **stats.to_dict()}
+                            for label, stats in groups.items()])
+        return 0
+    rows = [by + ['count', 'mean', 'median', 'std'] + [f"p{q}" for q in PERCENTILES] + ['pass_rate', 'bands']]
+    for label, stats in groups.items():
+        rows.append(list(label if isinstance(label, tuple) else (label,)) +
+                    [stats.count, f"{stats.mean:.2f}", f"{stats.median:.2f}", f"{stats.std:.2f}"] +
+                    [f"{value:.2f}" for value in stats.percentiles.values()] +
+                    [f"{stats.pass_rate:.3f}", ' '.join(f"{band}:{count}" for band, count in stats.bands.items())])
+    session.write(rows)
+    return 0
+
+
+@instrumented('batch.bulk_grade_upload')
+def cmd_bulk_grade_upload(session: BatchSession, args) -> int:
+    """Apply grades from a CSV with student_id, subject and grade columns"""
+    applied, errors = 0, 0
+    f = _open_input(args.file)
+    try:
+        for line, row in enumerate(csv.DictReader(f), 2):
+            student = session.by_id(row.get('student_id') or '')
+            try:
+                if student is None:
+                    raise ValueError(f"unknown student {row.get('student_id')!r}")
+                student.add_subject(row['subject'], float(row['grade']))
+                applied += 1
+            except (KeyError, TypeError, ValueError) as e:
+                errors += 1
+                session.err.write(f"{args.file}:{line}: {e}\n")
+    finally:
+        if f is not sys.stdin:
+            f.close()
+    if applied:
+        session.changed()
+    session.err.write(f"Applied {applied} grades, {errors} errors\n")
+    return 1 if errors else 0
+
+
+@instrumented('batch.script')
+def cmd_script(session: BatchSession, args) -> int:
+    """Run one command per line from a file or stdin in this process"""
+    parser = build_parser()
+    status = 0
+    f = _open_input(args.file)
+    try:
+        for line in f:
+            words = shlex.split(line, comments=True)
+            if not words:
+                continue
+            try:
+                command = parser.parse_args(words)
+            except SystemExit:
+                status = 2
+                continue
+            if command.handler is cmd_script or command.handler is None:
+                session.err.write(f"Cannot run '{line.strip()}' from a script\n")
+                status = 2
+                continue
+            status = max(status, command.handler(session, command))
+    finally:
+        if f is not sys.stdin:
+            f.close()
+    return status
+
+
+@instrumented('batch.serve')
+def cmd_serve(session: BatchSession, args) -> int:
+    """Serve the roster over a local HTTP/JSON API until interrupted"""
+    import asyncio
+    from student_store import StudentStore
+    from autosave import AutoSaver
+    from api_server import APIServer, StudentService
+    autosave = AutoSaver(session.data_file, interval=args.autosave, backups=args.backups)
+    service = StudentService(StudentStore.from_students(session.students), autosave)
+    server = APIServer(service, args.host, args.port)
+    session.err.write(f"Serving {len(service.students)} students on http://{args.host}:{args.port}/\n")
+    try:
+        asyncio.run(server.serve_forever())
+    except KeyboardInterrupt:
+        pass
+    finally:
+        autosave.close()
+    return 0
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        prog="main.py", description="SmartStudent. Run without a command for the interactive menu.")
+    parser.add_argument('--data', default='students.json',
+                        help="roster file to read and update (default: students.json)")
+    parser.add_argument('--journal', action='store_true',
+                        help="interactive mode: persist every change through the write-ahead journal")
+    parser.add_argument('--autosave', type=float, default=30.0, metavar='SECONDS',
+                        help="interactive and serve modes: save changes in the background this often, "
+                             "and always on exit (default: 30; 0 saves on exit only)")
+    parser.add_argument('--backups', type=int, default=3,
+                        help="interactive and serve modes: previous versions of the roster file to keep "
+                             "(default: 3)")
+    parser.set_defaults(handler=None)
+    commands = parser.add_subparsers(title="commands")
+
+    command = commands.add_parser('import', help=cmd_import.__doc__)
+    command.add_argument('files', nargs='+', help="files to import; '-' reads JSON Lines from stdin")
+    command.add_argument('--on-duplicate', choices=DUPLICATE_POLICIES, default='last',
+                         help="what to do when a student_id is already present (default: last)")
+    command.add_argument('--jobs', type=int, help="worker processes (default: one per CPU)")
+    command.set_defaults(handler=cmd_import)
+
+    command = commands.add_parser('export', help=cmd_export.__doc__)
+    command.add_argument('output', help="output file (.json, .jsonl, .csv, .snap or .db)")
+    command.set_defaults(handler=cmd_export)
+
+    command = commands.add_parser('apply-delta', help=cmd_apply_delta.__doc__)
+    command.add_argument('deltas', nargs='+', help="delta .jsonl files, in the order they were saved")
+    command.set_defaults(handler=cmd_apply_delta)
+
+    command = commands.add_parser('search', help=cmd_search.__doc__)
+    command.add_argument('query')
+    command.add_argument('--by-id', action='store_true')
+    command.add_argument('--fuzzy', action='store_true',
+                         help="rank names by similarity, tolerating typos; adds a score column")
+    command.add_argument('--limit', type=int, default=10, help="most fuzzy matches to print (default: 10)")
+    command.add_argument('--json', action='store_true')
+    command.set_defaults(handler=cmd_search)
+
+    command = commands.add_parser('sort', help=cmd_sort.__doc__)
+    command.add_argument('--by', choices=('name', 'grade'), default='name')
+    command.add_argument('--descending', action='store_true')
+    command.add_argument('--limit', type=int)
+    command.add_argument('--json', action='store_true')
+    command.set_defaults(handler=cmd_sort)
+
+    command = commands.add_parser('stats', help=cmd_stats.__doc__)
+    command.add_argument('--by', choices=('student', 'subject', 'class'), default='student')
+    command.add_argument('--json', action='store_true')
+    command.set_defaults(handler=cmd_stats)
+
+    command = commands.add_parser('report', help=cmd_report.__doc__)
+    command.add_argument('--by', nargs='*', choices=('class', 'subject', 'age_band'),
+                         help="grouping dimensions (default: class; none for the whole roster)")
+    command.add_argument('--pass-mark', type=float, default=50.0)
+    command.add_argument('--age-band-width', type=int, default=2)
+    command.add_argument('--json', action='store_true')
+    command.set_defaults(handler=cmd_report)
+
+    command = commands.add_parser('bulk-grade-upload', help=cmd_bulk_grade_upload.__doc__)
+    command.add_argument('file', help="CSV file, or '-' for stdin")
+    command.set_defaults(handler=cmd_bulk_grade_upload)
+
+    command = commands.add_parser('serve', help=cmd_serve.__doc__)
+    command.add_argument('--host', default='127.0.0.1')
+    command.add_argument('--port', type=int, default=8000)
+    command.set_defaults(handler=cmd_serve)
+
+    command = commands.add_parser('script', help=cmd_script.__doc__)
+    command.add_argument('file', help="command file, or '-' for stdin")
+    command.set_defaults(handler=cmd_script)
+    return parser
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = build_parser().parse_args(argv)
+    if args.handler is None:
+        from cli_interface import StudentCLI
+        if args.journal:
+            # The journal already makes every change durable
+            from journal import StudentJournal
+            StudentCLI(journal=StudentJournal(args.data)).run()
+        else:
+            from autosave import AutoSaver
+            StudentCLI(autosave=AutoSaver(args.data, interval=args.autosave, backups=args.backups)).run()
+        return 0
+
+    session = BatchSession(args.data)
+    status = args.handler(session, args)
+    session.save()
+    return status
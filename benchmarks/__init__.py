@@ -0,0 +1 @@
+"""Performance benchmarks for SmartStudent. Run with: python -m benchmarks.run"""
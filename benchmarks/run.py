@@ -0,0 +1,181 @@
+import argparse
+import gc
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+import tracemalloc
+from dataclasses import dataclass, asdict
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Sequence
+
+from benchmarks.synthetic import generate_students
+from operations import search_student, sort_students, calculate_grade_stats, visualize_grades
+from grades_fileio import save_to_json, load_from_json, save_to_csv, load_from_csv
+
+BASELINE = Path(__file__).with_name('baseline.json')
+DEFAULT_SIZES = (1_000, 10_000, 100_000)
+DEFAULT_THRESHOLD = 1.25  # slower than baseline by more than this factor is a regression
+
+
+class Context:
+    """Roster and scratch files shared by the benchmarks of one size"""
+
+    def __init__(self, students, directory: str):
+        self.students = students
+        self.directory = directory
+
+    def path(self, extension: str) -> str:
+        return os.path.join(self.directory, f"roster.{extension}")
+
+
+@dataclass
+class Benchmark:
+    name: str
+    run: Callable[[Context], object]
+    setup: Optional[Callable[[Context], object]] = None
+
+
+BENCHMARKS: List[Benchmark] = [
+    Benchmark('search_student', lambda c: search_student(c.students, 'ka')),
+    Benchmark('search_student_by_id', lambda c: search_student(c.students, '00042', by_id=True)),
+    Benchmark('sort_students_name', lambda c: sort_students(c.students, by='name')),
+    Benchmark('sort_students_grade', lambda c: sort_students(c.students, by='grade', descending=True)),
+    Benchmark('calculate_grade_stats', lambda c: [calculate_grade_stats(s) for s in c.students]),
+    Benchmark('save_to_json', lambda c: save_to_json(c.students, c.path('json'))),
+    Benchmark('load_from_json', lambda c: load_from_json(c.path('json')),
+              setup=lambda c: save_to_json(c.students, c.path('json'))),
+    Benchmark('save_to_csv', lambda c: save_to_csv(c.students, c.path('csv'))),
+    Benchmark('load_from_csv', lambda c: load_from_csv(c.path('csv')),
+              setup=lambda c: save_to_csv(c.students, c.path('csv'))),
+    Benchmark('visualize_grades', lambda c: visualize_grades(c.students, by='class', output_path=c.path('png'))),
+]
+
+
+@dataclass
+class Result:
+    benchmark: str
+    students: int
+    subjects: int
+    seconds: float
+    students_per_second: float
+    peak_bytes: int
+
+    @property
+    def key(self) -> str:
+        return f"{self.benchmark}@{self.students}x{self.subjects}"
+
+
+def _measure(benchmark: Benchmark, context: Context, subjects: int, repeat: int) -> Result:
+    if benchmark.setup:
+        benchmark.setup(context)
+    timings = []
+    for _ in range(repeat):
+        gc.collect()
+        start = time.perf_counter()
+        benchmark.run(context)
+        timings.append(time.perf_counter() - start)
+
+    # Separate run for memory: tracing slows Python code down several times
+    gc.collect()
+    tracemalloc.start()
+    try:
+        benchmark.run(context)
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+    seconds = min(timings)
+    size = len(context.students)
+    return Result(benchmark.name, size, subjects, seconds, size / seconds if seconds else 0.0, peak)
+
+
+def run_benchmarks(sizes: Sequence[int] = DEFAULT_SIZES, subjects: int = 8, repeat: int = 3,
+                   only: Optional[Sequence[str]] = None, seed: int = 0,
+                   log: Callable[[str], None] = lambda line: None) -> List[Result]:
+    """Time every selected benchmark on a seeded synthetic roster of each size"""
+    selected = [b for b in BENCHMARKS if not only or b.name in only]
+    results = []
+    for size in sizes:
+        students = generate_students(size, subjects=subjects, seed=seed)
+        with tempfile.TemporaryDirectory() as directory:
+            context = Context(students, directory)
+            for benchmark in selected:
+                result = _measure(benchmark, context, subjects, repeat)
+                results.append(result)
+                log(f"{result.benchmark:<24}{size:>10,} {result.seconds * 1000:>10.1f} ms "
+                    f"{result.students_per_second:>14,.0f} students/s {result.peak_bytes / 1e6:>9.1f} MB peak")
+    return results
+
+
+def compare(results: Sequence[Result], baseline: Dict[str, dict],
+            threshold: float = DEFAULT_THRESHOLD) -> List[str]:
+    """Regressions against the baseline, as human-readable lines"""
+    regressions = []
+    for result in results:
+        reference = baseline.get(result.key)
+        if reference is None:
+            continue
+        ratio = result.seconds / reference['seconds'] if reference['seconds'] else 1.0
+        if ratio > threshold:
+            regressions.append(f"{result.key}: {result.seconds * 1000:.1f} ms vs "
+                               f"{reference['seconds'] * 1000:.1f} ms baseline ({ratio:.2f}x)")
+    return regressions
+
+
+def load_baseline(filename: Path = BASELINE) -> Dict[str, dict]:
+    if not Path(filename).exists():
+        return {}
+    with open(filename, 'r') as f:
+        return json.load(f)['results']
+
+
+def save_baseline(results: Sequence[Result], filename: Path = BASELINE):
+    """Record results in the baseline, keeping entries for sizes not re-run"""
+    merged = load_baseline(filename)
+    merged.update({result.key: asdict(result) for result in results})
+    data = {
+        'machine': {'python': platform.python_version(), 'platform': platform.platform(),
+                    'processor': platform.processor() or platform.machine()},
+        'results': merged,
+    }
+    with open(filename, 'w') as f:
+        json.dump(data, f, indent=4)
+        f.write('\n')
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.run",
+                                     description="Benchmark SmartStudent hot paths on synthetic rosters.")
+    parser.add_argument('--sizes', type=int, nargs='+', default=list(DEFAULT_SIZES),
+                        help="roster sizes (default: 1000 10000 100000; up to 1000000)")
+    parser.add_argument('--subjects', type=int, default=8, help="subjects per roster (default: 8)")
+    parser.add_argument('--repeat', type=int, default=3, help="timed runs per benchmark; best is kept")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--only', nargs='+', choices=[b.name for b in BENCHMARKS], help="benchmarks to run")
+    parser.add_argument('--baseline', type=Path, default=BASELINE, help="baseline JSON file")
+    parser.add_argument('--threshold', type=float, default=DEFAULT_THRESHOLD,
+                        help="slowdown factor that counts as a regression (default: 1.25)")
+    parser.add_argument('--update-baseline', action='store_true', help="write these results as the baseline")
+    parser.add_argument('--output', type=Path, help="also write the results to this JSON file")
+    args = parser.parse_args(argv)
+
+    results = run_benchmarks(args.sizes, args.subjects, args.repeat, args.only, args.seed, log=print)
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump([asdict(result) for result in results], f, indent=4)
+    if args.update_baseline:
+        save_baseline(results, args.baseline)
+        print(f"Baseline written to {args.baseline}")
+        return 0
+
+    regressions = compare(results, load_baseline(args.baseline), args.threshold)
+    for line in regressions:
+        print(f"REGRESSION {line}", file=sys.stderr)
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,44 @@
+import random
+from typing import Iterator, List
+from student import Student
+
+_SYLLABLES = ['al', 'an', 'ar', 'be', 'ca', 'da', 'el', 'en', 'fa', 'ga', 'ha', 'is', 'ja', 'ka',
+              'la', 'li', 'ma', 'mi', 'na', 'ni', 'o', 'ra', 'ri', 'sa', 'se', 'ta', 'to', 'va', 'ye', 'zu']
+_SUBJECTS = ['Math', 'Science', 'English', 'History', 'Geography', 'Art', 'Music', 'Physics',
+             'Chemistry', 'Biology', 'French', 'Computing']
+
+
+def subject_names(count: int) -> List[str]:
+    """The first `count` subject names, numbered past the built-in list"""
+    return (_SUBJECTS + [f"Subject {i}" for i in range(len(_SUBJECTS), count)])[:count]
+
+
+def _name(rng: random.Random) -> str:
+    first = ''.join(rng.choice(_SYLLABLES) for _ in range(rng.randint(2, 3)))
+    last = ''.join(rng.choice(_SYLLABLES) for _ in range(rng.randint(2, 4)))
+    return f"{first.capitalize()} {last.capitalize()}"
+
+
+def iter_students(count: int, subjects: int = 8, classes: int = 40, seed: int = 0,
+                  fill: float = 0.9) -> Iterator[Student]:
+    """
+    Yield `count` reproducible synthetic students. Each takes each of the
+    `subjects` subjects with probability `fill`; grades are normally
+    distributed around a per-student ability, rounded to one decimal.
+    """
+    rng = random.Random(seed)
+    names = subject_names(subjects)
+    class_names = [f"{year}{chr(ord('A') + i % 6)}" for i, year in
+                   ((i, 7 + i // 6) for i in range(classes))]
+    for i in range(count):
+        student = Student(f"S{i:07d}", _name(rng), rng.randint(11, 18), rng.choice(class_names))
+        ability = rng.gauss(70, 12)
+        for subject in names:
+            if rng.random() < fill:
+                student.add_subject(subject, round(min(max(rng.gauss(ability, 10), 0), 100), 1))
+        yield student
+
+
+def generate_students(count: int, subjects: int = 8, classes: int = 40, seed: int = 0,
+                      fill: float = 0.9) -> List[Student]:
+    return list(iter_students(count, subjects, classes, seed, fill))
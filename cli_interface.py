@@ -1,23 +1,99 @@
-from typing import List, Optional
-from student import Student
-from operations import search_student, sort_students, calculate_average_grade, visualize_grades
-from grades_fileio import save_to_json, load_from_json, save_to_csv, load_from_csv
+from __future__ import annotations
+import sys
+import threading
+from typing import List, Optional, TYPE_CHECKING
+from student import Student, MUTATIONS
+from student_index import StudentIndex
+from ranking import StudentRanking
+from journal import StudentJournal
+from autosave import AutoSaver
+from instrumentation import instrumented
+from result_cache import ResultCache
+from operations import (search_student, fuzzy_search_student, sort_students, calculate_average_grade,
+                        calculate_grade_stats, visualize_grades, top_students, student_rank)
+from grades_fileio import (save_to_json, save_to_csv, save_to_snapshot, save_to_sqlite,
+                           save_delta, apply_delta, current_revision, load_store_from_file)
 from colorama import Fore, Back, Style, init
 
+if TYPE_CHECKING:
+    # numpy comes in with the store, which is imported where the roster is
+    # first built so that importing this module stays cheap
+    from student_store import StudentStore
+
 init(autoreset=True)
 
 class StudentCLI:
-    def __init__(self):
-        self.students: List[Student] = []
-        self.load_data()
+    page_size = 20
     
-    def load_data(self, filename: str = 'students.json'):
+    def __init__(self, journal: Optional[StudentJournal] = None, autosave: Optional[AutoSaver] = None):
+        self.journal = journal
+        self.autosave = autosave
+        # Held around every mutation so a background save sees a consistent roster
+        self.lock = autosave.lock if autosave is not None else threading.RLock()
+        # Reports, sorts and charts are reused until the roster version moves
+        self._version = 0
+        self.cache = ResultCache(version=lambda: self.version)
+        from student_store import StudentStore
+        self.students: StudentStore = StudentStore()
+        if autosave is not None:
+            if self.load_data(autosave.filename):
+                autosave.start(self._snapshot)
+            else:
+                # An empty roster saved over a file we could not read would lose it
+                print(f"{Fore.RED}✗ Autosave is off; {autosave.filename} will not be "
+                      f"overwritten.{Style.RESET_ALL}")
+                self.autosave = None
+        else:
+            self.load_data()
+
+    @property
+    def students(self) -> StudentStore:
+        return self._students
+
+    @students.setter
+    def students(self, students: StudentStore):
+        self._version += 1
+        # A delta saved next holds what changed after this roster arrived
+        self._saved_at = current_revision()
+        self._deleted_ids: List[str] = []  # a plain list cannot report its own deletions
+        self._students = students
+        # Built on first use: at 100k students the search index is several
+        # times the size of the roster itself
+        self._index: Optional[StudentIndex] = None
+        self._ranking: Optional[StudentRanking] = None
+
+    @property
+    def index(self) -> StudentIndex:
+        """ID and name index over the roster, built on the first search or lookup"""
+        if self._index is None:
+            self._index = StudentIndex(self.students)
+        return self._index
+
+    @property
+    def ranking(self) -> StudentRanking:
+        """Maintained grade ranking, built on the first sort, top-k or rank"""
+        if self._ranking is None:
+            self._ranking = StudentRanking(self.students)
+        return self._ranking
+    
+    @instrumented('cli.load_data')
+    def load_data(self, filename: str = 'students.json') -> bool:
+        """Load the roster, picking the format from the extension as saving does; False on failure"""
+        from student_store import StudentStore
         try:
-            self.students = load_from_json(filename)
+            if self.journal is not None:
+                self.students = StudentStore.from_students(self.journal.recover())
+                if self.journal.skipped_entries:
+                    print(f"{Fore.YELLOW}⚠ Skipped {self.journal.skipped_entries} unreadable "
+                          f"journal entries{Style.RESET_ALL}")
+            else:
+                self.students = load_store_from_file(filename)
             print(f"{Fore.GREEN}✓ Loaded {len(self.students)} students{Style.RESET_ALL}")
+            return True
         except Exception as e:
             print(f"{Fore.RED}✗ Error loading data: {e}{Style.RESET_ALL}")
-            self.students = []
+            self.students = StudentStore()
+            return False
 
     def display_menu(self):
         print(f"\n{Back.BLUE}{Fore.WHITE} SmartStudent Management System {Style.RESET_ALL}")
@@ -33,6 +109,92 @@ class StudentCLI:
         print(f"{Fore.MAGENTA}10.{Style.RESET_ALL} Visualize Grades")
         print(f"{Fore.RED}0.{Style.RESET_ALL} Exit")
 
+    def _snapshot(self) -> StudentStore:
+        # Runs under self.lock on the autosave thread: copy, don't serialize
+        from student_store import StudentStore
+        if isinstance(self.students, StudentStore):
+            return self.students.copy()
+        return StudentStore.from_students(self.students)
+
+    @property
+    def version(self) -> tuple:
+        """
+        Roster version: moves on every change made through the menu, a
+        Student or GradeBook method, or a StudentStore view
+        """
+        return self._version, MUTATIONS.value, getattr(self.students, 'version', 0)
+
+    def _changed(self):
+        self._version += 1
+        if self.autosave is not None:
+            self.autosave.mark_dirty()
+
+    def _student_added(self, student: Student):
+        self._changed()
+        if self._index is not None:
+            self._index.add(student)
+        if self._ranking is not None:
+            self._ranking.add(student)
+        if self.journal is not None:
+            self.journal.record_add(student)
+            self._maybe_compact()
+
+    def _student_edited(self, student: Student, old_id: str):
+        self._changed()
+        if self._index is not None:
+            self._index.update(student)
+        if self._ranking is not None:
+            self._ranking.update(student)
+        if self.journal is not None:
+            self.journal.record_edit(old_id, student)
+            self._maybe_compact()
+
+    def _grade_changed(self, student: Student, subject: str, grade: Optional[float]):
+        self._changed()
+        if self._ranking is not None:
+            self._ranking.update(student)
+        if self.journal is not None:
+            self.journal.record_grade(student.student_id, subject, grade)
+            self._maybe_compact()
+
+    def _student_deleted(self, student: Student):
+        self._changed()
+        self._deleted_ids.append(student.student_id)
+        if self._index is not None:
+            self._index.remove(student)
+        if self._ranking is not None:
+            self._ranking.remove(student)
+        if self.journal is not None:
+            self.journal.record_delete(student.student_id)
+            self._maybe_compact()
+
+    def _maybe_compact(self):
+        if self.journal.needs_compaction():
+            self.journal.compact(self.students)
+
+    def select_student(self, action: str) -> Optional[Student]:
+        """
+        Prompt for a student by list number, or by ID written as #ID; None
+        when cancelled. A plain number is always the list number, so an ID
+        that looks like one never picks a different student.
+        """
+        while True:
+            choice = input(f"{Fore.YELLOW}Enter student number or #ID to {action} (0 to cancel): {Style.RESET_ALL}").strip()
+            if choice == '0':
+                return None
+            if choice.isdigit():
+                number = int(choice)
+                if 1 <= number <= len(self.students):
+                    return self.students[number - 1]
+                print(f"{Fore.RED}Please enter a number between 0 and {len(self.students)}, "
+                      f"or #ID{Style.RESET_ALL}")
+                continue
+            student_id = choice[1:] if choice.startswith('#') else choice
+            student = self.index.get(student_id)
+            if student is not None:
+                return student
+            print(f"{Fore.RED}No student with ID {student_id}.{Style.RESET_ALL}")
+
     def get_user_choice(self) -> int:
         while True:
             try:
@@ -43,6 +205,7 @@ class StudentCLI:
             except ValueError:
                 print(f"{Fore.RED}Invalid input. Please enter a number.{Style.RESET_ALL}")
 
+    @instrumented('cli.add_student')
     def add_student(self):
         print(f"\n{Back.BLUE}{Fore.WHITE} ADD NEW STUDENT {Style.RESET_ALL}")
         student_id = input(f"{Fore.YELLOW}Enter Student ID:{Style.RESET_ALL} ").strip()
@@ -76,9 +239,35 @@ class StudentCLI:
                 except ValueError:
                     print(f"{Fore.RED}Please enter a valid number for grade.{Style.RESET_ALL}")
         
-        self.students.append(student)
+        with self.lock:
+            self.students.append(student)
+            self._student_added(self.students[-1])
         print(f"\n{Fore.GREEN}✓ Student {name} added successfully!{Style.RESET_ALL}")
 
+    def _render_page(self, students: List[Student], start: int) -> str:
+        """Render one page of the listing as a single string"""
+        lines = []
+        for i in range(start, min(start + self.page_size, len(students))):
+            student = students[i]
+            avg_grade = calculate_average_grade(student)
+            color = Fore.GREEN if avg_grade >= 75 else Fore.YELLOW if avg_grade >= 50 else Fore.RED
+            lines.append(f"{color}{i + 1}. {student.name} (ID: {student.student_id})\n"
+                         f"   Age: {student.age}, Class: {student.class_name}\n"
+                         f"   Subjects: {len(student.subjects)}, Avg Grade: {avg_grade:.2f}\n"
+                         f"{'-' * 40}{Style.RESET_ALL}\n")
+        return ''.join(lines)
+
+    def _find_in_listing(self, students: List[Student], text: str, start: int) -> Optional[int]:
+        """Position of the next student whose name contains text, wrapping around"""
+        text = text.lower()
+        total = len(students)
+        for offset in range(total):
+            i = (start + offset) % total
+            if text in students[i].name.lower():
+                return i
+        return None
+
+    @instrumented('cli.view_students')
     def view_students(self, students: Optional[List[Student]] = None):
         students_to_display = students if students is not None else self.students
         
@@ -86,15 +275,39 @@ class StudentCLI:
             print(f"\n{Fore.YELLOW}No students found.{Style.RESET_ALL}")
             return
         
-        print(f"\n{Back.BLUE}{Fore.WHITE} STUDENT LIST {Style.RESET_ALL}")
-        for i, student in enumerate(students_to_display, 1):
-            avg_grade = calculate_average_grade(student)
-            color = Fore.GREEN if avg_grade >= 75 else Fore.YELLOW if avg_grade >= 50 else Fore.RED
-            print(f"{color}{i}. {student.name} (ID: {student.student_id})")
-            print(f"   Age: {student.age}, Class: {student.class_name}")
-            print(f"   Subjects: {len(student.subjects)}, Avg Grade: {avg_grade:.2f}")
-            print("-" * 40 + Style.RESET_ALL)
+        total = len(students_to_display)
+        pages = (total + self.page_size - 1) // self.page_size
+        page = 0
+        while True:
+            header = f"\n{Back.BLUE}{Fore.WHITE} STUDENT LIST {Style.RESET_ALL}"
+            if pages > 1:
+                header += f" Page {page + 1} of {pages} ({total} students)"
+            sys.stdout.write(header + "\n" + self._render_page(students_to_display, page * self.page_size))
+            sys.stdout.flush()
+            if pages == 1:
+                return
+            
+            command = input(f"{Fore.YELLOW}[n]ext, [p]revious, page number, /name to find, "
+                            f"Enter to finish: {Style.RESET_ALL}").strip()
+            if not command:
+                return
+            elif command.lower() == 'n':
+                page = min(page + 1, pages - 1)
+            elif command.lower() == 'p':
+                page = max(page - 1, 0)
+            elif command.startswith('/'):
+                found = self._find_in_listing(students_to_display, command[1:], (page + 1) * self.page_size)
+                if found is None:
+                    print(f"{Fore.YELLOW}No student in this list matches '{command[1:]}'.{Style.RESET_ALL}")
+                else:
+                    page = found // self.page_size
+            else:
+                try:
+                    page = min(max(int(command), 1), pages) - 1
+                except ValueError:
+                    print(f"{Fore.RED}Invalid input. Use n, p, a page number or /name.{Style.RESET_ALL}")
 
+    @instrumented('cli.search_student')
     def search_student(self):
         if not self.students:
             print(f"\n{Fore.YELLOW}No students available to search.{Style.RESET_ALL}")
@@ -114,14 +327,21 @@ class StudentCLI:
                 print(f"{Fore.RED}Invalid input. Please enter a number.{Style.RESET_ALL}")
         
         query = input("Enter search term: ").strip()
-        results = search_student(self.students, query, by_id=(search_type == 2))
+        results = search_student(self.students, query, by_id=(search_type == 2), index=self.index)
         
         if results:
             print(f"\n{Fore.GREEN}Found {len(results)} matching students:{Style.RESET_ALL}")
             self.view_students(results)
+            return
+
+        close = fuzzy_search_student(self.students, query, index=self.index) if search_type == 1 else []
+        if close:
+            print(f"\n{Fore.YELLOW}No exact match. Closest names:{Style.RESET_ALL}")
+            self.view_students([student for student, _ in close])
         else:
             print(f"\n{Fore.YELLOW}No matching students found.{Style.RESET_ALL}")
 
+    @instrumented('cli.edit_student')
     def edit_student(self):
         if not self.students:
             print(f"\n{Fore.YELLOW}No students available to edit.{Style.RESET_ALL}")
@@ -129,19 +349,10 @@ class StudentCLI:
         
         self.view_students()
         
-        while True:
-            try:
-                choice = int(input(f"{Fore.YELLOW}Enter student number to edit (0 to cancel): {Style.RESET_ALL}"))
-                if 0 <= choice <= len(self.students):
-                    break
-                print(f"{Fore.RED}Please enter a number between 0 and {len(self.students)}{Style.RESET_ALL}")
-            except ValueError:
-                print(f"{Fore.RED}Invalid input. Please enter a number.{Style.RESET_ALL}")
-        
-        if choice == 0:
+        student = self.select_student("edit")
+        if student is None:
             return
         
-        student = self.students[choice - 1]
         print(f"\n{Back.BLUE}Editing {student.name}{Style.RESET_ALL}")
         
         name = input(f"Enter new name ({student.name}): ").strip() or student.name
@@ -149,7 +360,10 @@ class StudentCLI:
         age = int(age_input) if age_input else student.age
         class_name = input(f"Enter new class ({student.class_name}): ").strip() or student.class_name
         
-        student.edit_info(name, age, class_name)
+        old_id = student.student_id
+        with self.lock:
+            student.edit_info(name, age, class_name)
+            self._student_edited(student, old_id)
         
         while True:
             print(f"\n{Fore.CYAN}Current Subjects:{Style.RESET_ALL}")
@@ -170,7 +384,9 @@ class StudentCLI:
                     try:
                         grade = float(input(f"Enter grade for {subject} (0-100): ").strip())
                         if 0 <= grade <= 100:
-                            student.add_subject(subject, grade)
+                            with self.lock:
+                                student.add_subject(subject, grade)
+                                self._grade_changed(student, subject, grade)
                             print(f"{Fore.GREEN}✓ {subject} grade updated.{Style.RESET_ALL}")
                             break
                         print(f"{Fore.RED}Grade must be between 0 and 100.{Style.RESET_ALL}")
@@ -179,13 +395,16 @@ class StudentCLI:
             elif sub_choice == '2':
                 subject = input("Enter subject name to remove: ").strip()
                 if subject in student.subjects:
-                    del student.subjects[subject]
+                    with self.lock:
+                        student.remove_subject(subject)
+                        self._grade_changed(student, subject, None)
                     print(f"{Fore.GREEN}✓ {subject} removed.{Style.RESET_ALL}")
                 else:
                     print(f"{Fore.RED}Subject not found.{Style.RESET_ALL}")
         
         print(f"\n{Fore.GREEN}✓ Student information updated successfully!{Style.RESET_ALL}")
 
+    @instrumented('cli.delete_student')
     def delete_student(self):
         if not self.students:
             print(f"\n{Fore.YELLOW}No students available to delete.{Style.RESET_ALL}")
@@ -193,21 +412,16 @@ class StudentCLI:
         
         self.view_students()
         
-        while True:
-            try:
-                choice = int(input(f"{Fore.YELLOW}Enter student number to delete (0 to cancel): {Style.RESET_ALL}"))
-                if 0 <= choice <= len(self.students):
-                    break
-                print(f"{Fore.RED}Please enter a number between 0 and {len(self.students)}{Style.RESET_ALL}")
-            except ValueError:
-                print(f"{Fore.RED}Invalid input. Please enter a number.{Style.RESET_ALL}")
-        
-        if choice == 0:
+        student = self.select_student("delete")
+        if student is None:
             return
-        
-        student = self.students.pop(choice - 1)
-        print(f"\n{Fore.GREEN}✓ Student {student.name} has been deleted.{Style.RESET_ALL}")
+        name = student.name
+        with self.lock:
+            self._student_deleted(student)
+            self.students.remove(student)
+        print(f"\n{Fore.GREEN}✓ Student {name} has been deleted.{Style.RESET_ALL}")
 
+    @instrumented('cli.calculate_average')
     def calculate_average(self):
         if not self.students:
             print(f"\n{Fore.YELLOW}No students available.{Style.RESET_ALL}")
@@ -215,29 +429,26 @@ class StudentCLI:
         
         self.view_students()
         
-        while True:
-            try:
-                choice = int(input(f"{Fore.YELLOW}Enter student number to calculate average (0 to cancel): {Style.RESET_ALL}"))
-                if 0 <= choice <= len(self.students):
-                    break
-                print(f"{Fore.RED}Please enter a number between 0 and {len(self.students)}{Style.RESET_ALL}")
-            except ValueError:
-                print(f"{Fore.RED}Invalid input. Please enter a number.{Style.RESET_ALL}")
-        
-        if choice == 0:
+        student = self.select_student("calculate average")
+        if student is None:
             return
         
-        student = self.students[choice - 1]
-        avg = calculate_average_grade(student)
+        stats = calculate_grade_stats(student, cache=self.cache)
         
         print(f"\n{Back.BLUE}Average grade for {student.name}{Style.RESET_ALL}")
         if student.subjects:
             for subject, grade in student.subjects.items():
                 print(f"- {subject}: {grade}")
-            print(f"\nOverall Average: {avg:.2f}")
+            print(f"\nOverall Average: {stats.average:.2f}")
+            print(f"Median: {stats.median:.2f}")
+            print(f"Best: {stats.best_subject[0]} ({stats.best_subject[1]}), "
+                  f"Weakest: {stats.worst_subject[0]} ({stats.worst_subject[1]})")
+            rank = student_rank(self.students, student, student.class_name, ranking=self.ranking)
+            print(f"Class Rank: {rank} of {self.ranking.class_size(student.class_name)} in {student.class_name}")
         else:
             print(f"{Fore.YELLOW}No subjects/grades recorded for this student.{Style.RESET_ALL}")
 
+    @instrumented('cli.sort_students')
     def sort_students(self):
         if not self.students:
             print(f"\n{Fore.YELLOW}No students available to sort.{Style.RESET_ALL}")
@@ -248,24 +459,39 @@ class StudentCLI:
         print("2. Name (Z-A)")
         print("3. Grade (High-Low)")
         print("4. Grade (Low-High)")
+        print("5. Top N by Grade")
         
         while True:
             try:
-                choice = int(input(f"{Fore.YELLOW}Enter sort method (1-4): {Style.RESET_ALL}"))
-                if 1 <= choice <= 4:
+                choice = int(input(f"{Fore.YELLOW}Enter sort method (1-5): {Style.RESET_ALL}"))
+                if 1 <= choice <= 5:
                     break
-                print(f"{Fore.RED}Please enter a number between 1 and 4.{Style.RESET_ALL}")
+                print(f"{Fore.RED}Please enter a number between 1 and 5.{Style.RESET_ALL}")
             except ValueError:
                 print(f"{Fore.RED}Invalid input. Please enter a number.{Style.RESET_ALL}")
         
         if choice in (1, 2):
-            sorted_students = sort_students(self.students, by='name', descending=(choice == 2))
+            sorted_students = sort_students(self.students, by='name', descending=(choice == 2),
+                                            ranking=self.ranking, cache=self.cache)
+        elif choice in (3, 4):
+            sorted_students = sort_students(self.students, by='grade', descending=(choice == 3),
+                                            ranking=self.ranking, cache=self.cache)
         else:
-            sorted_students = sort_students(self.students, by='grade', descending=(choice == 3))
+            while True:
+                try:
+                    count = int(input(f"{Fore.YELLOW}How many students: {Style.RESET_ALL}"))
+                    if count > 0:
+                        break
+                    print(f"{Fore.RED}Please enter a positive number.{Style.RESET_ALL}")
+                except ValueError:
+                    print(f"{Fore.RED}Invalid input. Please enter a number.{Style.RESET_ALL}")
+            class_name = input(f"{Fore.YELLOW}Class name (blank for all classes): {Style.RESET_ALL}").strip() or None
+            sorted_students = top_students(self.students, count, class_name, ranking=self.ranking)
         
         print(f"\n{Back.BLUE}Sorted Students{Style.RESET_ALL}")
         self.view_students(sorted_students)
 
+    @instrumented('cli.save_data')
     def save_data(self):
         if not self.students:
             print(f"\n{Fore.YELLOW}No student data to save.{Style.RESET_ALL}")
@@ -274,13 +500,16 @@ class StudentCLI:
         print("\nSave Data To:")
         print("1. JSON File")
         print("2. CSV File")
+        print("3. Binary Snapshot")
+        print("4. SQLite Database")
+        print("5. Changes Since Last Save (delta)")
         
         while True:
             try:
-                choice = int(input(f"{Fore.YELLOW}Enter file format (1-2): {Style.RESET_ALL}"))
-                if choice in (1, 2):
+                choice = int(input(f"{Fore.YELLOW}Enter file format (1-5): {Style.RESET_ALL}"))
+                if 1 <= choice <= 5:
                     break
-                print(f"{Fore.RED}Please enter 1 or 2.{Style.RESET_ALL}")
+                print(f"{Fore.RED}Please enter a number between 1 and 5.{Style.RESET_ALL}")
             except ValueError:
                 print(f"{Fore.RED}Invalid input. Please enter a number.{Style.RESET_ALL}")
         
@@ -289,81 +518,136 @@ class StudentCLI:
             filename = "students"
         
         try:
-            if choice == 1:
-                save_to_json(self.students, f"{filename}.json")
-            else:
-                save_to_csv(self.students, f"{filename}.csv")
+            with self.lock:
+                saved_at = current_revision()
+                if choice == 1:
+                    save_to_json(self.students, f"{filename}.json")
+                elif choice == 2:
+                    save_to_csv(self.students, f"{filename}.csv")
+                elif choice == 3:
+                    save_to_snapshot(self.students, f"{filename}.snap")
+                elif choice == 4:
+                    save_to_sqlite(self.students, f"{filename}.db")
+                else:
+                    saved_at = save_delta(self.students, f"{filename}.delta.jsonl", self._saved_at,
+                                          deleted=self._deleted_ids)
+                self._saved_at = saved_at
+                self._deleted_ids = []
             print(f"\n{Fore.GREEN}✓ Data saved successfully!{Style.RESET_ALL}")
         except Exception as e:
             print(f"\n{Fore.RED}✗ Error saving data: {e}{Style.RESET_ALL}")
 
+    @instrumented('cli.load_data_menu')
     def load_data_menu(self):
         print("\nLoad Data From:")
         print("1. JSON File")
         print("2. CSV File")
+        print("3. Binary Snapshot")
+        print("4. SQLite Database")
+        print("5. Apply Changes (delta) to Current Data")
         
         while True:
             try:
-                choice = int(input(f"{Fore.YELLOW}Enter file format (1-2): {Style.RESET_ALL}"))
-                if choice in (1, 2):
+                choice = int(input(f"{Fore.YELLOW}Enter file format (1-5): {Style.RESET_ALL}"))
+                if 1 <= choice <= 5:
                     break
-                print(f"{Fore.RED}Please enter 1 or 2.{Style.RESET_ALL}")
+                print(f"{Fore.RED}Please enter a number between 1 and 5.{Style.RESET_ALL}")
             except ValueError:
                 print(f"{Fore.RED}Invalid input. Please enter a number.{Style.RESET_ALL}")
         
         filename = input(f"{Fore.YELLOW}Enter filename (with extension): {Style.RESET_ALL}").strip()
         
         try:
-            if choice == 1:
-                self.students = load_from_json(filename)
-            else:
-                self.students = load_from_csv(filename)
+            if choice == 5:
+                with self.lock:
+                    upserted, deleted = apply_delta(self.students, filename, index=self._index,
+                                                    journal=self.journal)
+                    self._ranking = None  # rebuilt on the next sort or rank
+                    self._changed()
+                    if self.journal is not None:
+                        self._maybe_compact()
+                print(f"\n{Fore.GREEN}✓ Applied {upserted} updates and {deleted} deletions "
+                      f"from {filename}{Style.RESET_ALL}")
+                return
+            students = load_store_from_file(filename, ('.json', '.csv', '.snap', '.db')[choice - 1])
+            if self.autosave is not None:
+                self.autosave.save()  # keep edits made before the switch
+            with self.lock:
+                # Not marked dirty: only edits made from here on are saved over the data file
+                self.students = students
+                if self.journal is not None:
+                    # The journal's snapshot plus entries must rebuild this roster, not the old one
+                    self.journal.compact(self.students, background=False)
             print(f"\n{Fore.GREEN}✓ Loaded {len(self.students)} students from {filename}{Style.RESET_ALL}")
         except FileNotFoundError:
             print(f"\n{Fore.RED}✗ File not found.{Style.RESET_ALL}")
         except Exception as e:
             print(f"\n{Fore.RED}✗ Error loading data: {e}{Style.RESET_ALL}")
 
+    @instrumented('cli.show_visualization')
     def show_visualization(self):
         if not self.students:
             print(f"\n{Fore.YELLOW}No student data to visualize.{Style.RESET_ALL}")
             return
         
+        print("\nChart Grades:")
+        print("1. All grades")
+        print("2. Per class")
+        print("3. Per subject")
+        choice = input(f"{Fore.YELLOW}Enter choice (1-3, default 1): {Style.RESET_ALL}").strip()
+        by = {'2': 'class', '3': 'subject'}.get(choice)
+        output_path = input(f"{Fore.YELLOW}Save chart as (default grade_analysis.png): {Style.RESET_ALL}").strip()
+        
         try:
-            visualize_grades(self.students)
-            print(f"\n{Fore.GREEN}✓ Visualization generated successfully!{Style.RESET_ALL}")
+            path = visualize_grades(self.students, by=by, output_path=output_path or "grade_analysis.png",
+                                    cache=self.cache)
+            print(f"\n{Fore.GREEN}✓ Visualization saved to {path}{Style.RESET_ALL}")
         except Exception as e:
             print(f"\n{Fore.RED}✗ Error generating visualization: {e}{Style.RESET_ALL}")
 
+    def close(self):
+        """Flush the journal and write any unsaved changes; also runs on Ctrl-C or EOF"""
+        if self.journal is not None:
+            self.journal.close()
+        if self.autosave is not None:
+            if self.autosave.dirty:
+                print(f"{Fore.CYAN}Saving changes to {self.autosave.filename}...{Style.RESET_ALL}")
+            self.autosave.close()
+
     def run(self):
         print(f"{Back.BLUE}{Fore.WHITE} Welcome to SmartStudent Management System {Style.RESET_ALL}")
         
-        while True:
-            self.display_menu()
-            choice = self.get_user_choice()
+        try:
+            while True:
+                if self.autosave is not None and self.autosave.last_error is not None:
+                    print(f"{Fore.RED}✗ Autosave failed: {self.autosave.last_error}{Style.RESET_ALL}")
+                self.display_menu()
+                choice = self.get_user_choice()
             
-            if choice == 0:
-                print(f"\n{Fore.MAGENTA}Goodbye!{Style.RESET_ALL}")
-                break
-            elif choice == 1:
-                self.add_student()
-            elif choice == 2:
-                self.view_students()
-            elif choice == 3:
-                self.search_student()
-            elif choice == 4:
-                self.edit_student()
-            elif choice == 5:
-                self.delete_student()
-            elif choice == 6:
-                self.calculate_average()
-            elif choice == 7:
-                self.sort_students()
-            elif choice == 8:
-                self.save_data()
-            elif choice == 9:
-                self.load_data_menu()
-            elif choice == 10:
-                self.show_visualization()
+                if choice == 0:
+                    print(f"\n{Fore.MAGENTA}Goodbye!{Style.RESET_ALL}")
+                    break
+                elif choice == 1:
+                    self.add_student()
+                elif choice == 2:
+                    self.view_students()
+                elif choice == 3:
+                    self.search_student()
+                elif choice == 4:
+                    self.edit_student()
+                elif choice == 5:
+                    self.delete_student()
+                elif choice == 6:
+                    self.calculate_average()
+                elif choice == 7:
+                    self.sort_students()
+                elif choice == 8:
+                    self.save_data()
+                elif choice == 9:
+                    self.load_data_menu()
+                elif choice == 10:
+                    self.show_visualization()
             
-            input(f"\n{Fore.YELLOW}Press Enter to continue...{Style.RESET_ALL}")
\ No newline at end of file
+                input(f"\n{Fore.YELLOW}Press Enter to continue...{Style.RESET_ALL}")
+        finally:
+            self.close()
@@ -0,0 +1,184 @@
+import math
+from typing import Dict, Iterable, List, Optional, Tuple, Union
+import numpy as np
+from student import Student
+from student_store import StudentStore
+from sqlite_store import SQLiteStudentStore
+
+RESOLUTION = 10  # histogram bins per grade point
+_BINS = 100 * RESOLUTION + 1
+_GROUPINGS = (None, 'class', 'subject')
+ALL_GRADES = "All grades"
+
+
+class GradeHistogram:
+    """
+    Grade counts in fixed bins 1/RESOLUTION wide over 0-100. It is a
+    mergeable quantile sketch whose size does not depend on how many
+    grades it holds; quantiles are exact to within half a bin.
+    """
+
+    def __init__(self, counts: Optional[np.ndarray] = None, total: float = 0.0):
+        self.counts = np.zeros(_BINS, dtype=np.int64) if counts is None else np.asarray(counts, dtype=np.int64)
+        self.total = float(total)
+
+    @classmethod
+    def from_grades(cls, grades: Iterable[float]) -> 'GradeHistogram':
+        histogram = cls()
+        histogram.add(grades)
+        return histogram
+
+    def add(self, grades: Iterable[float]):
+        grades = np.fromiter(grades, dtype=np.float64) if not isinstance(grades, np.ndarray) else grades
+        self.counts += np.bincount(_bin_of(grades), minlength=_BINS)
+        self.total += float(grades.sum())
+
+    def merge(self, other: 'GradeHistogram'):
+        self.counts += other.counts
+        self.total += other.total
+
+    @property
+    def count(self) -> int:
+        return int(self.counts.sum())
+
+    @property
+    def mean(self) -> float:
+        count = self.count
+        return self.total / count if count else 0.0
+
+    @property
+    def min(self) -> float:
+        return float(np.flatnonzero(self.counts)[0]) / RESOLUTION
+
+    @property
+    def max(self) -> float:
+        return float(np.flatnonzero(self.counts)[-1]) / RESOLUTION
+
+    def quantile(self, q: float) -> float:
+        """Grade at quantile q (0-1), interpolating like numpy's default"""
+        count = self.count
+        if not count:
+            raise ValueError("Empty histogram has no quantiles")
+        cumulative = np.cumsum(self.counts)
+        rank = q * (count - 1)
+        lower, upper = np.searchsorted(cumulative, [math.floor(rank) + 1, math.ceil(rank) + 1])
+        fraction = rank - math.floor(rank)
+        return float(lower + (upper - lower) * fraction) / RESOLUTION
+
+    def coarse(self, bins: int = 10) -> Tuple[np.ndarray, np.ndarray]:
+        """(edges, counts) of the histogram regrouped into `bins` equal bins"""
+        edges = np.linspace(0, 100, bins + 1)
+        counts, _ = np.histogram(np.arange(_BINS) / RESOLUTION, bins=edges, weights=self.counts)
+        return edges, counts
+
+    def box_stats(self, label: str = '') -> dict:
+        """Box plot statistics for Axes.bxp, whiskers at 1.5 IQR"""
+        q1, median, q3 = self.quantile(0.25), self.quantile(0.5), self.quantile(0.75)
+        iqr = q3 - q1
+        present = np.flatnonzero(self.counts) / RESOLUTION
+        low = present[present >= q1 - 1.5 * iqr]
+        high = present[present <= q3 + 1.5 * iqr]
+        return {'label': label, 'med': median, 'q1': q1, 'q3': q3, 'mean': self.mean,
+                'whislo': float(low[0]), 'whishi': float(high[-1]), 'fliers': []}
+
+    def __repr__(self):
+        return f"GradeHistogram(count={self.count}, mean={self.mean:.2f})"
+
+
+def _bin_of(grades: np.ndarray) -> np.ndarray:
+    return np.clip(np.rint(grades * RESOLUTION), 0, _BINS - 1).astype(np.int64)
+
+
+def summarize_grades(students: Union[StudentStore, SQLiteStudentStore, Iterable[Student]],
+                     by: Optional[str] = None) -> Dict[str, GradeHistogram]:
+    """
+    One GradeHistogram per class or per subject (or one for all grades when
+    by is None), built in a single pass without keeping the grades.
+    """
+    if by not in _GROUPINGS:
+        raise ValueError("Invalid grouping. Use None, 'class' or 'subject'")
+    if isinstance(students, SQLiteStudentStore):
+        return _summarize_rows(students.grade_bins(by, RESOLUTION), by)
+    if isinstance(students, StudentStore):
+        return _summarize_store(students, by)
+    return _summarize_students(students, by)
+
+
+def _summarize_store(store: StudentStore, by: Optional[str]) -> Dict[str, GradeHistogram]:
+    grades = store.grade_matrix
+    rows, columns = np.nonzero(~np.isnan(grades))
+    values = grades[rows, columns]
+    if by == 'class':
+        labels, groups = store.classes, store.class_codes[rows]
+    elif by == 'subject':
+        labels, groups = store.subjects, columns
+    else:
+        labels, groups = [ALL_GRADES], np.zeros(len(values), dtype=np.int64)
+    cells = groups * _BINS + _bin_of(values)
+    counts = np.bincount(cells, minlength=len(labels) * _BINS).reshape(len(labels), _BINS)
+    totals = np.bincount(groups, weights=values, minlength=len(labels))
+    return {label: GradeHistogram(counts[i], totals[i])
+            for i, label in enumerate(labels) if counts[i].any()}
+
+
+def _summarize_students(students: Iterable[Student], by: Optional[str]) -> Dict[str, GradeHistogram]:
+    counts: Dict[str, List[int]] = {}
+    totals: Dict[str, float] = {}
+    for student in students:
+        for subject, grade in student.subjects.items():
+            label = student.class_name if by == 'class' else subject if by == 'subject' else ALL_GRADES
+            if label not in counts:
+                counts[label] = [0] * _BINS
+                totals[label] = 0.0
+            counts[label][min(max(round(grade * RESOLUTION), 0), _BINS - 1)] += 1
+            totals[label] += grade
+    return {label: GradeHistogram(np.array(counts[label]), totals[label]) for label in counts}
+
+
+def _summarize_rows(rows: List[Tuple[str, int, int, float]], by: Optional[str]) -> Dict[str, GradeHistogram]:
+    summaries: Dict[str, GradeHistogram] = {}
+    for group, bin_index, count, total in rows:
+        histogram = summaries.setdefault(group if by else ALL_GRADES, GradeHistogram())
+        histogram.counts[min(max(bin_index, 0), _BINS - 1)] += count
+        histogram.total += total
+    return summaries
+
+
+def render_grade_charts(summaries: Dict[str, GradeHistogram], output_path: str = "grade_analysis.png",
+                        bins: int = 10, show: bool = False, columns: int = 4) -> str:
+    """
+    Draw one histogram per group plus a box plot of every group side by
+    side, from the summaries alone, and save the figure to output_path.
+    Without show the figure is rendered off-screen, so no display is needed.
+    """
+    groups = [(label, histogram) for label, histogram in summaries.items() if histogram.count]
+    if not groups:
+        raise ValueError("No grades to chart")
+    columns = min(columns, len(groups))
+    rows = math.ceil(len(groups) / columns)
+    size = (4 * columns, 3 * (rows + 1))
+    if show:
+        import matplotlib.pyplot as plt
+        figure = plt.figure(figsize=size)
+    else:
+        from matplotlib.figure import Figure
+        figure = Figure(figsize=size)
+
+    grid = figure.add_gridspec(rows + 1, columns)
+    for i, (label, histogram) in enumerate(groups):
+        axes = figure.add_subplot(grid[i // columns, i % columns])
+        edges, counts = histogram.coarse(bins)
+        axes.stairs(counts, edges, fill=True)
+        axes.set_xlim(0, 100)
+        axes.set_title(f"{label} (n={histogram.count})")
+
+    axes = figure.add_subplot(grid[rows, :])
+    axes.bxp([histogram.box_stats(label) for label, histogram in groups], showfliers=False, showmeans=True)
+    axes.set_ylim(0, 100)
+    axes.set_title("Grade Spread")
+    figure.suptitle("Grade Distribution")
+    figure.tight_layout()
+    figure.savefig(output_path)
+    if show:
+        plt.show()
+    return output_path
@@ -1,61 +1,441 @@
 import json
 import csv
-from typing import List
-from student import Student
+import os
+import sys
+from typing import Iterable, Iterator, List, Optional, Sequence, Tuple, TYPE_CHECKING
+from itertools import chain, islice
+from student import Student, MUTATIONS, plain_grade
+from sqlite_store import SQLiteStudentStore
 from pathlib import Path
+from instrumentation import instrumented
+from validation import (BATCH_SIZE, DecodeResult, InvalidRecordsError, RecordDecoder, RecordError,
+                        iter_decoded_csv, iter_decoded_records)
 
-def save_to_json(students: List[Student], filename: str):
-    """Save students to JSON file"""
-    data = [student.to_dict() for student in students]
+if TYPE_CHECKING:
+    from student_store import StudentStore  # imported on use; it pulls in numpy
+    from student_index import StudentIndex
+    from journal import StudentJournal
+
+_CHUNK_SIZE = 1 << 16
+_WHITESPACE = ' \t\r\n'
+_CSV_FIELDS = ['student_id', 'name', 'age', 'class_name']
+_SCHEMA_SAMPLE_SIZE = 1000
+
+def _decode_all(batches: Iterable[DecodeResult], filename: str) -> List[Student]:
+    result = DecodeResult()
+    for batch in batches:
+        result.extend(batch)
+    if result.errors:
+        raise InvalidRecordsError(filename, result.errors)
+    return result.students
+
+def _is_store(students) -> bool:
+    # A StudentStore cannot exist unless its module has been imported
+    store_module = sys.modules.get('student_store')
+    return store_module is not None and isinstance(students, store_module.StudentStore)
+
+@instrumented('fileio.save_to_json', io='write')
+def save_to_json(students: Iterable[Student], filename: str):
+    """Save students to JSON file, writing each record as it is produced"""
     with open(filename, 'w') as f:
-        json.dump(data, f, indent=4)
+        f.write('[')
+        empty = True
+        for student in students:
+            record = json.dumps(student.to_dict(), indent=4).replace('\n', '\n    ')
+            f.write(('\n    ' if empty else ',\n    ') + record)
+            empty = False
+        f.write(']' if empty else '\n]')
+
+def iter_from_json(filename: str, chunk_size: int = _CHUNK_SIZE) -> Iterator[Student]:
+    """Incrementally parse a JSON array file, yielding one Student at a time"""
+    return map(Student.from_dict, _iter_json_records(filename, chunk_size))
 
+def _iter_json_records(filename: str, chunk_size: int = _CHUNK_SIZE) -> Iterator[dict]:
+    if not Path(filename).exists():
+        return
+
+    decoder = json.JSONDecoder()
+    with open(filename, 'r') as f:
+        buffer, pos, eof = '', 0, False
+        started = False
+        while True:
+            while pos < len(buffer) and (buffer[pos] in _WHITESPACE or (started and buffer[pos] == ',')):
+                pos += 1
+            if pos == len(buffer):
+                if eof:
+                    raise ValueError(f"Unexpected end of JSON array in {filename}")
+                chunk = f.read(chunk_size)
+                eof = not chunk
+                buffer, pos = buffer[pos:] + chunk, 0
+                continue
+
+            if not started:
+                if buffer[pos] != '[':
+                    raise ValueError(f"Expected a JSON array in {filename}")
+                started = True
+                pos += 1
+                continue
+            if buffer[pos] == ']':
+                return
+
+            try:
+                item, end = decoder.raw_decode(buffer, pos)
+            except json.JSONDecodeError:
+                if eof:
+                    raise
+                chunk = f.read(chunk_size)
+                eof = not chunk
+                buffer, pos = buffer[pos:] + chunk, 0
+                continue
+            pos = end
+            yield item
+
+@instrumented('fileio.load_from_json', io='read', filename_arg=0)
 def load_from_json(filename: str) -> List[Student]:
-    """Load students from JSON file"""
+    """Load students from JSON file, raising InvalidRecordsError that lists every bad record"""
+    return _decode_all(iter_decoded_records(_iter_json_records(filename)), filename)
+
+@instrumented('fileio.save_to_jsonl', io='write')
+def save_to_jsonl(students: Iterable[Student], filename: str):
+    """Save students to a JSON Lines file, one record per line"""
+    with open(filename, 'w') as f:
+        for student in students:
+            f.write(json.dumps(student.to_dict()) + '\n')
+
+def iter_from_jsonl(filename: str) -> Iterator[Student]:
+    """Yield students from a JSON Lines file one line at a time"""
+    return map(Student.from_dict, _iter_jsonl_records(filename))
+
+def _iter_jsonl_records(filename: str) -> Iterator[dict]:
+    return (record for _, record in _iter_numbered_jsonl_records(filename))
+
+def _iter_numbered_jsonl_records(filename: str) -> Iterator[Tuple[int, dict]]:
+    """(file line, record) for each non-blank line"""
     if not Path(filename).exists():
-        return []
-    
+        return
+
     with open(filename, 'r') as f:
-        data = json.load(f)
-    
-    return [Student.from_dict(item) for item in data]
+        for number, line in enumerate(f, 1):
+            if line.strip():
+                yield number, json.loads(line)
 
-def save_to_csv(students: List[Student], filename: str):
-    """Save students to CSV file"""
-    if not students:
+@instrumented('fileio.load_from_jsonl', io='read', filename_arg=0)
+def load_from_jsonl(filename: str) -> List[Student]:
+    """Load students from a JSON Lines file, raising InvalidRecordsError that lists every bad record"""
+    return _decode_all(iter_decoded_records(_iter_numbered_jsonl_records(filename), numbered=True), filename)
+
+@instrumented('fileio.save_to_csv', io='write')
+def save_to_csv(students: Iterable[Student], filename: str,
+                subjects: Optional[Sequence[str]] = None,
+                sample_size: int = _SCHEMA_SAMPLE_SIZE):
+    """
+    Save students to CSV file in a single streaming pass.
+
+    Subject columns come from `subjects` when given, from the subjects of a
+    StudentStore that still hold a grade, from every student of a list or other sequence, or else
+    from the first `sample_size` students of a one-shot iterator. A student
+    with a subject outside that schema raises ValueError. The file is
+    written beside the target and renamed into place, so a failure never
+    leaves a truncated file.
+    """
+    if subjects is None and _is_store(students):
+        import numpy as np  # already loaded by the store
+        graded = ~np.isnan(students.grade_matrix).all(axis=0)
+        subjects = sorted(subject for subject, used in zip(students.subjects, graded) if used)
+    elif subjects is None and isinstance(students, Sequence):
+        subjects = sorted({subject for student in students for subject in student.subjects})
+    records = iter(students)
+    sample = list(islice(records, sample_size if subjects is None else 1))
+    if not sample:
         return
-        
-    fieldnames = ['student_id', 'name', 'age', 'class_name']
-    all_subjects = set()
-    for student in students:
-        all_subjects.update(student.subjects.keys())
-    
-    with open(filename, 'w', newline='') as f:
-        writer = csv.DictWriter(f, fieldnames=fieldnames + sorted(all_subjects))
-        writer.writeheader()
-        for student in students:
-            row = student.to_dict()
-            row.update(student.subjects)
-            writer.writerow(row)
+    if subjects is None:
+        subjects = sorted({subject for student in sample for subject in student.subjects})
+    schema = set(subjects)
+
+    def rows():
+        for student in chain(sample, records):
+            grades = student.subjects.as_dict()
+            if not schema.issuperset(grades):
+                unknown = ', '.join(sorted(set(grades) - schema))
+                raise ValueError(f"Student {student.student_id} has subjects outside the CSV schema: {unknown}")
+            yield [student.student_id, student.name, student.age, student.class_name] + \
+                [plain_grade(grades[subject]) if subject in grades else '' for subject in subjects]
 
+    tmp_name = f"{filename}.tmp"
+    try:
+        with open(tmp_name, 'w', newline='') as f:
+            writer = csv.writer(f)
+            writer.writerow(_CSV_FIELDS + list(subjects))
+            writer.writerows(rows())
+    except BaseException:
+        os.remove(tmp_name)
+        raise
+    os.replace(tmp_name, filename)
+
+@instrumented('fileio.iter_from_csv', io='read', filename_arg=0)
+def iter_from_csv(filename: str) -> Iterator[Student]:
+    """Yield students from a CSV file, decoded and validated a batch of rows at a time"""
+    for batch in iter_decoded_csv(filename):
+        if batch.errors:
+            raise InvalidRecordsError(filename, batch.errors)
+        yield from batch.students
+
+def _iter_csv_records(filename: str) -> Iterator[dict]:
+    """Raw CSV rows as student records, with values still as strings and blank grades dropped"""
+    if not Path(filename).exists():
+        return
+
+    with open(filename, 'r', newline='') as f:
+        reader = csv.reader(f)
+        header = next(reader, None)
+        if header is None:
+            return
+        missing = [field for field in _CSV_FIELDS if field not in header]
+        if missing:
+            raise ValueError(f"CSV file {filename} is missing columns: {', '.join(missing)}")
+
+        id_col, name_col, age_col, class_col = (header.index(field) for field in _CSV_FIELDS)
+        subject_cols = [(col, subject) for col, subject in enumerate(header) if subject not in _CSV_FIELDS]
+        width = len(header)
+        for row in reader:
+            if not any(value.strip() for value in row):
+                continue  # blank lines, as csv.DictReader skips them
+            if len(row) < width:
+                row += [''] * (width - len(row))
+            yield {'student_id': row[id_col], 'name': row[name_col], 'age': row[age_col],
+                   'class_name': row[class_col],
+                   'subjects': {subject: row[col] for col, subject in subject_cols if row[col]}}
+
+@instrumented('fileio.load_from_csv', io='read', filename_arg=0)
 def load_from_csv(filename: str) -> List[Student]:
-    """Load students from CSV file"""
+    """Load students from CSV file, raising InvalidRecordsError that lists every bad row"""
+    return _decode_all(iter_decoded_csv(filename), filename)
+
+@instrumented('fileio.save_to_snapshot', io='write')
+def save_to_snapshot(students: Iterable[Student], filename: str):
+    """Save students to a binary columnar snapshot"""
+    from student_store import StudentStore
+    store = students if isinstance(students, StudentStore) else StudentStore.from_students(students)
+    store.save_snapshot(filename)
+
+@instrumented('fileio.load_from_snapshot', io='read', filename_arg=0)
+def load_from_snapshot(filename: str) -> 'StudentStore':
+    """Open a binary snapshot as a memory-mapped StudentStore"""
+    from student_store import StudentStore
+    if not Path(filename).exists():
+        return StudentStore()
+    return StudentStore.open_snapshot(filename)
+
+@instrumented('fileio.save_to_sqlite', io='write')
+def save_to_sqlite(students: Iterable[Student], filename: str):
+    """Replace the contents of a SQLite database with students"""
+    with SQLiteStudentStore(filename) as store:
+        store.clear()
+        store.extend(students)
+
+@instrumented('fileio.load_from_sqlite', io='read', filename_arg=0)
+def load_from_sqlite(filename: str) -> List[Student]:
+    """Load every student from a SQLite database"""
     if not Path(filename).exists():
         return []
-    
-    students = []
+    with SQLiteStudentStore(filename) as store:
+        return list(store)
+
+DELTA_FORMAT = 1
+
+def current_revision() -> int:
+    """Revision to pass as since to the next save_delta, taken right after a full load or save"""
+    return MUTATIONS.value
+
+def changes_since(students: Iterable[Student], since: int) -> Tuple[List[Student], List[str]]:
+    """
+    Students added or changed after revision since, and the IDs a
+    StudentStore has deleted since then. A plain list cannot tell what left
+    it, so its deletions must be tracked by the caller.
+    """
+    if _is_store(students):
+        return students.changes_since(since)
+    return [student for student in students if student.revision > since], []
+
+@instrumented('fileio.save_delta', io='write')
+def save_delta(students: Iterable[Student], filename: str, since: int,
+               deleted: Iterable[str] = ()) -> int:
+    """
+    Write only what changed after revision since as a JSON Lines delta: a
+    header line, then one {"delete": id} line per removed ID and one
+    {"upsert": record} line per added or changed student. deleted adds
+    IDs removed from a plain list. Returns the revision to pass as since
+    next time; a change made while writing may appear in both deltas,
+    which is harmless because applying is idempotent.
+    """
+    until = MUTATIONS.value
+    changed, removed = changes_since(students, since)
+    removed = list(dict.fromkeys(chain(removed, deleted)))
+    with open(filename, 'w') as f:
+        f.write(json.dumps({'delta': DELTA_FORMAT, 'upserts': len(changed), 'deletes': len(removed)}) + '\n')
+        f.writelines(json.dumps({'delete': student_id}) + '\n' for student_id in removed)
+        f.writelines(json.dumps({'upsert': student.to_dict()}) + '\n' for student in changed)
+    return until
+
+def _read_delta(filename: str) -> Tuple[List[str], List[Student]]:
+    """Parse and validate a whole delta before anything is applied"""
+    deletes, upserts, errors = [], [], []
+    decoder = RecordDecoder()
     with open(filename, 'r') as f:
-        reader = csv.DictReader(f)
-        for row in reader:
-            student = Student(
-                row['student_id'],
-                row['name'],
-                int(row['age']),
-                row['class_name']
-            )
-            for subject, grade in row.items():
-                if subject not in ['student_id', 'name', 'age', 'class_name'] and grade:
-                    student.add_subject(subject, float(grade))
-            students.append(student)
-    
-    return students
\ No newline at end of file
+        header = json.loads(f.readline() or 'null')
+        if not isinstance(header, dict) or header.get('delta') != DELTA_FORMAT:
+            raise ValueError(f"{filename} is not a student delta")
+        for number, line in enumerate(f, 2):
+            if not line.strip():
+                continue
+            try:
+                entry = json.loads(line)
+            except json.JSONDecodeError as e:
+                errors.append(RecordError(number, f"invalid JSON: {e.msg}", number))
+                continue
+            if isinstance(entry, dict) and isinstance(entry.get('delete'), str):
+                deletes.append(entry['delete'])
+            elif isinstance(entry, dict) and 'upsert' in entry:
+                result = decoder.decode([entry['upsert']], first_record=number, lines=[number])
+                upserts.extend(result.students)
+                errors.extend(result.errors)
+            else:
+                errors.append(RecordError(number, "expected a delete or upsert entry", number))
+    if errors:
+        raise InvalidRecordsError(filename, errors)
+    return deletes, upserts
+
+@instrumented('fileio.apply_delta', io='read')
+def apply_delta(students: List[Student], filename: str, index: Optional['StudentIndex'] = None,
+                journal: Optional['StudentJournal'] = None) -> Tuple[int, int]:
+    """
+    Apply a delta written by save_delta to the roster it was taken against,
+    in place: deletions first, then upserts, which replace the student with
+    the same ID or append a new one. With an index over students, lookups
+    and index upkeep cost O(changes); without one, the roster is scanned
+    once for an ID map. With a journal, each deletion and upsert applied is
+    recorded in it as well. Nothing changes if any entry is invalid.
+    Returns (upserted, deleted) counts.
+    """
+    deletes, upserts = _read_delta(filename)
+    by_id = None if index is not None else {student.student_id: student for student in students}
+    lookup = index.get if index is not None else by_id.get
+
+    deleted = 0
+    for student_id in deletes:
+        student = lookup(student_id)
+        if student is None:
+            continue
+        students.remove(student)
+        deleted += 1
+        if index is not None:
+            index.remove(student)
+        else:
+            del by_id[student_id]
+        if journal is not None:
+            journal.record_delete(student_id)
+
+    for update in upserts:
+        student = lookup(update.student_id)
+        if student is None:
+            added = students.append(update)
+            student = added if added is not None else update  # a StudentStore returns its view
+            if index is not None:
+                index.add(student)
+            else:
+                by_id[student.student_id] = student
+        else:
+            student.name, student.age, student.class_name = update.name, update.age, update.class_name
+            student.subjects = update.subjects.as_dict()
+            if index is not None:
+                index.update(student)
+        if journal is not None:
+            journal.record_add(student)  # replayed as an upsert by ID
+    return len(upserts), deleted
+
+_LOADERS = {
+    '.json': load_from_json,
+    '.jsonl': load_from_jsonl,
+    '.csv': load_from_csv,
+    '.snap': load_from_snapshot,
+    '.db': load_from_sqlite,
+}
+_SAVERS = {
+    '.json': save_to_json,
+    '.jsonl': save_to_jsonl,
+    '.csv': save_to_csv,
+    '.snap': save_to_snapshot,
+    '.db': save_to_sqlite,
+}
+
+_RECORD_READERS = {
+    '.json': _iter_json_records,
+    '.jsonl': _iter_jsonl_records,
+    '.csv': _iter_csv_records,
+}
+
+def iter_records(filename: str) -> Iterator[dict]:
+    """
+    Yield unvalidated student records (dicts shaped like Student.to_dict)
+    from any supported file, so callers can check each record on its own
+    """
+    reader = _RECORD_READERS.get(Path(filename).suffix.lower())
+    if reader is not None:
+        return reader(filename)
+    return (student.to_dict() for student in load_from_file(filename))
+
+def load_from_file(filename: str) -> List[Student]:
+    """Load students, picking the format from the file extension"""
+    loader = _LOADERS.get(Path(filename).suffix.lower())
+    if loader is None:
+        raise ValueError(f"Unsupported file type: {filename}")
+    return list(loader(filename))
+
+_BATCH_DECODERS = {
+    '.json': lambda filename, batch_size: iter_decoded_records(_iter_json_records(filename), batch_size),
+    '.jsonl': lambda filename, batch_size: iter_decoded_records(_iter_numbered_jsonl_records(filename),
+                                                                batch_size, numbered=True),
+    '.csv': iter_decoded_csv,
+}
+
+def iter_decoded_file(filename: str, batch_size: int = BATCH_SIZE) -> Iterator[DecodeResult]:
+    """
+    Decode any supported file one batch at a time without stopping at bad
+    records; CSV and JSON Lines errors carry the file line they are on
+    """
+    decode = _BATCH_DECODERS.get(Path(filename).suffix.lower())
+    if decode is not None:
+        return decode(filename, batch_size)
+    return iter_decoded_records(iter_records(filename), batch_size)
+
+@instrumented('fileio.load_store_from_file', io='read', filename_arg=0)
+def load_store_from_file(filename: str, suffix: Optional[str] = None) -> 'StudentStore':
+    """
+    Load students into a StudentStore, picking the format from suffix or
+    else the file extension. Text formats are decoded a batch at a time
+    straight into the store, so the roster never exists as one list of
+    Student objects; every bad record is still listed in InvalidRecordsError.
+    """
+    from student_store import StudentStore
+    suffix = (suffix or Path(filename).suffix).lower()
+    if suffix == '.snap':
+        return load_from_snapshot(filename)
+    decode = _BATCH_DECODERS.get(suffix)
+    if decode is None:
+        return StudentStore.from_students(load_from_file(filename))
+    store = StudentStore()
+    errors: List[RecordError] = []
+    for batch in decode(filename, BATCH_SIZE):
+        errors.extend(batch.errors)
+        if not errors:
+            store.extend(batch.students)
+    if errors:
+        raise InvalidRecordsError(filename, errors)
+    return store
+
+def save_to_file(students: Iterable[Student], filename: str):
+    """Save students, picking the format from the file extension"""
+    saver = _SAVERS.get(Path(filename).suffix.lower())
+    if saver is None:
+        raise ValueError(f"Unsupported file type: {filename}")
+    saver(students, filename)
@@ -0,0 +1,242 @@
+import atexit
+import functools
+import json
+import os
+import threading
+import time
+from collections.abc import Sized
+from typing import Callable, Dict, List, Optional
+
+# Environment switches, read once at import:
+#   SMARTSTUDENT_METRICS=metrics.json   time and count instrumented calls, dump JSON at exit
+#   SMARTSTUDENT_PROFILE=cpu,memory     also capture a cProfile and/or tracemalloc profile
+#   SMARTSTUDENT_PROFILE_DIR=dir        where profiles go (default: current directory)
+METRICS_ENV = 'SMARTSTUDENT_METRICS'
+PROFILE_ENV = 'SMARTSTUDENT_PROFILE'
+PROFILE_DIR_ENV = 'SMARTSTUDENT_PROFILE_DIR'
+
+_FIRST_BUCKET = 1e-6  # latency buckets double from 1 microsecond
+_BUCKETS = 32
+
+
+class LatencyHistogram:
+    """Call latencies in power-of-two buckets from 1 microsecond up"""
+
+    def __init__(self):
+        self.buckets = [0] * _BUCKETS
+        self.count = 0
+        self.total = 0.0
+        self.min = float('inf')
+        self.max = 0.0
+
+    def observe(self, seconds: float):
+        bucket = 0
+        bound = _FIRST_BUCKET
+        while seconds > bound and bucket < _BUCKETS - 1:
+            bound *= 2
+            bucket += 1
+        self.buckets[bucket] += 1
+        self.count += 1
+        self.total += seconds
+        self.min = min(self.min, seconds)
+        self.max = max(self.max, seconds)
+
+    def percentile(self, q: float) -> float:
+        """Upper bound of the bucket holding quantile q (0-1)"""
+        if not self.count:
+            return 0.0
+        target = q * self.count
+        seen = 0
+        for bucket, count in enumerate(self.buckets):
+            seen += count
+            if seen >= target and count:
+                return min(_FIRST_BUCKET * 2 ** bucket, self.max)
+        return self.max
+
+    def to_dict(self) -> dict:
+        return {
+            'count': self.count,
+            'total_seconds': self.total,
+            'mean_seconds': self.total / self.count if self.count else 0.0,
+            'min_seconds': self.min if self.count else 0.0,
+            'max_seconds': self.max,
+            'p50_seconds': self.percentile(0.5),
+            'p90_seconds': self.percentile(0.9),
+            'p99_seconds': self.percentile(0.99),
+            'buckets': {f"<={_FIRST_BUCKET * 2 ** i:.6g}s": count
+                        for i, count in enumerate(self.buckets) if count},
+        }
+
+
+class Metrics:
+    """Thread-safe registry of latency histograms and counters"""
+
+    def __init__(self):
+        self.timers: Dict[str, LatencyHistogram] = {}
+        self.counters: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, name: str, seconds: float):
+        with self._lock:
+            timer = self.timers.get(name)
+            if timer is None:
+                timer = self.timers[name] = LatencyHistogram()
+            timer.observe(seconds)
+
+    def count(self, name: str, amount: int = 1):
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + amount
+
+    def clear(self):
+        with self._lock:
+            self.timers.clear()
+            self.counters.clear()
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {
+                'timers': {name: timer.to_dict() for name, timer in sorted(self.timers.items())},
+                'counters': dict(sorted(self.counters.items())),
+            }
+
+    def dump(self, filename: str, **extra):
+        """Write a JSON snapshot, plus any extra top-level sections"""
+        data = self.snapshot()
+        data.update(extra)
+        with open(filename, 'w') as f:
+            json.dump(data, f, indent=4)
+            f.write('\n')
+
+
+METRICS = Metrics()
+ENABLED = bool(os.environ.get(METRICS_ENV) or os.environ.get(PROFILE_ENV))
+
+
+def _file_size(filename) -> int:
+    try:
+        return os.path.getsize(filename)
+    except (OSError, TypeError, ValueError):
+        return 0
+
+
+def instrumented(name: Optional[str] = None, io: Optional[str] = None, filename_arg: int = 1):
+    """
+    Time calls to the decorated function and count the records it handles.
+
+    Records are the length of a sized result, or of a sized first argument
+    for functions returning None; generator functions count the items they
+    yield. With io='read' or io='write' the size of the file named by
+    argument filename_arg (or `filename=`) is added to the bytes counters.
+
+    When instrumentation is disabled at import the function is returned
+    unwrapped, so it costs nothing.
+    """
+    def decorate(func: Callable) -> Callable:
+        if not ENABLED:
+            return func
+        import inspect
+        label = name or f"{func.__module__}.{func.__qualname__}"
+
+        def filename_of(args, kwargs):
+            if 'filename' in kwargs:
+                return kwargs['filename']
+            return args[filename_arg] if len(args) > filename_arg else None
+
+        def count_bytes(args, kwargs):
+            if io is not None:
+                METRICS.count(f"{label}.bytes_{io}", _file_size(filename_of(args, kwargs)))
+
+        if inspect.isgeneratorfunction(func):
+            @functools.wraps(func)
+            def generator_wrapper(*args, **kwargs):
+                elapsed, records = 0.0, 0
+                iterator = func(*args, **kwargs)
+                try:
+                    while True:
+                        start = time.perf_counter()
+                        try:
+                            item = next(iterator)
+                        except StopIteration:
+                            return
+                        finally:
+                            elapsed += time.perf_counter() - start
+                        records += 1
+                        yield item
+                finally:
+                    METRICS.observe(label, elapsed)
+                    METRICS.count(f"{label}.records", records)
+                    count_bytes(args, kwargs)
+            return generator_wrapper
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                result = func(*args, **kwargs)
+            except BaseException:
+                METRICS.count(f"{label}.errors")
+                raise
+            finally:
+                METRICS.observe(label, time.perf_counter() - start)
+            sized = result if result is not None else (args[0] if args else None)
+            if isinstance(sized, Sized) and not isinstance(sized, (str, bytes)):
+                METRICS.count(f"{label}.records", len(sized))
+            count_bytes(args, kwargs)
+            return result
+        return wrapper
+    return decorate
+
+
+class _Profiler:
+    """cProfile and tracemalloc capture started at import and written at exit"""
+
+    def __init__(self, modes: List[str], directory: str):
+        self.modes = modes
+        self.directory = directory
+        self.profile = None
+        if 'cpu' in modes:
+            import cProfile
+            self.profile = cProfile.Profile()
+            self.profile.enable()
+        if 'memory' in modes:
+            import tracemalloc
+            tracemalloc.start(10)
+
+    def write(self) -> dict:
+        """Write the captured profiles; returns a summary for the metrics dump"""
+        summary = {}
+        os.makedirs(self.directory, exist_ok=True)
+        if self.profile is not None:
+            self.profile.disable()
+            path = os.path.join(self.directory, 'smartstudent.prof')
+            self.profile.dump_stats(path)
+            summary['cpu_profile'] = path
+        if 'memory' in self.modes:
+            import tracemalloc
+            if tracemalloc.is_tracing():
+                current, peak = tracemalloc.get_traced_memory()
+                path = os.path.join(self.directory, 'smartstudent-memory.txt')
+                with open(path, 'w') as f:
+                    for stat in tracemalloc.take_snapshot().statistics('lineno')[:50]:
+                        f.write(f"{stat}\n")
+                tracemalloc.stop()
+                summary.update({'memory_profile': path, 'memory_current_bytes': current,
+                                'memory_peak_bytes': peak})
+        return summary
+
+
+_profiler: Optional[_Profiler] = None
+
+
+def _write_at_exit():
+    summary = _profiler.write() if _profiler is not None else {}
+    filename = os.environ.get(METRICS_ENV)
+    if filename:
+        METRICS.dump(filename, **({'profile': summary} if summary else {}))
+
+
+if ENABLED:
+    modes = [mode.strip() for mode in os.environ.get(PROFILE_ENV, '').split(',') if mode.strip()]
+    if modes:
+        _profiler = _Profiler(modes, os.environ.get(PROFILE_DIR_ENV, '.'))
+    atexit.register(_write_at_exit)
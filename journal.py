@@ -0,0 +1,239 @@
+import json
+import os
+import threading
+import time
+from typing import Dict, Iterable, List, Optional
+from student import Student
+from grades_fileio import save_to_json, load_from_json
+from pathlib import Path
+
+
+def _truncate_torn_tail(filename: str):
+    """Cut a partial last line left by a crash mid-write, so the next entry starts a line of its own"""
+    try:
+        f = open(filename, 'rb+')
+    except FileNotFoundError:
+        return
+    with f:
+        end = position = f.seek(0, os.SEEK_END)
+        keep = 0
+        while position > 0:
+            step = min(64 * 1024, position)
+            position -= step
+            f.seek(position)
+            newline = f.read(step).rfind(b'\n')
+            if newline >= 0:
+                keep = position + newline + 1
+                break
+        if keep < end:
+            f.truncate(keep)
+            f.flush()
+            os.fsync(f.fileno())
+
+
+class StudentJournal:
+    """
+    Append-only write-ahead log of roster changes.
+
+    Every add, edit, delete and grade change is appended as one JSON line
+    and flushed to the OS straight away, so a crash of the process loses
+    nothing; fsync is batched every `sync_every` entries or `sync_interval`
+    seconds. compact() folds the log into a full JSON snapshot on a
+    background thread while new entries go to a fresh log segment.
+
+    Entries carry absolute values (upsert a record, set a grade, delete an
+    ID), so replaying an already-compacted segment again is harmless. A
+    partial last line left by a crash is cut off before anything else is
+    appended, and replay skips any line it cannot apply rather than
+    stopping there.
+    """
+
+    def __init__(self, snapshot_filename: str, journal_filename: Optional[str] = None,
+                 sync_every: int = 64, sync_interval: float = 1.0, compact_after: int = 10000):
+        self.snapshot_filename = snapshot_filename
+        self.filename = journal_filename or f"{snapshot_filename}.journal"
+        self.sync_every = sync_every
+        self.sync_interval = sync_interval
+        self.compact_after = compact_after
+        self.entries = 0
+        self._unsynced = 0
+        self._last_sync = time.monotonic()
+        self._lock = threading.Lock()
+        self._compactor: Optional[threading.Thread] = None
+        self.skipped_entries = 0  # unreadable lines passed over by the last recover()
+        _truncate_torn_tail(self._segment_filename)
+        _truncate_torn_tail(self.filename)
+        self._file = open(self.filename, 'a')
+
+    @property
+    def _segment_filename(self) -> str:
+        return f"{self.filename}.compacting"
+
+    # -- recording --------------------------------------------------------
+
+    def record_add(self, student: Student):
+        self._append({'op': 'add', 'student': student.to_dict()})
+
+    def record_edit(self, student_id: str, student: Student):
+        """Record new details for the student previously known as student_id"""
+        self._append({'op': 'edit', 'student_id': student_id, 'student': student.to_dict()})
+
+    def record_delete(self, student_id: str):
+        self._append({'op': 'delete', 'student_id': student_id})
+
+    def record_grade(self, student_id: str, subject: str, grade: Optional[float]):
+        """Record a grade change; None means the subject was removed"""
+        self._append({'op': 'grade', 'student_id': student_id, 'subject': subject, 'grade': grade})
+
+    def _append(self, entry: dict):
+        with self._lock:
+            self._file.write(json.dumps(entry) + '\n')
+            self._file.flush()
+            self.entries += 1
+            self._unsynced += 1
+            if (self._unsynced >= self.sync_every or
+                    time.monotonic() - self._last_sync >= self.sync_interval):
+                self._sync()
+
+    def _sync(self):
+        os.fsync(self._file.fileno())
+        self._unsynced = 0
+        self._last_sync = time.monotonic()
+
+    def sync(self):
+        """Force every recorded entry to disk"""
+        with self._lock:
+            self._sync()
+
+    # -- replay and compaction --------------------------------------------
+
+    @staticmethod
+    def replay(students: Iterable[Student], filename: str,
+               skipped: Optional[List[int]] = None) -> List[Student]:
+        """
+        Apply the entries in a journal file on top of students. Lines that
+        cannot be applied are passed over; their line numbers are appended
+        to skipped when it is given.
+        """
+        roster: Dict[str, Student] = {student.student_id: student for student in students}
+        if not Path(filename).exists():
+            return list(roster.values())
+
+        with open(filename, 'r') as f:
+            for line_number, line in enumerate(f, 1):
+                if not line.strip():
+                    continue
+                try:
+                    roster = StudentJournal._apply(roster, json.loads(line))
+                except (ValueError, KeyError, TypeError):
+                    # A torn write, or entries from a later session glued onto one
+                    if skipped is not None:
+                        skipped.append(line_number)
+        return list(roster.values())
+
+    @staticmethod
+    def _apply(roster: Dict[str, Student], entry: dict) -> Dict[str, Student]:
+        op = entry['op']
+        if op == 'add':
+            student = Student.from_dict(entry['student'])
+            roster[student.student_id] = student
+        elif op == 'edit':
+            student = Student.from_dict(entry['student'])
+            if entry['student_id'] in roster and entry['student_id'] != student.student_id:
+                # Keep the roster position across an ID change
+                roster = {student.student_id if key == entry['student_id'] else key: value
+                          for key, value in roster.items()}
+            roster[student.student_id] = student
+        elif op == 'delete':
+            roster.pop(entry['student_id'], None)
+        elif op == 'grade':
+            student = roster.get(entry['student_id'])
+            if student is None:
+                pass
+            elif entry['grade'] is None:
+                student.subjects.pop(entry['subject'], None)
+            else:
+                student.subjects[entry['subject']] = entry['grade']
+        return roster
+
+    def recover(self) -> List[Student]:
+        """
+        Rebuild the roster from the last snapshot plus every journal
+        segment, counting the lines that could not be applied in
+        skipped_entries
+        """
+        self.wait()
+        skipped: List[int] = []
+        students = load_from_json(self.snapshot_filename)
+        students = self.replay(students, self._segment_filename, skipped)
+        with self._lock:
+            self._file.flush()
+            _truncate_torn_tail(self.filename)
+        students = self.replay(students, self.filename, skipped)
+        self.skipped_entries = len(skipped)
+        return students
+
+    def needs_compaction(self) -> bool:
+        return self.entries >= self.compact_after and not self.compacting
+
+    @property
+    def compacting(self) -> bool:
+        return self._compactor is not None and self._compactor.is_alive()
+
+    def compact(self, students: Iterable[Student], background: bool = True) -> bool:
+        """
+        Fold the journal into a new snapshot of students.
+
+        The records are copied and the log rotated in the calling thread;
+        writing the snapshot happens on a background thread. While an
+        earlier background compaction is still writing, this one is skipped
+        and returns False: the entries stay in the log and are folded in by
+        the next compaction once it is due.
+        """
+        if background and self.compacting:
+            return False
+        self.wait()
+        # to_dict copies the grades, so the writer thread never sees later edits
+        records = [student.to_dict() for student in students]
+        with self._lock:
+            self._sync()
+            self._file.close()
+            if Path(self._segment_filename).exists():
+                # An earlier compaction never finished: keep its entries too
+                with open(self.filename, 'r') as src, open(self._segment_filename, 'a') as dst:
+                    dst.write(src.read())
+                    dst.flush()
+                    os.fsync(dst.fileno())
+                os.unlink(self.filename)
+            else:
+                os.replace(self.filename, self._segment_filename)
+            self._file = open(self.filename, 'a')
+            self.entries = 0
+
+        if background:
+            self._compactor = threading.Thread(
+                target=self._write_snapshot, args=(records,), name="journal-compaction", daemon=True)
+            self._compactor.start()
+        else:
+            self._write_snapshot(records)
+        return True
+
+    def _write_snapshot(self, records: List[dict]):
+        tmp_name = f"{self.snapshot_filename}.tmp"
+        save_to_json((Student.from_dict(record) for record in records), tmp_name)
+        with open(tmp_name, 'rb') as f:
+            os.fsync(f.fileno())
+        os.replace(tmp_name, self.snapshot_filename)
+        os.unlink(self._segment_filename)
+
+    def wait(self):
+        """Block until a running background compaction has finished"""
+        if self._compactor is not None:
+            self._compactor.join()
+            self._compactor = None
+
+    def close(self):
+        self.wait()
+        with self._lock:
+            self._sync()
+            self._file.close()
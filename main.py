@@ -1,5 +1,5 @@
-from cli_interface import StudentCLI
+import sys
+from batch_cli import main
 
 if __name__ == "__main__":
-    app = StudentCLI()
-    app.run()
\ No newline at end of file
+    sys.exit(main(sys.argv[1:]))
@@ -1,10 +1,21 @@
-from typing import List, Dict, Tuple, Optional
+from __future__ import annotations
+from typing import List, Dict, Tuple, Optional, Union, Iterable, TYPE_CHECKING
 from student import Student
-import matplotlib.pyplot as plt
-import seaborn as sns
+from student_index import StudentIndex
+from sqlite_store import SQLiteStudentStore
+from ranking import StudentRanking
+from instrumentation import instrumented
+import heapq
+import os
 from colorama import Fore, Style
 from dataclasses import dataclass
-import statistics
+
+if TYPE_CHECKING:
+    # numpy, the store and the plotting libraries are imported where they are
+    # first used, so the CLI and batch commands start without paying for them
+    import numpy as np
+    from student_store import StudentStore
+    from result_cache import ResultCache
 
 @dataclass
 class GradeStats:
@@ -13,29 +24,196 @@ class GradeStats:
     best_subject: Tuple[str, float]
     worst_subject: Tuple[str, float]
 
+@instrumented('operations.calculate_average_grade')
 def calculate_average_grade(student: Student) -> float:
-    """Basic average grade calculation"""
-    if not student.subjects:
-        return 0.0
-    return sum(student.subjects.values()) / len(student.subjects)
+    """Average grade, read from the student's running totals"""
+    return student.average_grade
 
-def calculate_grade_stats(student: Student) -> GradeStats:
-    """Comprehensive grade statistics"""
+@instrumented('operations.calculate_grade_stats')
+def calculate_grade_stats(student: Student, cache: Optional[ResultCache] = None) -> GradeStats:
+    """Comprehensive grade statistics, memoized in cache when given"""
+    if cache is not None:
+        return cache.get_or_compute('grade_stats', lambda: calculate_grade_stats(student), owner=student)
     if not student.subjects:
         return GradeStats(0.0, 0.0, ("None", 0), ("None", 0))
     
-    grades = list(student.subjects.values())
     subjects = list(student.subjects.items())
     
+    # Equal grades go to the subject first by name, as in calculate_batch_grade_stats
     return GradeStats(
-        average=sum(grades)/len(grades),
-        median=statistics.median(grades),
-        best_subject=max(subjects, key=lambda x: x[1]),
-        worst_subject=min(subjects, key=lambda x: x[1])
+        average=student.average_grade,
+        median=student.median_grade,
+        best_subject=min(subjects, key=lambda x: (-x[1], x[0])),
+        worst_subject=min(subjects, key=lambda x: (x[1], x[0]))
+    )
+
+@dataclass
+class BatchGradeStats:
+    """Per-student statistics for a whole roster, aligned with its order"""
+    subjects: List[str]
+    average: np.ndarray
+    median: np.ndarray
+    best_subject: np.ndarray   # column into subjects, -1 when no grades
+    best_grade: np.ndarray
+    worst_subject: np.ndarray  # column into subjects, -1 when no grades
+    worst_grade: np.ndarray
+
+    def __len__(self):
+        return len(self.average)
+
+    def __getitem__(self, index: int) -> GradeStats:
+        """Per-student GradeStats, matching calculate_grade_stats"""
+        if self.best_subject[index] < 0:
+            return GradeStats(0.0, 0.0, ("None", 0), ("None", 0))
+        return GradeStats(
+            average=float(self.average[index]),
+            median=float(self.median[index]),
+            best_subject=(self.subjects[self.best_subject[index]], float(self.best_grade[index])),
+            worst_subject=(self.subjects[self.worst_subject[index]], float(self.worst_grade[index]))
+        )
+
+@dataclass
+class SubjectStats:
+    count: int
+    average: float
+    median: float
+    highest: float
+    lowest: float
+
+@dataclass
+class ClassStats:
+    student_count: int
+    grade_count: int
+    average: float
+    highest_average: float
+    lowest_average: float
+
+def _as_store(students: Union[StudentStore, Iterable[Student]]) -> StudentStore:
+    from student_store import StudentStore
+    if isinstance(students, StudentStore):
+        return students
+    return StudentStore.from_students(students)
+
+@instrumented('operations.calculate_average_grades')
+def calculate_average_grades(students: Union[StudentStore, Iterable[Student]]) -> np.ndarray:
+    """Average grade of every student at once (0.0 when no grades)"""
+    import numpy as np
+    if isinstance(students, SQLiteStudentStore):
+        return np.array(students.average_grades(), dtype=np.float64)
+    grades = _as_store(students).grade_matrix
+    present = ~np.isnan(grades)
+    counts = present.sum(axis=1)
+    sums = np.where(present, grades, 0.0).sum(axis=1)
+    return np.divide(sums, counts, out=np.zeros(len(grades)), where=counts > 0)
+
+@instrumented('operations.calculate_batch_grade_stats')
+def calculate_batch_grade_stats(students: Union[StudentStore, Iterable[Student]]) -> BatchGradeStats:
+    """Average, median, best and worst subject for every student in one pass"""
+    import numpy as np
+    store = _as_store(students)
+    grades = store.grade_matrix
+    present = ~np.isnan(grades)
+    graded = present.any(axis=1)
+    size = len(grades)
+
+    median = np.zeros(size)
+    best = np.full(size, -1)
+    worst = np.full(size, -1)
+    best_grade = np.zeros(size)
+    worst_grade = np.zeros(size)
+    if graded.any():
+        median[graded] = np.nanmedian(grades[graded], axis=1)
+        rows = np.flatnonzero(graded)
+        # argmax takes the first of equal grades, so scan the columns in name
+        # order to break ties the way calculate_grade_stats does
+        by_name = np.argsort(np.array(store.subjects, dtype=object), kind='stable')
+        ordered, ordered_present = grades[:, by_name], present[:, by_name]
+        best[graded] = by_name[np.where(ordered_present, ordered, -np.inf)[graded].argmax(axis=1)]
+        worst[graded] = by_name[np.where(ordered_present, ordered, np.inf)[graded].argmin(axis=1)]
+        best_grade[graded] = grades[rows, best[graded]]
+        worst_grade[graded] = grades[rows, worst[graded]]
+
+    return BatchGradeStats(
+        subjects=store.subjects,
+        average=calculate_average_grades(store),
+        median=median,
+        best_subject=best,
+        best_grade=best_grade,
+        worst_subject=worst,
+        worst_grade=worst_grade
     )
 
-def search_student(students: List[Student], query: str, by_id: bool = False) -> List[Student]:
-    """Search students by name or ID"""
+@instrumented('operations.calculate_subject_stats')
+def calculate_subject_stats(students: Union[StudentStore, Iterable[Student]]) -> Dict[str, SubjectStats]:
+    """Roll grades up per subject across the whole roster"""
+    import numpy as np
+    if isinstance(students, SQLiteStudentStore):
+        return {subject: SubjectStats(count, average, median, highest, lowest)
+                for subject, count, average, median, highest, lowest in students.subject_rollups()}
+    store = _as_store(students)
+    grades = store.grade_matrix
+    counts = (~np.isnan(grades)).sum(axis=0)
+    stats = {}
+    for column, subject in enumerate(store.subjects):
+        if not counts[column]:
+            continue
+        values = grades[:, column]
+        values = values[~np.isnan(values)]
+        stats[subject] = SubjectStats(
+            count=int(counts[column]),
+            average=float(values.mean()),
+            median=float(np.median(values)),
+            highest=float(values.max()),
+            lowest=float(values.min())
+        )
+    return stats
+
+@instrumented('operations.calculate_class_stats')
+def calculate_class_stats(students: Union[StudentStore, Iterable[Student]]) -> Dict[str, ClassStats]:
+    """Roll grades up per class; averages cover every grade in the class"""
+    import numpy as np
+    if isinstance(students, SQLiteStudentStore):
+        return {class_name: ClassStats(count, grade_count, grade_sum / grade_count if grade_count else 0.0,
+                                       highest, lowest)
+                for class_name, count, grade_count, grade_sum, highest, lowest in students.class_rollups()}
+    store = _as_store(students)
+    grades = store.grade_matrix
+    codes = store.class_codes
+    classes = store.classes
+    present = ~np.isnan(grades)
+    row_counts = present.sum(axis=1)
+    row_sums = np.where(present, grades, 0.0).sum(axis=1)
+    averages = calculate_average_grades(store)
+
+    student_counts = np.bincount(codes, minlength=len(classes))
+    grade_counts = np.bincount(codes, weights=row_counts, minlength=len(classes))
+    grade_sums = np.bincount(codes, weights=row_sums, minlength=len(classes))
+    highest = np.full(len(classes), -np.inf)
+    lowest = np.full(len(classes), np.inf)
+    np.maximum.at(highest, codes, averages)
+    np.minimum.at(lowest, codes, averages)
+
+    stats = {}
+    for code, class_name in enumerate(classes):
+        if not student_counts[code]:
+            continue
+        stats[class_name] = ClassStats(
+            student_count=int(student_counts[code]),
+            grade_count=int(grade_counts[code]),
+            average=float(grade_sums[code] / grade_counts[code]) if grade_counts[code] else 0.0,
+            highest_average=float(highest[code]),
+            lowest_average=float(lowest[code])
+        )
+    return stats
+
+@instrumented('operations.search_student')
+def search_student(students: List[Student], query: str, by_id: bool = False,
+                   index: Optional[StudentIndex] = None) -> List[Student]:
+    """Search students by name or ID, through the index when one is maintained"""
+    if index is not None:
+        return index.search(query, by_id)
+    if isinstance(students, SQLiteStudentStore):
+        return students.search(query, by_id)
     results = []
     query = query.lower()
     for student in students:
@@ -44,32 +222,93 @@ def search_student(students: List[Student], query: str, by_id: bool = False) ->
             results.append(student)
     return results
 
-def sort_students(students: List[Student], by: str = 'name', descending: bool = False) -> List[Student]:
-    """Sort students by name or average grade"""
+@instrumented('operations.fuzzy_search_student')
+def fuzzy_search_student(students: List[Student], query: str, limit: int = 10,
+                         index: Optional[StudentIndex] = None) -> List[Tuple[Student, float]]:
+    """Typo-tolerant name search, best match first, as (student, score) pairs with scores in [0, 1]"""
+    if index is None:
+        index = StudentIndex(students)
+    return index.fuzzy_search(query, limit)
+
+@instrumented('operations.sort_students')
+def sort_students(students: List[Student], by: str = 'name', descending: bool = False,
+                  ranking: Optional[StudentRanking] = None,
+                  cache: Optional[ResultCache] = None) -> List[Student]:
+    """Sort students by name or average grade, reading a maintained ranking when given"""
+    if cache is not None:
+        return cache.get_or_compute(('sort_students', by, descending),
+                                    lambda: sort_students(students, by, descending, ranking), owner=students)
+    if ranking is not None:
+        return ranking.sorted(by, descending)
+    if isinstance(students, SQLiteStudentStore):
+        return students.sort(by, descending)
     if by == 'name':
         return sorted(students, key=lambda x: x.name.lower(), reverse=descending)
     elif by == 'grade':
-        return sorted(students, key=lambda x: calculate_average_grade(x), reverse=descending)
+        return sorted(students, key=lambda x: x.average_grade, reverse=descending)
     else:
         raise ValueError("Invalid sort criteria. Use 'name' or 'grade'")
 
-def visualize_grades(students: List[Student]):
-    """Generate grade distribution visualizations"""
+@instrumented('operations.top_students')
+def top_students(students: List[Student], k: int, class_name: Optional[str] = None,
+                 ranking: Optional[StudentRanking] = None) -> List[Student]:
+    """The k students with the highest average grade, best first"""
+    if ranking is not None:
+        return ranking.top_k(k, class_name=class_name)
+    if class_name is not None:
+        students = [s for s in students if s.class_name == class_name]
+    return heapq.nlargest(k, students, key=lambda x: x.average_grade)
+
+@instrumented('operations.bottom_students')
+def bottom_students(students: List[Student], k: int, class_name: Optional[str] = None,
+                    ranking: Optional[StudentRanking] = None) -> List[Student]:
+    """The k students with the lowest average grade, lowest first"""
+    if ranking is not None:
+        return ranking.bottom_k(k, class_name=class_name)
+    if class_name is not None:
+        students = [s for s in students if s.class_name == class_name]
+    return heapq.nsmallest(k, students, key=lambda x: x.average_grade)
+
+@instrumented('operations.student_rank')
+def student_rank(students: List[Student], student: Student, class_name: Optional[str] = None,
+                 ranking: Optional[StudentRanking] = None) -> int:
+    """1-based rank by average grade, overall or within a class; ties share a rank"""
+    if ranking is not None:
+        return ranking.rank_of(student, class_name)
+    average = student.average_grade
+    return 1 + sum(1 for s in students
+                   if s.average_grade > average and (class_name is None or s.class_name == class_name))
+
+def _file_signature(path: str) -> Optional[Tuple[int, int]]:
+    """Modification time and size of a file, or None when it is gone"""
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return stat.st_mtime_ns, stat.st_size
+
+@instrumented('operations.visualize_grades')
+def visualize_grades(students: List[Student], by: Optional[str] = None,
+                     output_path: str = "grade_analysis.png", show: bool = False,
+                     cache: Optional[ResultCache] = None) -> Optional[str]:
+    """
+    Chart grade distributions overall, per class or per subject, from
+    pre-binned summaries. With a cache, a chart already written for the
+    current roster is not redrawn while its file still holds that render.
+    """
     if not students:
         print(f"{Fore.YELLOW}No students to visualize{Style.RESET_ALL}")
-        return
-    
-    grades = [grade for s in students for grade in s.subjects.values()]
-    
-    plt.figure(figsize=(12, 5))
-    plt.subplot(1, 2, 1)
-    sns.histplot(grades, bins=10, kde=True)
-    plt.title("Grade Distribution")
-    
-    plt.subplot(1, 2, 2)
-    sns.boxplot(x=grades)
-    plt.title("Grade Spread")
-    
-    plt.tight_layout()
-    plt.savefig("grade_analysis.png")
-    plt.show()
\ No newline at end of file
+        return None
+    if cache is not None and not show:
+        key = ('visualize_grades', by, os.path.abspath(output_path), id(students))
+        version = cache.version()
+        cached = cache.get(key, owner=students)
+        if cached is not None and _file_signature(cached[0]) == cached[1]:
+            return cached[0]
+        path = visualize_grades(students, by, output_path)
+        if path is not None:
+            # Remember which bytes this render left, so a later chart written over it is noticed
+            cache.put(key, (path, _file_signature(path)), version, owner=students)
+        return path
+    from grade_charts import summarize_grades, render_grade_charts
+    return render_grade_charts(summarize_grades(students, by), output_path, show=show)
@@ -0,0 +1,177 @@
+from bisect import bisect_left, bisect_right, insort
+from itertools import islice
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+from student import Student
+
+_BUCKET_SIZE = 512
+
+
+class _SortedList:
+    """
+    Sorted list of unique keys split into bounded buckets, so inserts and
+    removals shift at most one small bucket instead of the whole list.
+    """
+
+    def __init__(self):
+        self._buckets: List[list] = []
+        self._maxes: List[tuple] = []
+        self._len = 0
+
+    def __len__(self) -> int:
+        return self._len
+
+    def add(self, key: tuple):
+        self._len += 1
+        if not self._buckets:
+            self._buckets.append([key])
+            self._maxes.append(key)
+            return
+        i = min(bisect_left(self._maxes, key), len(self._buckets) - 1)
+        bucket = self._buckets[i]
+        insort(bucket, key)
+        self._maxes[i] = bucket[-1]
+        if len(bucket) > 2 * _BUCKET_SIZE:
+            self._buckets[i:i + 1] = [bucket[:_BUCKET_SIZE], bucket[_BUCKET_SIZE:]]
+            self._maxes[i:i + 1] = [bucket[_BUCKET_SIZE - 1], bucket[-1]]
+
+    def remove(self, key: tuple):
+        i = bisect_left(self._maxes, key)
+        bucket = self._buckets[i]
+        del bucket[bisect_left(bucket, key)]
+        self._len -= 1
+        if bucket:
+            self._maxes[i] = bucket[-1]
+        else:
+            del self._buckets[i]
+            del self._maxes[i]
+
+    def count_before(self, key: tuple, inclusive: bool = False) -> int:
+        """Number of keys smaller than key (or equal too, when inclusive)"""
+        bisect = bisect_right if inclusive else bisect_left
+        i = bisect(self._maxes, key)
+        if i == len(self._buckets):
+            return self._len
+        return sum(len(bucket) for bucket in self._buckets[:i]) + bisect(self._buckets[i], key)
+
+    def __iter__(self) -> Iterator[tuple]:
+        for bucket in self._buckets:
+            yield from bucket
+
+    def __reversed__(self) -> Iterator[tuple]:
+        for bucket in reversed(self._buckets):
+            yield from reversed(bucket)
+
+    def descending(self) -> Iterator[tuple]:
+        """Largest first, keeping keys that tie on their first field in ascending order"""
+        run = []
+        for key in reversed(self):
+            if run and key[0] != run[-1][0]:
+                yield from reversed(run)
+                run = []
+            run.append(key)
+        yield from reversed(run)
+
+
+class StudentRanking:
+    """
+    Maintained sorted views of a roster by name and by average grade,
+    overall and per class. Call add, update and remove whenever the
+    roster changes; each costs O(log n) plus one small bucket shift.
+    """
+
+    def __init__(self, students: Iterable[Student] = ()):
+        self._next_seq = 0
+        self._seqs: Dict[Student, int] = {}
+        self._students: Dict[int, Student] = {}
+        self._entries: Dict[int, Tuple[tuple, tuple, str]] = {}
+        self._by_name = _SortedList()
+        self._by_grade = _SortedList()
+        self._class_grades: Dict[str, _SortedList] = {}
+        for student in students:
+            self.add(student)
+
+    def add(self, student: Student):
+        """Rank a student that was just added to the roster"""
+        seq = self._next_seq
+        self._next_seq += 1
+        self._seqs[student] = seq
+        self._students[seq] = student
+        self._insert(seq, student)
+
+    def update(self, student: Student):
+        """Re-rank a student after its name, class or grades changed"""
+        seq = self._seqs[student]
+        self._discard(seq)
+        self._insert(seq, student)
+
+    def remove(self, student: Student):
+        """Drop a student that is being deleted from the roster"""
+        seq = self._seqs.pop(student)
+        del self._students[seq]
+        self._discard(seq)
+
+    def _insert(self, seq: int, student: Student):
+        name_key = (student.name.lower(), seq)
+        grade_key = (student.average_grade, seq)
+        self._entries[seq] = (name_key, grade_key, student.class_name)
+        self._by_name.add(name_key)
+        self._by_grade.add(grade_key)
+        self._class_grades.setdefault(student.class_name, _SortedList()).add(grade_key)
+
+    def _discard(self, seq: int):
+        name_key, grade_key, class_name = self._entries.pop(seq)
+        self._by_name.remove(name_key)
+        self._by_grade.remove(grade_key)
+        class_grades = self._class_grades[class_name]
+        class_grades.remove(grade_key)
+        if not class_grades:
+            del self._class_grades[class_name]
+
+    def _view(self, by: str, class_name: Optional[str] = None) -> _SortedList:
+        if by == 'name':
+            if class_name is not None:
+                raise ValueError("Per-class views are ranked by grade only")
+            return self._by_name
+        if by == 'grade':
+            if class_name is None:
+                return self._by_grade
+            return self._class_grades.get(class_name, _SortedList())
+        raise ValueError("Invalid sort criteria. Use 'name' or 'grade'")
+
+    def iter_sorted(self, by: str = 'name', descending: bool = False,
+                    class_name: Optional[str] = None) -> Iterator[Student]:
+        """Walk the maintained order without sorting"""
+        view = self._view(by, class_name)
+        keys = view.descending() if descending else iter(view)
+        return (self._students[key[-1]] for key in keys)
+
+    def sorted(self, by: str = 'name', descending: bool = False) -> List[Student]:
+        return list(self.iter_sorted(by, descending))
+
+    def top_k(self, k: int, by: str = 'grade', class_name: Optional[str] = None) -> List[Student]:
+        """The k highest-ranked students, best first"""
+        return list(islice(self.iter_sorted(by, True, class_name), k))
+
+    def bottom_k(self, k: int, by: str = 'grade', class_name: Optional[str] = None) -> List[Student]:
+        """The k lowest-ranked students, lowest first"""
+        return list(islice(self.iter_sorted(by, False, class_name), k))
+
+    def rank_of(self, student: Student, class_name: Optional[str] = None) -> int:
+        """
+        1-based position by average grade, overall or within class_name;
+        students with equal averages share a rank.
+        """
+        seq = self._seqs[student]
+        grade_key = self._entries[seq][1]
+        view = self._view('grade', class_name)
+        higher = len(view) - view.count_before((grade_key[0], float('inf')), inclusive=True)
+        return higher + 1
+
+    def class_size(self, class_name: str) -> int:
+        return len(self._class_grades.get(class_name, ()))
+
+    def __contains__(self, student: Student) -> bool:
+        return student in self._seqs
+
+    def __len__(self) -> int:
+        return len(self._students)
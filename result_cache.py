@@ -0,0 +1,157 @@
+import sys
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass, fields, is_dataclass
+from typing import Any, Callable, Hashable, Optional, TypeVar
+from student import Student, MUTATIONS
+from instrumentation import METRICS, ENABLED
+
+T = TypeVar('T')
+
+MAX_ENTRIES = 128
+MAX_BYTES = 64 * 1024 * 1024
+_MISSING = object()
+
+
+def _estimate_size(value: Any, depth: int = 2) -> int:
+    """
+    Rough bytes held by a cached result. Students are shared with the roster,
+    so a list of them costs only its pointers; arrays count their buffers.
+    """
+    if isinstance(value, Student):
+        return 0
+    nbytes = getattr(value, 'nbytes', None)
+    if isinstance(nbytes, int):
+        return nbytes + sys.getsizeof(value)
+    size = sys.getsizeof(value)
+    if depth <= 0:
+        return size
+    if isinstance(value, dict):
+        return size + sum(_estimate_size(key, depth - 1) + _estimate_size(item, depth - 1)
+                          for key, item in value.items())
+    if isinstance(value, (list, tuple, set, frozenset)):
+        return size + sum(_estimate_size(item, depth - 1) for item in value)
+    if is_dataclass(value):
+        return size + sum(_estimate_size(getattr(value, field.name), depth - 1) for field in fields(value))
+    return size
+
+
+def _owner_key(owner: Any) -> Hashable:
+    """The owner itself when hashable (a Student, a store view), else its id (a list)"""
+    try:
+        hash(owner)
+    except TypeError:
+        return id(owner)
+    return owner
+
+
+@dataclass
+class CacheStats:
+    hits: int
+    misses: int
+    evictions: int
+    entries: int
+    bytes: int
+
+    @property
+    def hit_rate(self) -> float:
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+
+class ResultCache:
+    """
+    LRU cache of computed results, capped by entry count and estimated
+    memory. Each result is stored with the roster version it was computed
+    at, read from the version callable; a lookup at any other version is a
+    miss and drops the stale entry. Cached results are shared, so callers
+    must not mutate them.
+
+    A result computed from one object (a roster, a student) is cached with
+    that object as its owner. The key carries the owner, or id(owner) when
+    it is unhashable, and the entry holds the owner itself, so another
+    object that shares a student ID, or reuses a freed object's address,
+    never gets its result.
+
+    The default version is the Student mutation count, which misses edits
+    made outside Student methods; StudentCLI passes its own roster version.
+    """
+
+    def __init__(self, version: Callable[[], Hashable] = lambda: MUTATIONS.value,
+                 max_entries: int = MAX_ENTRIES, max_bytes: int = MAX_BYTES):
+        self.version = version
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.bytes = 0
+        self._entries: 'OrderedDict[Hashable, tuple]' = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable, default: Any = None, owner: Any = None) -> Any:
+        """Result cached for key at the current version and for owner, else default"""
+        version = self.version()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] == version and (entry[3] is owner or entry[3] == owner):
+                self._entries.move_to_end(key)
+                self.hits += 1
+                hit = True
+            else:
+                if entry is not None:
+                    self._drop(key)
+                self.misses += 1
+                hit = False
+        if ENABLED:
+            METRICS.count('result_cache.hits' if hit else 'result_cache.misses')
+        return entry[1] if hit else default
+
+    def put(self, key: Hashable, value: Any, version: Optional[Hashable] = None, owner: Any = None):
+        """Cache value for key, evicting least recently used entries to stay within the caps"""
+        size = _estimate_size(value)
+        version = self.version() if version is None else version
+        with self._lock:
+            if key in self._entries:
+                self._drop(key)
+            if size > self.max_bytes:
+                return
+            self._entries[key] = (version, value, size, owner)  # the owner is not counted
+            self.bytes += size
+            while len(self._entries) > self.max_entries or self.bytes > self.max_bytes:
+                self._drop(next(iter(self._entries)))
+                self.evictions += 1
+
+    def get_or_compute(self, key: Hashable, compute: Callable[[], T], owner: Any = None) -> T:
+        """
+        Cached result for key, computing and caching it on a miss. With an
+        owner, only that object hits.
+        """
+        if owner is not None:
+            key = (key, _owner_key(owner))
+        # Read the version first: a change while computing leaves the entry stale, never wrong
+        version = self.version()
+        value = self.get(key, _MISSING, owner)
+        if value is _MISSING:
+            value = compute()
+            self.put(key, value, version, owner)
+        return value
+
+    def invalidate(self, key: Optional[Hashable] = None):
+        """Drop one entry, or every entry when key is None"""
+        with self._lock:
+            if key is None:
+                self._entries.clear()
+                self.bytes = 0
+            elif key in self._entries:
+                self._drop(key)
+
+    def _drop(self, key: Hashable):
+        self.bytes -= self._entries.pop(key)[2]
+
+    def stats(self) -> CacheStats:
+        with self._lock:
+            return CacheStats(self.hits, self.misses, self.evictions, len(self._entries), self.bytes)
+
+    def __len__(self) -> int:
+        return len(self._entries)
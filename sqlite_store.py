@@ -0,0 +1,250 @@
+import sqlite3
+from typing import Iterable, Iterator, List, Optional, Tuple
+from student import Student
+
+# Kept textually identical in the index and in queries so SQLite uses the index
+_AVERAGE_SQL = "(CASE WHEN grade_count > 0 THEN grade_sum / grade_count ELSE 0.0 END)"
+_PAGE_SIZE = 500
+
+_SCHEMA = f"""
+CREATE TABLE IF NOT EXISTS students (
+    id INTEGER PRIMARY KEY,
+    student_id TEXT NOT NULL,
+    name TEXT NOT NULL,
+    name_lower TEXT NOT NULL,
+    age INTEGER NOT NULL,
+    class_name TEXT NOT NULL,
+    grade_sum REAL NOT NULL DEFAULT 0,
+    grade_count INTEGER NOT NULL DEFAULT 0
+);
+CREATE TABLE IF NOT EXISTS grades (
+    student_rowid INTEGER NOT NULL REFERENCES students(id) ON DELETE CASCADE,
+    subject TEXT NOT NULL,
+    grade REAL NOT NULL CHECK (grade >= 0 AND grade <= 100),
+    PRIMARY KEY (student_rowid, subject)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS idx_students_student_id ON students(student_id);
+CREATE INDEX IF NOT EXISTS idx_students_name ON students(name_lower);
+CREATE INDEX IF NOT EXISTS idx_students_class ON students(class_name);
+CREATE INDEX IF NOT EXISTS idx_students_average ON students({_AVERAGE_SQL});
+CREATE INDEX IF NOT EXISTS idx_grades_subject ON grades(subject, grade);
+CREATE TRIGGER IF NOT EXISTS grades_insert AFTER INSERT ON grades BEGIN
+    UPDATE students SET grade_sum = grade_sum + NEW.grade, grade_count = grade_count + 1
+    WHERE id = NEW.student_rowid;
+END;
+CREATE TRIGGER IF NOT EXISTS grades_delete AFTER DELETE ON grades BEGIN
+    UPDATE students SET grade_sum = grade_sum - OLD.grade, grade_count = grade_count - 1
+    WHERE id = OLD.student_rowid;
+END;
+CREATE TRIGGER IF NOT EXISTS grades_update AFTER UPDATE OF grade ON grades BEGIN
+    UPDATE students SET grade_sum = grade_sum - OLD.grade + NEW.grade
+    WHERE id = NEW.student_rowid;
+END;
+"""
+
+_COLUMNS = "id, student_id, name, age, class_name"
+
+
+class SQLiteStudentStore:
+    """
+    Student roster kept in a SQLite database with normalized student and
+    grade tables. Searching, ordering and averaging run inside SQLite and
+    only the rows asked for are turned into Student objects, so rosters
+    can be far larger than RAM.
+
+    Students handed out are detached copies; write changes back with
+    add, update, set_grade, remove_grade and delete.
+    """
+
+    def __init__(self, filename: str):
+        self.filename = filename
+        self._conn = sqlite3.connect(filename)
+        self._conn.execute("PRAGMA foreign_keys = ON")
+        self._conn.executescript(_SCHEMA)
+
+    def close(self):
+        self._conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    # -- materializing rows -------------------------------------------------
+
+    def _students(self, rows: List[Tuple]) -> List[Student]:
+        students = {}
+        for rowid, student_id, name, age, class_name in rows:
+            students[rowid] = Student(student_id, name, age, class_name)
+        rowids = list(students)
+        for start in range(0, len(rowids), _PAGE_SIZE):
+            chunk = rowids[start:start + _PAGE_SIZE]
+            placeholders = ', '.join('?' * len(chunk))
+            for rowid, subject, grade in self._conn.execute(
+                    f"SELECT student_rowid, subject, grade FROM grades "
+                    f"WHERE student_rowid IN ({placeholders})", chunk):
+                students[rowid].subjects[subject] = grade
+        return [students[row[0]] for row in rows]
+
+    def _rowid(self, student_id: str) -> int:
+        row = self._conn.execute(
+            "SELECT id FROM students WHERE student_id = ? ORDER BY id LIMIT 1", (student_id,)).fetchone()
+        if row is None:
+            raise KeyError(student_id)
+        return row[0]
+
+    # -- list-like reads ----------------------------------------------------
+
+    def __len__(self) -> int:
+        return self._conn.execute("SELECT COUNT(*) FROM students").fetchone()[0]
+
+    def __iter__(self) -> Iterator[Student]:
+        """Stream every student in insertion order, one page at a time"""
+        last = 0
+        while True:
+            rows = self._conn.execute(
+                f"SELECT {_COLUMNS} FROM students WHERE id > ? ORDER BY id LIMIT ?",
+                (last, _PAGE_SIZE)).fetchall()
+            if not rows:
+                return
+            yield from self._students(rows)
+            last = rows[-1][0]
+
+    def get(self, student_id: str) -> Optional[Student]:
+        """Exact lookup by student ID"""
+        rows = self._conn.execute(
+            f"SELECT {_COLUMNS} FROM students WHERE student_id = ? ORDER BY id LIMIT 1",
+            (student_id,)).fetchall()
+        return self._students(rows)[0] if rows else None
+
+    def page(self, offset: int = 0, limit: int = _PAGE_SIZE) -> List[Student]:
+        rows = self._conn.execute(
+            f"SELECT {_COLUMNS} FROM students ORDER BY id LIMIT ? OFFSET ?", (limit, offset)).fetchall()
+        return self._students(rows)
+
+    # -- pushed-down queries ------------------------------------------------
+
+    def search(self, query: str, by_id: bool = False, limit: int = -1) -> List[Student]:
+        """Case-insensitive substring search by name or ID"""
+        column = "lower(student_id)" if by_id else "name_lower"
+        rows = self._conn.execute(
+            f"SELECT {_COLUMNS} FROM students WHERE instr({column}, ?) > 0 ORDER BY id LIMIT ?",
+            (query.lower(), limit)).fetchall()
+        return self._students(rows)
+
+    def sort(self, by: str = 'name', descending: bool = False,
+             limit: int = -1, offset: int = 0) -> List[Student]:
+        """Students ordered by name or average grade, optionally one page of them"""
+        if by == 'name':
+            key = "name_lower"
+        elif by == 'grade':
+            key = _AVERAGE_SQL
+        else:
+            raise ValueError("Invalid sort criteria. Use 'name' or 'grade'")
+        direction = "DESC" if descending else "ASC"
+        rows = self._conn.execute(
+            f"SELECT {_COLUMNS} FROM students ORDER BY {key} {direction}, id LIMIT ? OFFSET ?",
+            (limit, offset)).fetchall()
+        return self._students(rows)
+
+    def average_grade(self, student_id: str) -> float:
+        row = self._conn.execute(
+            f"SELECT {_AVERAGE_SQL} FROM students WHERE student_id = ? ORDER BY id LIMIT 1",
+            (student_id,)).fetchone()
+        if row is None:
+            raise KeyError(student_id)
+        return row[0]
+
+    def average_grades(self) -> List[float]:
+        """Average grade of every student, in insertion order"""
+        return [row[0] for row in self._conn.execute(f"SELECT {_AVERAGE_SQL} FROM students ORDER BY id")]
+
+    def class_rollups(self) -> List[Tuple[str, int, int, float, float, float]]:
+        """(class, students, grades, grade sum, highest average, lowest average) per class"""
+        return self._conn.execute(
+            f"SELECT class_name, COUNT(*), SUM(grade_count), SUM(grade_sum), "
+            f"MAX({_AVERAGE_SQL}), MIN({_AVERAGE_SQL}) "
+            f"FROM students GROUP BY class_name ORDER BY MIN(id)").fetchall()
+
+    def subject_rollups(self) -> List[Tuple[str, int, float, float, float, float]]:
+        """(subject, grades, average, median, highest, lowest) per subject"""
+        rollups = []
+        for subject, count, average, highest, lowest in self._conn.execute(
+                "SELECT subject, COUNT(*), AVG(grade), MAX(grade), MIN(grade) "
+                "FROM grades GROUP BY subject ORDER BY subject").fetchall():
+            # The (subject, grade) index makes the middle rows a short range scan
+            middle = [row[0] for row in self._conn.execute(
+                "SELECT grade FROM grades WHERE subject = ? ORDER BY grade LIMIT ? OFFSET ?",
+                (subject, 2 - count % 2, (count - 1) // 2))]
+            rollups.append((subject, count, average, sum(middle) / len(middle), highest, lowest))
+        return rollups
+
+    def grade_bins(self, by: Optional[str] = None, resolution: int = 10) -> List[Tuple[str, int, int, float]]:
+        """(group, bin, grades, grade sum) rows of a grade histogram with `resolution` bins per point"""
+        group = {None: "''", 'class': "s.class_name", 'subject': "g.subject"}[by]
+        return self._conn.execute(
+            f"SELECT {group}, CAST(g.grade * ? + 0.5 AS INTEGER), COUNT(*), SUM(g.grade) "
+            f"FROM grades g JOIN students s ON s.id = g.student_rowid GROUP BY 1, 2 ORDER BY 1, 2",
+            (resolution,)).fetchall()
+
+    # -- writes -------------------------------------------------------------
+
+    def extend(self, students: Iterable[Student]):
+        """Insert many students in one transaction"""
+        with self._conn:
+            for student in students:
+                self._insert(student)
+
+    def add(self, student: Student):
+        with self._conn:
+            self._insert(student)
+
+    def _insert(self, student: Student):
+        rowid = self._conn.execute(
+            "INSERT INTO students (student_id, name, name_lower, age, class_name) VALUES (?, ?, ?, ?, ?)",
+            (student.student_id, student.name, student.name.lower(), student.age, student.class_name)
+        ).lastrowid
+        self._conn.executemany(
+            "INSERT INTO grades (student_rowid, subject, grade) VALUES (?, ?, ?)",
+            [(rowid, subject, grade) for subject, grade in student.subjects.items()])
+
+    def update(self, student_id: str, student: Student):
+        """Replace the details and grades of the student known as student_id"""
+        with self._conn:
+            rowid = self._rowid(student_id)
+            self._conn.execute(
+                "UPDATE students SET student_id = ?, name = ?, name_lower = ?, age = ?, class_name = ? "
+                "WHERE id = ?",
+                (student.student_id, student.name, student.name.lower(), student.age,
+                 student.class_name, rowid))
+            self._conn.execute("DELETE FROM grades WHERE student_rowid = ?", (rowid,))
+            self._conn.executemany(
+                "INSERT INTO grades (student_rowid, subject, grade) VALUES (?, ?, ?)",
+                [(rowid, subject, grade) for subject, grade in student.subjects.items()])
+
+    def set_grade(self, student_id: str, subject: str, grade: float):
+        if not isinstance(grade, (int, float)) or grade < 0 or grade > 100:
+            raise ValueError("Grade must be between 0 and 100")
+        with self._conn:
+            self._conn.execute(
+                "INSERT INTO grades (student_rowid, subject, grade) VALUES (?, ?, ?) "
+                "ON CONFLICT (student_rowid, subject) DO UPDATE SET grade = excluded.grade",
+                (self._rowid(student_id), subject, grade))
+
+    def remove_grade(self, student_id: str, subject: str):
+        with self._conn:
+            self._conn.execute("DELETE FROM grades WHERE student_rowid = ? AND subject = ?",
+                               (self._rowid(student_id), subject))
+
+    def delete(self, student_id: str):
+        with self._conn:
+            self._conn.execute("DELETE FROM students WHERE id = ?", (self._rowid(student_id),))
+
+    def clear(self):
+        with self._conn:
+            self._conn.execute("DELETE FROM grades")
+            self._conn.execute("DELETE FROM students")
+
+    def __repr__(self):
+        return f"SQLiteStudentStore({self.filename!r})"
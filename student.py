@@ -1,26 +1,285 @@
+import threading
+from array import array
+from bisect import bisect_left, insort
+from collections.abc import MutableMapping
+from sys import intern
+from typing import Dict, Iterator, List, Optional, Union
+
+
+class SubjectVocabulary:
+    """
+    Interned subject names, each given a small integer id. Every GradeBook
+    stores ids into one shared vocabulary instead of its own name strings.
+    """
+
+    def __init__(self):
+        self._ids: Dict[str, int] = {}
+        self._names: List[str] = []
+        # Also keyed by id, so float ids read back from a GradeBook look up directly
+        self._by_id: Dict[int, str] = {}
+        self._lock = threading.Lock()
+
+    def id_of(self, subject_name: str) -> int:
+        """Id for subject_name, adding it to the vocabulary on first sight"""
+        subject_id = self._ids.get(subject_name)
+        if subject_id is None:
+            with self._lock:
+                subject_id = self._ids.get(subject_name)
+                if subject_id is None:
+                    subject_id = len(self._names)
+                    subject_name = intern(subject_name)
+                    self._names.append(subject_name)
+                    self._by_id[subject_id] = subject_name
+                    self._ids[subject_name] = subject_id
+        return subject_id
+
+    def find(self, subject_name: str) -> Optional[int]:
+        """Id for subject_name, or None if no student has ever had it"""
+        return self._ids.get(subject_name)
+
+    def name_of(self, subject_id: int) -> str:
+        return self._names[subject_id]
+
+    def __len__(self) -> int:
+        return len(self._names)
+
+    def __contains__(self, subject_name: str) -> bool:
+        return subject_name in self._ids
+
+
+SUBJECTS = SubjectVocabulary()
+
+
+class MutationCounter:
+    """
+    Counts every change made through Student and GradeBook methods. Caches
+    remember the count a result was computed at and recompute once it moves;
+    assigning attributes directly, as bulk loaders do, is not counted.
+    """
+
+    __slots__ = ('value',)
+
+    def __init__(self):
+        self.value = 0
+
+
+MUTATIONS = MutationCounter()
+
+
+def plain_grade(grade: float) -> Union[int, float]:
+    """A grade as written to files: whole grades as int, since GradeBook keeps every grade as a float"""
+    return int(grade) if grade.is_integer() else grade
+
+
+class GradeBook(MutableMapping):
+    """
+    A {subject_name: grade} mapping packed into one float array: the ids of
+    its subjects in the shared SUBJECTS vocabulary, followed by their grades.
+    It keeps a running total of its grades, plus a sorted list of them once
+    a median has been asked for, and the MUTATIONS count at its last change.
+    """
+
+    __slots__ = ('_data', '_total', '_sorted', '_revision')
+
+    def __init__(self, *args, **kwargs):
+        grades = args[0] if len(args) == 1 and not kwargs and isinstance(args[0], dict) else dict(*args, **kwargs)
+        ids = list(map(SUBJECTS.find, grades))
+        if None in ids:
+            ids = list(map(SUBJECTS.id_of, grades))
+        self._data = array('d', ids + list(grades.values()))
+        self._total: Optional[float] = None  # summed on the first read
+        self._sorted: Optional[List[float]] = None
+        self._revision = 0
+
+    @classmethod
+    def from_ids(cls, subject_ids: List[int], grades: List[float]) -> 'GradeBook':
+        """Build from SUBJECTS ids and their grades without checking them; for bulk decoders"""
+        book = cls.__new__(cls)
+        book._data = array('d', subject_ids + grades)
+        book._total = None
+        book._sorted = None
+        book._revision = 0
+        return book
+
+    def _position(self, subject_name: str) -> int:
+        subject_id = SUBJECTS.find(subject_name)
+        if subject_id is not None:
+            try:
+                return self._data[:len(self)].index(subject_id)
+            except ValueError:
+                pass
+        return -1
+
+    def __getitem__(self, subject_name: str) -> float:
+        position = self._position(subject_name)
+        if position < 0:
+            raise KeyError(subject_name)
+        return self._data[len(self) + position]
+
+    def __setitem__(self, subject_name: str, grade: float):
+        MUTATIONS.value += 1
+        self._revision = MUTATIONS.value
+        position = self._position(subject_name)
+        if position >= 0:
+            position += len(self)
+            previous = self._data[position]
+            self._data[position] = grade
+            self._forget(previous)
+        else:
+            self._data.append(grade)
+            self._data.insert(len(self), SUBJECTS.id_of(subject_name))
+            if self._total is not None:
+                self._total += grade
+        if self._sorted is not None:
+            insort(self._sorted, grade)
+
+    def __delitem__(self, subject_name: str):
+        position = self._position(subject_name)
+        if position < 0:
+            raise KeyError(subject_name)
+        MUTATIONS.value += 1
+        self._revision = MUTATIONS.value
+        size = len(self)
+        grade = self._data[size + position]
+        del self._data[size + position]
+        del self._data[position]
+        self._forget(grade)
+
+    def _forget(self, grade: float):
+        self._total = None  # recomputed exactly on the next read
+        if self._sorted is not None:
+            del self._sorted[bisect_left(self._sorted, grade)]
+
+    def __contains__(self, subject_name) -> bool:
+        return self._position(subject_name) >= 0
+
+    def __iter__(self) -> Iterator[str]:
+        return map(SUBJECTS._by_id.__getitem__, self._data[:len(self)])
+
+    def __len__(self) -> int:
+        return len(self._data) // 2
+
+    def items(self):
+        """(subject_name, grade) pairs, read straight from the array"""
+        return list(zip(self, self._data[len(self):]))
+
+    def as_dict(self) -> Dict[str, float]:
+        """A plain dict copy, e.g. for serialization"""
+        data = self._data
+        size = len(data) >> 1
+        return dict(zip(map(SUBJECTS._by_id.__getitem__, data[:size]), data[size:]))
+
+    def values(self):
+        return self._data[len(self):].tolist()
+
+    def clear(self):
+        MUTATIONS.value += 1
+        self._revision = MUTATIONS.value
+        self._data = array('d')
+        self._total = None
+        if self._sorted is not None:
+            self._sorted = []
+
+    def copy(self) -> 'GradeBook':
+        return GradeBook(self.items())
+
+    def __reduce__(self):
+        return (type(self), (self.as_dict(),))
+
+    def __ior__(self, other):
+        self.update(other)
+        return self
+
+    def __repr__(self):
+        return repr(self.as_dict())
+
+    @property
+    def average(self) -> float:
+        """Mean grade, 0.0 when there are no grades"""
+        if not self._data:
+            return 0.0
+        if self._total is None:
+            self._total = sum(self._data[len(self):])
+        return self._total / len(self)
+
+    def median(self) -> float:
+        """Median grade, 0.0 when there are no grades"""
+        if not self._data:
+            return 0.0
+        if self._sorted is None:
+            self._sorted = sorted(self._data[len(self):])
+        grades = self._sorted
+        middle = len(grades) // 2
+        if len(grades) % 2:
+            return grades[middle]
+        return (grades[middle - 1] + grades[middle]) / 2
+
+
 class Student:
     """
     A class to represent a student with personal and academic information.
     """
     
+    __slots__ = ('student_id', 'name', 'age', 'class_name', '_subjects', '_revision')
+    
     def __init__(self, student_id: str, name: str, age: int, class_name: str):
         self.student_id = student_id
         self.name = name
         self.age = age
-        self.class_name = class_name
+        self.class_name = intern(class_name) if isinstance(class_name, str) else class_name
         self.subjects = {}  # {subject_name: grade}
     
+    @property
+    def subjects(self) -> GradeBook:
+        return self._subjects
+    
+    @subjects.setter
+    def subjects(self, grades: dict):
+        MUTATIONS.value += 1
+        self._subjects = GradeBook(grades)
+        self._touch()
+
+    @property
+    def revision(self) -> int:
+        """
+        MUTATIONS count at this student's last change through its methods or
+        its GradeBook, so "changed since r" is revision > r; 0 for a student
+        decoded from a file and not changed since
+        """
+        return max(self._revision, self._subjects._revision)
+
+    def _touch(self):
+        self._revision = MUTATIONS.value
+    
     def add_subject(self, subject_name: str, grade: float):
         """Add a subject with grade validation (0-100)"""
         if not isinstance(grade, (int, float)) or grade < 0 or grade > 100:
             raise ValueError("Grade must be between 0 and 100")
         self.subjects[subject_name] = grade
+        self._touch()
+    
+    def remove_subject(self, subject_name: str):
+        """Remove a subject and its grade"""
+        del self.subjects[subject_name]
+        self._touch()
+    
+    @property
+    def average_grade(self) -> float:
+        """Cached average grade, 0.0 when no grades are recorded"""
+        return self.subjects.average
+    
+    @property
+    def median_grade(self) -> float:
+        """Median grade from the maintained sorted grades"""
+        return self.subjects.median()
     
     def edit_info(self, name: str = None, age: int = None, class_name: str = None):
         """Edit basic student information"""
+        MUTATIONS.value += 1
         if name: self.name = name
         if age: self.age = age
         if class_name: self.class_name = class_name
+        self._touch()
     
     def to_dict(self):
         """Convert student to dictionary for serialization"""
@@ -29,19 +288,39 @@ class Student:
             'name': self.name,
             'age': self.age,
             'class_name': self.class_name,
-            'subjects': self.subjects
+            'subjects': {subject: plain_grade(grade) for subject, grade in self.subjects.as_dict().items()}
         }
     
     @classmethod
     def from_dict(cls, data: dict):
-        """Create Student from dictionary"""
+        """Create Student from dictionary, rejecting a non-integer age or bad grades"""
+        age = data['age']
+        if not isinstance(age, int) or isinstance(age, bool):
+            raise ValueError(f"Student {data['student_id']}: age must be an integer, not {age!r}")
         student = cls(
             data['student_id'],
             data['name'],
-            data['age'],
+            age,
             data['class_name']
         )
-        student.subjects = data.get('subjects', {})
+        try:
+            student.subjects = data.get('subjects') or {}
+        except TypeError:
+            raise ValueError(f"Student {data['student_id']}: grades must be numbers") from None
+        if not all(0 <= grade <= 100 for grade in student.subjects.values()):
+            raise ValueError(f"Student {data['student_id']}: grades must be between 0 and 100")
+        return student
+    
+    @classmethod
+    def from_parts(cls, student_id: str, name: str, age: int, class_name: str, subjects: GradeBook):
+        """Assemble a student from already-validated parts, keeping the given GradeBook"""
+        student = cls.__new__(cls)
+        student.student_id = student_id
+        student.name = name
+        student.age = age
+        student.class_name = intern(class_name)
+        student._subjects = subjects
+        student._revision = 0
         return student
     
     def __str__(self):
@@ -0,0 +1,307 @@
+import heapq
+import re
+from collections import Counter
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+from student import Student
+
+
+def _trigrams(text: str) -> Set[str]:
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+
+class _SubstringIndex:
+    """Trigram postings over lowercased strings for substring queries"""
+
+    def __init__(self):
+        self.texts: Dict[int, str] = {}
+        self.postings: Dict[str, Set[int]] = {}
+
+    def add(self, key: int, text: str):
+        text = text.lower()
+        self.texts[key] = text
+        for gram in _trigrams(text):
+            self.postings.setdefault(gram, set()).add(key)
+
+    def remove(self, key: int):
+        text = self.texts.pop(key)
+        for gram in _trigrams(text):
+            keys = self.postings[gram]
+            keys.discard(key)
+            if not keys:
+                del self.postings[gram]
+
+    def search(self, query: str) -> List[int]:
+        """Keys whose text contains query, in insertion order"""
+        query = query.lower()
+        if len(query) < 3:
+            return [key for key, text in self.texts.items() if query in text]
+
+        postings = []
+        for gram in _trigrams(query):
+            keys = self.postings.get(gram)
+            if not keys:
+                return []
+            postings.append(keys)
+        postings.sort(key=len)
+        candidates = set(postings[0]).intersection(*postings[1:])
+        texts = self.texts
+        return sorted(key for key in candidates if query in texts[key])
+
+
+_WORD = re.compile(r"[^\W\d_]+")
+# Soundex consonant classes; vowels, h, w and y carry no sound of their own
+_SOUND_CLASSES = {letter: digit for letters, digit in (
+    ('bfpv', '1'), ('cgjkqsxz', '2'), ('dt', '3'), ('l', '4'), ('mn', '5'), ('r', '6'))
+    for letter in letters}
+# Closest vocabulary words each query word expands to
+_WORDS_PER_TERM = 50
+# Most candidate words per query word given an edit distance
+_EDIT_CANDIDATES = 200
+
+
+def _words(text: str) -> List[str]:
+    return _WORD.findall(text.lower())
+
+
+def _word_grams(word: str) -> Set[str]:
+    """Trigrams of a word padded at both ends, so short words and word edges still count"""
+    return _trigrams(f"  {word} ")
+
+
+def _phonetic_key(word: str) -> str:
+    """
+    Soundex-style key: consonant classes with repeats collapsed, capped at
+    four characters. Unlike Soundex the first letter is coded by its class
+    as well, so 'Beterest' and 'Peterest' share a key.
+    """
+    key, previous = [], None
+    for letter in word:
+        digit = _SOUND_CLASSES.get(letter)
+        if digit is None:
+            if letter not in 'hw':
+                previous = None
+            if not key:
+                key.append('0')
+            continue
+        if digit != previous:
+            key.append(digit)
+        previous = digit
+    return ''.join(key)[:4]
+
+
+def _edit_distance(a: str, b: str, bound: int) -> int:
+    """Optimal string alignment distance between a and b, or bound + 1 once it exceeds bound"""
+    if abs(len(a) - len(b)) > bound:
+        return bound + 1
+    previous2: List[int] = []
+    previous = list(range(len(b) + 1))
+    for i, ca in enumerate(a, 1):
+        current = [i]
+        for j, cb in enumerate(b, 1):
+            cost = min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (ca != cb))
+            if i > 1 and j > 1 and ca == b[j - 2] and a[i - 2] == cb:
+                cost = min(cost, previous2[j - 2] + 1)
+            current.append(cost)
+        if min(current) > bound:
+            return bound + 1
+        previous2, previous = previous, current
+    return previous[-1]
+
+
+def _typo_bound(word: str) -> int:
+    """Edits tolerated in a word of this length"""
+    return 1 if len(word) <= 4 else 2 if len(word) <= 8 else 3
+
+
+class _FuzzyIndex:
+    """
+    Word-level postings for typo-tolerant name search. Each distinct word
+    is indexed by its padded trigrams and its phonetic key, so a query word
+    only scores the vocabulary words sharing one of those with it, never
+    the whole roster.
+    """
+
+    def __init__(self):
+        self.words: Dict[int, List[str]] = {}
+        self.keys_by_word: Dict[str, Set[int]] = {}
+        self.grams: Dict[str, Set[str]] = {}
+        self.sounds: Dict[str, Set[str]] = {}
+
+    def add(self, key: int, text: str):
+        words = _words(text)
+        self.words[key] = words
+        for word in words:
+            keys = self.keys_by_word.get(word)
+            if keys is None:
+                keys = self.keys_by_word[word] = set()
+                for gram in _word_grams(word):
+                    self.grams.setdefault(gram, set()).add(word)
+                self.sounds.setdefault(_phonetic_key(word), set()).add(word)
+            keys.add(key)
+
+    def remove(self, key: int):
+        for word in self.words.pop(key):
+            keys = self.keys_by_word[word]
+            keys.discard(key)
+            if keys:
+                continue
+            del self.keys_by_word[word]
+            for gram in _word_grams(word):
+                self._discard(self.grams, gram, word)
+            self._discard(self.sounds, _phonetic_key(word), word)
+
+    @staticmethod
+    def _discard(postings: Dict[str, Set[str]], name: str, word: str):
+        words = postings.get(name)
+        if words is not None:
+            words.discard(word)
+            if not words:
+                del postings[name]
+
+    def similar_words(self, word: str, min_similarity: float, limit: int) -> Dict[str, float]:
+        """Up to limit vocabulary words resembling word, with a similarity in (0, 1]"""
+        grams = _word_grams(word)
+        shared = Counter()
+        for gram in grams:
+            shared.update(self.grams.get(gram, ()))
+        sound = self.sounds.get(_phonetic_key(word), set())
+        bound = _typo_bound(word)
+        # Each edit destroys at most three trigrams, so a word within bound
+        # edits shares at least this many. Short words prune poorly that way,
+        # so only the words sharing the most grams, sound-alikes counting two
+        # extra, get an edit distance; the rest are scored on trigrams alone
+        within_reach = len(grams) - 3 * bound
+        close = [candidate for candidate in shared.keys() | sound
+                 if abs(len(candidate) - len(word)) <= bound + 1
+                 and (candidate in sound or shared[candidate] >= within_reach)]
+        if len(close) > _EDIT_CANDIDATES:
+            close = heapq.nlargest(_EDIT_CANDIDATES, close,
+                                   key=lambda candidate: shared.get(candidate, 0) + 2 * (candidate in sound))
+        matches = {}
+        for candidate, common in shared.items():
+            # Padded words have len + 1 trigrams, fewer only when one repeats
+            similarity = 2 * common / (len(grams) + len(candidate) + 1)
+            if similarity >= min_similarity:
+                matches[candidate] = similarity
+        for candidate in close:
+            # Sound-alikes are allowed one more edit and score a little higher
+            phonetic = candidate in sound
+            distance = _edit_distance(word, candidate, bound + phonetic)
+            if distance > bound + phonetic:
+                continue
+            similarity = 1 - distance / max(len(word), len(candidate))
+            if phonetic:
+                similarity = max(similarity, min(similarity + 0.1, 0.9))
+            if similarity >= max(min_similarity, matches.get(candidate, 0)):
+                matches[candidate] = similarity
+        if len(matches) > limit:
+            matches = dict(heapq.nlargest(limit, matches.items(), key=lambda item: item[1]))
+        return matches
+
+    def search(self, query: str, min_similarity: float, words_per_term: int) -> Dict[int, float]:
+        """Score of every key matching at least one query word: the mean over query words of the best match"""
+        words = _words(query)
+        if not words:
+            return {}
+        scores: Dict[int, List[float]] = {}
+        for position, word in enumerate(words):
+            for candidate, similarity in self.similar_words(word, min_similarity, words_per_term).items():
+                for key in self.keys_by_word[candidate]:
+                    best = scores.get(key)
+                    if best is None:
+                        best = scores[key] = [0.0] * len(words)
+                    if similarity > best[position]:
+                        best[position] = similarity
+        return {key: sum(best) / len(words) for key, best in scores.items()}
+
+
+class StudentIndex:
+    """
+    Maintained lookup structures over a roster: an exact-match dict on
+    student_id and trigram substring indexes on lowercased names and IDs.
+    The fuzzy name index is built on the first fuzzy_search and maintained
+    from then on. Call add, update and remove whenever the roster changes.
+    """
+
+    def __init__(self, students: Iterable[Student] = ()):
+        self._next_key = 0
+        self._keys: Dict[Student, int] = {}
+        self._students: Dict[int, Student] = {}
+        self._indexed_ids: Dict[int, str] = {}
+        self._by_id: Dict[str, List[int]] = {}
+        self._names = _SubstringIndex()
+        self._ids = _SubstringIndex()
+        self._fuzzy: Optional[_FuzzyIndex] = None
+        for student in students:
+            self.add(student)
+
+    def add(self, student: Student):
+        """Index a student that was just added to the roster"""
+        key = self._next_key
+        self._next_key += 1
+        self._keys[student] = key
+        self._students[key] = student
+        self._index(key, student)
+
+    def update(self, student: Student):
+        """Re-index a student after its name or ID was edited"""
+        key = self._keys[student]
+        self._unindex(key)
+        self._index(key, student)
+
+    def remove(self, student: Student):
+        """Drop a student that is being deleted from the roster"""
+        key = self._keys.pop(student)
+        del self._students[key]
+        self._unindex(key)
+
+    def _index(self, key: int, student: Student):
+        self._indexed_ids[key] = student.student_id
+        self._by_id.setdefault(student.student_id, []).append(key)
+        self._names.add(key, student.name)
+        self._ids.add(key, student.student_id)
+        if self._fuzzy is not None:
+            self._fuzzy.add(key, student.name)
+
+    def _unindex(self, key: int):
+        student_id = self._indexed_ids.pop(key)
+        keys = self._by_id[student_id]
+        keys.remove(key)
+        if not keys:
+            del self._by_id[student_id]
+        self._names.remove(key)
+        self._ids.remove(key)
+        if self._fuzzy is not None:
+            self._fuzzy.remove(key)
+
+    def get(self, student_id: str) -> Optional[Student]:
+        """Exact lookup by student ID"""
+        keys = self._by_id.get(student_id)
+        return self._students[keys[0]] if keys else None
+
+    def search(self, query: str, by_id: bool = False) -> List[Student]:
+        """Case-insensitive substring search by name or ID"""
+        index = self._ids if by_id else self._names
+        return [self._students[key] for key in index.search(query)]
+
+    def fuzzy_search(self, query: str, limit: int = 10,
+                     min_score: float = 0.5) -> List[Tuple[Student, float]]:
+        """
+        Typo-tolerant name search, best match first. Each query word is
+        matched against name words by trigram similarity, edit distance and
+        phonetic key; a student scores the mean of its best match per query
+        word, in [0, 1], and ties keep roster order.
+        """
+        if self._fuzzy is None:
+            self._fuzzy = _FuzzyIndex()
+            for key, student in self._students.items():
+                self._fuzzy.add(key, student.name)
+        scores = self._fuzzy.search(query, min_score / 2, _WORDS_PER_TERM)
+        ranked = heapq.nsmallest(limit, ((-score, key) for key, score in scores.items() if score >= min_score))
+        return [(self._students[key], -score) for score, key in ranked]
+
+    def __contains__(self, student: Student) -> bool:
+        return student in self._keys
+
+    def __len__(self) -> int:
+        return len(self._students)
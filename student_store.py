@@ -0,0 +1,588 @@
+from typing import Dict, Iterable, Iterator, List, MutableMapping, Tuple, Union
+from student import Student, MUTATIONS
+import numpy as np
+import json
+import mmap
+import os
+import struct
+
+_SNAPSHOT_MAGIC = b'SSNAP\x00\x00\x01'
+_SNAPSHOT_HEADER = struct.Struct('<8sQQ')
+_SNAPSHOT_SECTION = struct.Struct('<QQ')
+_SNAPSHOT_SECTIONS = ('ages', 'class_codes', 'grades',
+                      'id_starts', 'id_ends', 'id_data',
+                      'name_starts', 'name_ends', 'name_data',
+                      'classes', 'subjects')
+# A string column repacks itself once overwritten and deleted strings are
+# more than half its buffer and at least this many bytes
+_COMPACT_MIN_DEAD_BYTES = 64 * 1024
+
+
+def _grow(array: np.ndarray, capacity: int, fill=0) -> np.ndarray:
+    """Return a copy of array with its first axis enlarged to capacity, or array if it is long enough"""
+    if len(array) >= capacity:
+        return array
+    grown = np.full((capacity,) + array.shape[1:], fill, dtype=array.dtype)
+    grown[:len(array)] = array
+    return grown
+
+
+class _StringColumn:
+    """
+    Variable-length strings packed as UTF-8 into one shared buffer,
+    addressed by per-row start/end offsets.
+    """
+
+    def __init__(self, capacity: int):
+        self.starts = np.zeros(capacity, dtype=np.int64)
+        self.ends = np.zeros(capacity, dtype=np.int64)
+        self.data = bytearray()
+        self.dead = 0  # bytes no row points at any more
+
+    def reserve(self, capacity: int):
+        self.starts = _grow(self.starts, capacity)
+        self.ends = _grow(self.ends, capacity)
+
+    def get(self, row: int) -> str:
+        return str(self.data[self.starts[row]:self.ends[row]], 'utf-8')
+
+    def set(self, row: int, value: str):
+        encoded = str(value).encode('utf-8')
+        if not isinstance(self.data, bytearray):
+            # Buffers opened from a snapshot are read-only until first write
+            self.data = bytearray(self.data)
+        self.dead += int(self.ends[row] - self.starts[row])  # rows past the end are 0, 0
+        self.starts[row] = len(self.data)
+        self.data += encoded
+        self.ends[row] = len(self.data)
+        if self.dead >= _COMPACT_MIN_DEAD_BYTES and 2 * self.dead > len(self.data):
+            self.compact()
+
+    def delete(self, row: int, size: int):
+        self.dead += int(self.ends[row] - self.starts[row])
+        self.starts[row:size - 1] = self.starts[row + 1:size]
+        self.ends[row:size - 1] = self.ends[row + 1:size]
+        self.starts[size - 1] = self.ends[size - 1] = 0
+
+    def compact(self):
+        """Drop the dead bytes, keeping every row's string"""
+        starts, ends, data = self.packed(len(self.starts))
+        self.starts, self.ends, self.data = starts, ends, bytearray(data)
+        self.dead = 0
+
+    def packed(self, size: int):
+        """Return (starts, ends, data) for the first size rows without dead bytes"""
+        starts, ends = self.starts[:size], self.ends[:size]
+        lengths = ends - starts
+        new_ends = np.cumsum(lengths)
+        data = self.data
+        if size and starts[0] == 0 and np.array_equal(starts[1:], ends[:-1]):
+            blob = memoryview(data)[:int(new_ends[-1])]
+        else:
+            blob = b''.join(data[start:end] for start, end in zip(starts.tolist(), ends.tolist()))
+        return new_ends - lengths, new_ends, blob
+
+    @property
+    def nbytes(self) -> int:
+        return self.starts.nbytes + self.ends.nbytes + len(self.data)
+
+
+class _SubjectGrades(MutableMapping):
+    """Dict-like view of one student's row in the grade matrix"""
+
+    def __init__(self, store: 'StudentStore', handle: int):
+        self._store = store
+        self._handle = handle
+
+    def _row_values(self) -> np.ndarray:
+        store = self._store
+        return store._grades[store._row(self._handle), :len(store._subjects)]
+
+    def __getitem__(self, subject: str) -> float:
+        store = self._store
+        column = store._subject_lookup.get(subject)
+        if column is None:
+            raise KeyError(subject)
+        grade = store._grades[store._row(self._handle), column]
+        if np.isnan(grade):
+            raise KeyError(subject)
+        return float(grade)
+
+    def __setitem__(self, subject: str, grade: float):
+        store = self._store
+        column = store._subject_column(subject)
+        row = store._row(self._handle)
+        store._grades[row, column] = grade
+        store._touch(row)
+
+    def __delitem__(self, subject: str):
+        store = self._store
+        self[subject]  # raises KeyError when there is no grade
+        row = store._row(self._handle)
+        store._grades[row, store._subject_lookup[subject]] = np.nan
+        store._touch(row)
+
+    def __iter__(self) -> Iterator[str]:
+        subjects = self._store._subjects
+        for column in np.flatnonzero(~np.isnan(self._row_values())):
+            yield subjects[column]
+
+    def __len__(self) -> int:
+        return int(np.count_nonzero(~np.isnan(self._row_values())))
+
+    @property
+    def average(self) -> float:
+        """Mean grade, 0.0 when there are no grades"""
+        values = self._row_values()
+        values = values[~np.isnan(values)]
+        return float(values.mean()) if len(values) else 0.0
+
+    def median(self) -> float:
+        """Median grade, 0.0 when there are no grades"""
+        values = self._row_values()
+        values = values[~np.isnan(values)]
+        return float(np.median(values)) if len(values) else 0.0
+
+    def as_dict(self) -> Dict[str, float]:
+        """A plain dict copy, e.g. for serialization"""
+        subjects = self._store._subjects
+        values = self._row_values()
+        return {subjects[column]: float(values[column]) for column in np.flatnonzero(~np.isnan(values))}
+
+    def __repr__(self):
+        return repr(self.as_dict())
+
+
+class StudentView(Student):
+    """
+    A Student-compatible handle onto one row of a StudentStore.
+    Reads and writes go straight to the store's arrays.
+    """
+
+    __slots__ = ('_store', '_handle')
+
+    def __init__(self, store: 'StudentStore', handle: int):
+        self._store = store
+        self._handle = handle
+
+    @property
+    def student_id(self) -> str:
+        store = self._store
+        return store._ids.get(store._row(self._handle))
+
+    @student_id.setter
+    def student_id(self, value: str):
+        store = self._store
+        row = store._row(self._handle)
+        previous = store._ids.get(row)
+        store._ids.set(row, value)
+        store._touch(row)
+        if previous != value:
+            # To a delta, a new ID is the old one deleted and the new one added
+            store._deleted[previous] = MUTATIONS.value
+
+    @property
+    def name(self) -> str:
+        store = self._store
+        return store._names.get(store._row(self._handle))
+
+    @name.setter
+    def name(self, value: str):
+        store = self._store
+        row = store._row(self._handle)
+        store._names.set(row, value)
+        store._touch(row)
+
+    @property
+    def age(self) -> int:
+        store = self._store
+        return int(store._ages[store._row(self._handle)])
+
+    @age.setter
+    def age(self, value: int):
+        store = self._store
+        row = store._row(self._handle)
+        store._ages[row] = value
+        store._touch(row)
+
+    @property
+    def class_name(self) -> str:
+        store = self._store
+        return store._classes[store._class_codes[store._row(self._handle)]]
+
+    @class_name.setter
+    def class_name(self, value: str):
+        store = self._store
+        row = store._row(self._handle)
+        store._class_codes[row] = store._class_code(value)
+        store._touch(row)
+
+    @property
+    def subjects(self) -> _SubjectGrades:
+        return _SubjectGrades(self._store, self._handle)
+
+    @subjects.setter
+    def subjects(self, grades: Dict[str, float]):
+        store = self._store
+        row = store._row(self._handle)
+        columns = [store._subject_column(subject) for subject in grades]
+        store._grades[row, :] = np.nan
+        store._grades[row, columns] = list(grades.values())
+        store._touch(row)
+
+    @property
+    def revision(self) -> int:
+        store = self._store
+        return int(store._revisions[store._row(self._handle)])
+
+    def _touch(self):
+        pass  # every write above already stamped the row
+
+    def __eq__(self, other):
+        if isinstance(other, StudentView):
+            return self._store is other._store and self._handle == other._handle
+        return NotImplemented
+
+    def __hash__(self):
+        return hash((id(self._store), self._handle))
+
+
+class StudentStore:
+    """
+    Columnar roster of students.
+
+    IDs and names live in packed string columns, ages and class codes in
+    integer arrays, and all grades in one dense students x subjects float
+    matrix where NaN means "no grade". Indexing and iteration hand out
+    StudentView objects, so code written against List[Student] keeps working.
+    """
+
+    def __init__(self, capacity: int = 16, subject_capacity: int = 0):
+        capacity = max(capacity, 1)
+        self.version = 0  # bumped by every change, so derived results can be cached against it
+        self._size = 0
+        self._next_handle = 0
+        self._handles = np.zeros(capacity, dtype=np.int64)
+        # MUTATIONS count at each row's last change, and at each deleted ID's
+        # removal; together they answer changes_since for delta exports
+        self._revisions = np.zeros(capacity, dtype=np.int64)
+        self._deleted: Dict[str, int] = {}
+        self._ids = _StringColumn(capacity)
+        self._names = _StringColumn(capacity)
+        self._ages = np.zeros(capacity, dtype=np.int32)
+        self._class_codes = np.zeros(capacity, dtype=np.int32)
+        self._classes: List[str] = []
+        self._class_lookup: Dict[str, int] = {}
+        self._subjects: List[str] = []
+        self._subject_lookup: Dict[str, int] = {}
+        self._grades = np.full((capacity, subject_capacity), np.nan, dtype=np.float64)
+
+    @classmethod
+    def from_students(cls, students: Iterable[Student]) -> 'StudentStore':
+        """Build a store from any iterable of Student objects"""
+        students = list(students)
+        store = cls(capacity=len(students))
+        store.extend(students)
+        return store
+
+    @classmethod
+    def open_snapshot(cls, filename: str) -> 'StudentStore':
+        """
+        Open a binary snapshot written by save_snapshot.
+
+        The file is memory-mapped copy-on-write and every column is a
+        zero-copy view onto it, so pages are only read when touched and
+        edits never reach the file.
+        """
+        with open(filename, 'rb') as f:
+            buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_COPY)
+        magic, size, subject_count = _SNAPSHOT_HEADER.unpack_from(buffer, 0)
+        if magic != _SNAPSHOT_MAGIC:
+            raise ValueError(f"{filename} is not a student snapshot")
+        sections = {}
+        for i, section in enumerate(_SNAPSHOT_SECTIONS):
+            offset, length = _SNAPSHOT_SECTION.unpack_from(
+                buffer, _SNAPSHOT_HEADER.size + i * _SNAPSHOT_SECTION.size)
+            sections[section] = memoryview(buffer)[offset:offset + length]
+
+        store = cls(capacity=0)
+        store._size = size
+        store._next_handle = size
+        store._handles = np.arange(max(size, 1), dtype=np.int64)
+        store._revisions = np.zeros(max(size, 1), dtype=np.int64)
+        store._ages = np.frombuffer(sections['ages'], dtype=np.int32)
+        store._class_codes = np.frombuffer(sections['class_codes'], dtype=np.int32)
+        store._grades = np.frombuffer(sections['grades'], dtype=np.float64).reshape(size, subject_count)
+        for column, prefix in ((store._ids, 'id'), (store._names, 'name')):
+            column.starts = np.frombuffer(sections[prefix + '_starts'], dtype=np.int64)
+            column.ends = np.frombuffer(sections[prefix + '_ends'], dtype=np.int64)
+            column.data = sections[prefix + '_data']
+        store._classes = json.loads(str(sections['classes'], 'utf-8'))
+        store._class_lookup = {name: code for code, name in enumerate(store._classes)}
+        store._subjects = json.loads(str(sections['subjects'], 'utf-8'))
+        store._subject_lookup = {name: column for column, name in enumerate(store._subjects)}
+        store._mmap = buffer
+        return store
+
+    def save_snapshot(self, filename: str):
+        """Write the store as a header, fixed-width arrays and string tables"""
+        size = self._size
+        id_starts, id_ends, id_data = self._ids.packed(size)
+        name_starts, name_ends, name_data = self._names.packed(size)
+        payloads = {
+            'ages': self._ages[:size],
+            'class_codes': self._class_codes[:size],
+            'grades': self._grades[:size, :len(self._subjects)],
+            'id_starts': id_starts, 'id_ends': id_ends, 'id_data': id_data,
+            'name_starts': name_starts, 'name_ends': name_ends, 'name_data': name_data,
+            'classes': json.dumps(self._classes).encode('utf-8'),
+            'subjects': json.dumps(self._subjects).encode('utf-8'),
+        }
+        payloads = {name: np.ascontiguousarray(payload).reshape(-1).view(np.uint8)
+                    if isinstance(payload, np.ndarray) else memoryview(payload)
+                    for name, payload in payloads.items()}
+
+        offset = _SNAPSHOT_HEADER.size + len(_SNAPSHOT_SECTIONS) * _SNAPSHOT_SECTION.size
+        table = []
+        for name in _SNAPSHOT_SECTIONS:
+            offset += -offset % 8  # keep every array 8-byte aligned
+            table.append((offset, len(payloads[name])))
+            offset += len(payloads[name])
+
+        # Write beside the target and rename, so a store still mapping the
+        # old file never sees it truncated underneath it
+        tmp_name = f"{filename}.tmp"
+        with open(tmp_name, 'wb') as f:
+            f.write(_SNAPSHOT_HEADER.pack(_SNAPSHOT_MAGIC, size, len(self._subjects)))
+            for entry in table:
+                f.write(_SNAPSHOT_SECTION.pack(*entry))
+            for name, (start, _) in zip(_SNAPSHOT_SECTIONS, table):
+                f.write(b'\0' * (start - f.tell()))
+                f.write(payloads[name])
+        os.replace(tmp_name, filename)
+
+    # -- internal helpers -------------------------------------------------
+
+    def _row(self, handle: int) -> int:
+        """Map a stable row handle to its current position"""
+        handles = self._handles[:self._size]
+        row = int(np.searchsorted(handles, handle))
+        if row == self._size or handles[row] != handle:
+            raise KeyError("Student is no longer in this store")
+        return row
+
+    def _reserve(self, capacity: int):
+        # Columns opened from a snapshot or copied are sized to their rows, so
+        # they can be shorter than the handles; grow whichever falls short
+        current = min(len(self._handles), len(self._revisions), len(self._ids.starts),
+                      len(self._names.starts), len(self._ages), len(self._class_codes), len(self._grades))
+        if capacity <= current:
+            return
+        capacity = max(capacity, 2 * current)
+        self._handles = _grow(self._handles, capacity)
+        self._revisions = _grow(self._revisions, capacity)
+        self._ids.reserve(capacity)
+        self._names.reserve(capacity)
+        self._ages = _grow(self._ages, capacity)
+        self._class_codes = _grow(self._class_codes, capacity)
+        self._grades = _grow(self._grades, capacity, fill=np.nan)
+
+    def _touch(self, row: int):
+        """Stamp row as changed now and bump the version"""
+        MUTATIONS.value += 1
+        self._revisions[row] = MUTATIONS.value
+        self.version += 1
+
+    def _class_code(self, class_name: str) -> int:
+        code = self._class_lookup.get(class_name)
+        if code is None:
+            code = len(self._classes)
+            self._classes.append(class_name)
+            self._class_lookup[class_name] = code
+        return code
+
+    def _subject_column(self, subject: str) -> int:
+        column = self._subject_lookup.get(subject)
+        if column is None:
+            column = len(self._subjects)
+            if column == self._grades.shape[1]:
+                grown = np.full((self._grades.shape[0], max(2 * column, 4)), np.nan, dtype=np.float64)
+                grown[:, :column] = self._grades
+                self._grades = grown
+            self._subjects.append(subject)
+            self._subject_lookup[subject] = column
+        return column
+
+    def _position(self, index: int) -> int:
+        if index < 0:
+            index += self._size
+        if not 0 <= index < self._size:
+            raise IndexError("StudentStore index out of range")
+        return index
+
+    def _materialize(self, row: int) -> Student:
+        student = Student(
+            self._ids.get(row),
+            self._names.get(row),
+            int(self._ages[row]),
+            self._classes[self._class_codes[row]]
+        )
+        values = self._grades[row, :len(self._subjects)]
+        for column in np.flatnonzero(~np.isnan(values)):
+            student.subjects[self._subjects[column]] = float(values[column])
+        return student
+
+    # -- list-like interface ----------------------------------------------
+
+    def append(self, student: Student) -> StudentView:
+        """Copy a student into the store and return its view"""
+        self.extend([student])
+        return StudentView(self, int(self._handles[self._size - 1]))
+
+    def extend(self, students: Iterable[Student]):
+        """Copy many students into the store in one pass"""
+        students = list(students)
+        start = self._size
+        self._reserve(start + len(students))
+        rows, columns, grades = [], [], []
+        for row, student in enumerate(students, start):
+            self._handles[row] = self._next_handle
+            self._next_handle += 1
+            self._ids.set(row, student.student_id)
+            self._names.set(row, student.name)
+            self._ages[row] = student.age
+            self._class_codes[row] = self._class_code(student.class_name)
+            for subject, grade in student.subjects.items():
+                rows.append(row)
+                columns.append(self._subject_column(subject))
+                grades.append(grade)
+        self._grades[start:start + len(students), :] = np.nan
+        self._grades[rows, columns] = grades
+        self._size += len(students)
+        MUTATIONS.value += 1
+        self._revisions[start:self._size] = MUTATIONS.value
+        self.version += 1
+
+    def pop(self, index: int = -1) -> Student:
+        """Remove the student at index and return it as a detached Student"""
+        row = self._position(index)
+        student = self._materialize(row)
+        del self[row]
+        return student
+
+    def remove(self, student: StudentView):
+        """Remove a student previously handed out by this store"""
+        del self[self.index(student)]
+
+    def index(self, student: StudentView) -> int:
+        """Return the current position of a view from this store"""
+        if not isinstance(student, StudentView) or student._store is not self:
+            raise ValueError("Student is not in this store")
+        try:
+            return self._row(student._handle)
+        except KeyError:
+            raise ValueError("Student is not in this store") from None
+
+    def copy(self) -> 'StudentStore':
+        """Independent compacted copy of the live rows; a few array copies, no per-student work"""
+        size = self._size
+        store = StudentStore(capacity=size)
+        store._size = size
+        store._next_handle = size
+        store._handles = np.arange(max(size, 1), dtype=np.int64)
+        store._revisions = self._revisions[:max(size, 1)].copy()
+        store._deleted = dict(self._deleted)
+        store._ages = self._ages[:max(size, 1)].copy()
+        store._class_codes = self._class_codes[:max(size, 1)].copy()
+        store._grades = self._grades[:max(size, 1), :len(self._subjects)].copy()
+        for source, column in ((self._ids, store._ids), (self._names, store._names)):
+            starts, ends, data = source.packed(size)
+            column.starts[:size], column.ends[:size], column.data = starts, ends, bytearray(data)
+        store._classes = list(self._classes)
+        store._class_lookup = dict(self._class_lookup)
+        store._subjects = list(self._subjects)
+        store._subject_lookup = dict(self._subject_lookup)
+        return store
+
+    def changes_since(self, revision: int) -> Tuple[List[StudentView], List[str]]:
+        """
+        Students added or changed, and IDs deleted, after MUTATIONS.value
+        was revision: one comparison over the revision column, no per-row work
+        """
+        rows = np.flatnonzero(self._revisions[:self._size] > revision)
+        changed = [StudentView(self, int(self._handles[row])) for row in rows.tolist()]
+        deleted = [student_id for student_id, at in self._deleted.items() if at > revision]
+        return changed, deleted
+
+    def to_students(self) -> List[Student]:
+        """Materialize every row as an independent Student object"""
+        return [self._materialize(row) for row in range(self._size)]
+
+    def __len__(self) -> int:
+        return self._size
+
+    def __iter__(self) -> Iterator[StudentView]:
+        for row in range(self._size):
+            yield StudentView(self, int(self._handles[row]))
+
+    def __getitem__(self, index: Union[int, slice]) -> Union[StudentView, List[StudentView]]:
+        if isinstance(index, slice):
+            return [StudentView(self, int(self._handles[row]))
+                    for row in range(*index.indices(self._size))]
+        return StudentView(self, int(self._handles[self._position(index)]))
+
+    def __delitem__(self, index: int):
+        row = self._position(index)
+        size = self._size
+        MUTATIONS.value += 1
+        self._deleted[self._ids.get(row)] = MUTATIONS.value
+        self._handles[row:size - 1] = self._handles[row + 1:size]
+        self._revisions[row:size - 1] = self._revisions[row + 1:size]
+        self._ids.delete(row, size)
+        self._names.delete(row, size)
+        self._ages[row:size - 1] = self._ages[row + 1:size]
+        self._class_codes[row:size - 1] = self._class_codes[row + 1:size]
+        self._grades[row:size - 1] = self._grades[row + 1:size]
+        self._grades[size - 1] = np.nan
+        self._size -= 1
+        self.version += 1
+
+    # -- column access ----------------------------------------------------
+
+    @staticmethod
+    def _readonly(array: np.ndarray) -> np.ndarray:
+        view = array.view()
+        view.flags.writeable = False
+        return view
+
+    @property
+    def subjects(self) -> List[str]:
+        """Subject names in grade matrix column order"""
+        return list(self._subjects)
+
+    @property
+    def classes(self) -> List[str]:
+        """Class names indexed by class code"""
+        return list(self._classes)
+
+    @property
+    def ages(self) -> np.ndarray:
+        return self._readonly(self._ages[:self._size])
+
+    @property
+    def class_codes(self) -> np.ndarray:
+        return self._readonly(self._class_codes[:self._size])
+
+    @property
+    def grade_matrix(self) -> np.ndarray:
+        """Read-only students x subjects grades, NaN where no grade exists"""
+        return self._readonly(self._grades[:self._size, :len(self._subjects)])
+
+    @property
+    def nbytes(self) -> int:
+        """Approximate memory held by the store's arrays and buffers"""
+        return (self._handles.nbytes + self._revisions.nbytes + self._ids.nbytes + self._names.nbytes +
+                self._ages.nbytes + self._class_codes.nbytes + self._grades.nbytes)
+
+    def __repr__(self):
+        return f"StudentStore({self._size} students, {len(self._subjects)} subjects)"
@@ -0,0 +1,75 @@
+import numpy as np
+import pytest
+from student import Student
+from student_store import StudentStore
+from analytics import group_stats, term_report, age_band
+from benchmarks.synthetic import generate_students
+
+
+@pytest.fixture
+def store():
+    s1 = Student("001", "John Doe", 18, "12A")
+    s1.add_subject("Math", 90)
+    s1.add_subject("Science", 45)
+    s2 = Student("002", "Jane Smith", 17, "12A")
+    s2.add_subject("Math", 70)
+    s3 = Student("003", "Bob Lee", 15, "10C")
+    s3.add_subject("Math", 30)
+    s3.add_subject("Art", 65)
+    return StudentStore.from_students([s1, s2, s3])
+
+
+class TestGroupStats:
+    def test_by_class(self, store):
+        stats = group_stats(store, 'class')
+        assert set(stats) == {"12A", "10C"}
+        twelve = stats["12A"]
+        assert (twelve.count, twelve.mean, twelve.median) == (3, 205 / 3, 70.0)
+        assert (twelve.lowest, twelve.highest) == (45.0, 90.0)
+        assert (twelve.passed, twelve.failed) == (2, 1)
+        assert twelve.bands == {'A': 1, 'B': 1, 'C': 0, 'D': 0, 'E': 1, 'F': 0}
+        assert stats["10C"].pass_rate == 0.5
+
+    def test_multi_dimension_and_whole_roster(self, store):
+        stats = group_stats(store, ('class', 'subject'))
+        assert set(stats) == {("12A", "Math"), ("12A", "Science"), ("10C", "Math"), ("10C", "Art")}
+        assert stats[("12A", "Math")].mean == 80.0
+        whole = group_stats(store, ())
+        assert list(whole) == [()] and whole[()].count == 5
+
+        by_age = group_stats(store, 'age_band', age_band_width=3)
+        assert {band: s.count for band, s in by_age.items()} == {"15-17": 3, "18-20": 2}
+        assert age_band(17) == "16-17"
+
+    def test_matches_numpy(self):
+        store = StudentStore.from_students(generate_students(500, subjects=5, classes=6, seed=3))
+        stats = group_stats(store, 'subject', percentiles=(25, 90), pass_mark=60)
+        for subject, result in stats.items():
+            values = np.array([s.subjects[subject] for s in store if subject in s.subjects])
+            assert result.count == len(values)
+            assert result.mean == pytest.approx(values.mean())
+            assert result.std == pytest.approx(values.std())
+            assert result.median == pytest.approx(np.median(values))
+            assert result.percentiles['p25'] == pytest.approx(np.percentile(values, 25))
+            assert result.percentiles['p90'] == pytest.approx(np.percentile(values, 90))
+            assert result.passed == int((values >= 60).sum())
+
+    def test_cached_until_the_store_changes(self, store):
+        first = group_stats(store, 'class')
+        assert group_stats(store, 'class') is first
+        store[2].add_subject("History", 100)
+        second = group_stats(store, 'class')
+        assert second is not first
+        assert second["10C"].count == 3
+
+    def test_plain_students_and_invalid_grouping(self, store):
+        assert group_stats(store.to_students(), 'subject')["Math"].count == 3
+        with pytest.raises(ValueError):
+            group_stats(store, 'teacher')
+        assert group_stats(StudentStore(), 'class') == {}
+
+    def test_term_report(self, store):
+        report = term_report(store)
+        assert report["12A"]['overall'].count == 3
+        assert set(report["12A"]['subjects']) == {"Math", "Science"}
+        assert report["10C"]['subjects']["Art"].mean == 65.0
@@ -0,0 +1,137 @@
+import asyncio
+import http.client
+import json
+import pytest
+from student import Student
+from student_store import StudentStore
+from api_server import APIServer, StudentService, ReadWriteLock
+
+
+@pytest.fixture
+def server():
+    s1 = Student("001", "John Doe", 18, "12A")
+    s1.add_subject("Math", 90)
+    s1.add_subject("Science", 80)
+    s2 = Student("002", "Jane Smith", 17, "12A")
+    s2.add_subject("Math", 70)
+    s3 = Student("003", "Bob Lee", 16, "10C")
+    s3.add_subject("Art", 60)
+    server = APIServer(StudentService(StudentStore.from_students([s1, s2, s3])), port=0).start_in_thread()
+    yield server
+    server.stop()
+
+
+@pytest.fixture
+def client(server):
+    connection = http.client.HTTPConnection(server.host, server.port, timeout=5)
+    yield connection
+    connection.close()
+
+
+def request(client, method, path, body=None, headers=None):
+    client.request(method, path, body=json.dumps(body) if body is not None else None, headers=headers or {})
+    response = client.getresponse()
+    data = response.read()
+    return response, json.loads(data) if data else None
+
+
+class TestAPIServer:
+    def test_search_and_get(self, client):
+        response, data = request(client, 'GET', '/students?q=smith')
+        assert response.status == 200
+        assert [s['student_id'] for s in data['students']] == ["002"]
+
+        response, data = request(client, 'GET', '/students?limit=2&offset=1')
+        assert (data['total'], [s['student_id'] for s in data['students']]) == (3, ["002", "003"])
+
+        response, data = request(client, 'GET', '/students/001')
+        assert data['subjects'] == {"Math": 90.0, "Science": 80.0}
+
+        response, data = request(client, 'GET', '/students/999')
+        assert response.status == 404
+
+    def test_connection_is_reused(self, client):
+        request(client, 'GET', '/health')
+        sock = client.sock
+        for _ in range(3):
+            response, data = request(client, 'GET', '/health')
+            assert response.getheader('Connection') == 'keep-alive'
+            assert data == {'students': 3, 'version': 0}
+        assert client.sock is sock
+
+    def test_grade_updates(self, client):
+        response, data = request(client, 'PUT', '/students/003/grades/History', {"grade": 75})
+        assert response.status == 200 and data['subjects'] == {"Art": 60.0, "History": 75.0}
+        response, data = request(client, 'PUT', '/students/003/grades/History', {"grade": 175})
+        assert response.status == 400
+        response, data = request(client, 'PUT', '/students/003/grades/History', {"grade": "A"})
+        assert response.status == 400
+        response, data = request(client, 'DELETE', '/students/003/grades/Art')
+        assert data['subjects'] == {"History": 75.0}
+        response, data = request(client, 'DELETE', '/students/003/grades/Art')
+        assert response.status == 404
+        response, data = request(client, 'POST', '/students/003/grades/Art', {"grade": 1})
+        assert response.status == 405 and 'PUT' in response.getheader('Allow')
+
+    def test_stats_cached_until_a_write(self, server, client):
+        response, data = request(client, 'GET', '/classes/12A/stats')
+        assert data['student_count'] == 2
+        assert data['subjects']['Math']['average'] == 80.0
+        etag = response.getheader('ETag')
+
+        request(client, 'GET', '/classes/12A/stats')
+        assert (server.cache_hits, server.cache_misses) == (1, 1)
+        response, _ = request(client, 'GET', '/classes/12A/stats', headers={'If-None-Match': etag})
+        assert response.status == 304
+
+        request(client, 'PUT', '/students/002/grades/Math', {"grade": 90})
+        response, data = request(client, 'GET', '/classes/12A/stats')
+        assert data['subjects']['Math']['average'] == 90.0
+        assert response.getheader('ETag') != etag
+
+        response, data = request(client, 'GET', '/stats?by=subject')
+        assert set(data) == {"Math", "Science", "Art"}
+        response, _ = request(client, 'GET', '/classes/9Z/stats')
+        assert response.status == 404
+
+    def test_bad_requests(self, server, client):
+        response, _ = request(client, 'GET', '/nowhere')
+        assert response.status == 404
+        response, _ = request(client, 'GET', '/students?limit=x')
+        assert response.status == 400
+        client.request('PUT', '/students/001/grades/Math', body=b'{not json',
+                       headers={'Content-Type': 'application/json'})
+        response = client.getresponse()
+        response.read()
+        assert response.status == 400
+
+
+class TestReadWriteLock:
+    def test_readers_share_writers_exclude(self):
+        async def scenario():
+            lock = ReadWriteLock()
+            events = []
+
+            async def reader(name):
+                async with lock.read():
+                    events.append(f"{name} in")
+                    await asyncio.sleep(0.01)
+                    events.append(f"{name} out")
+
+            async def writer():
+                async with lock.write():
+                    events.append("w in")
+                    await asyncio.sleep(0.01)
+                    events.append("w out")
+
+            first = asyncio.create_task(reader("r1"))
+            await asyncio.sleep(0)
+            await asyncio.gather(reader("r2"), writer(), reader("r3"), first)
+            return events
+
+        events = asyncio.run(scenario())
+        assert events[:2] == ["r1 in", "r2 in"]
+        writer_in = events.index("w in")
+        assert events[writer_in + 1] == "w out"
+        assert events.index("r1 out") < writer_in and events.index("r2 out") < writer_in
+        assert events.index("r3 in") > writer_in
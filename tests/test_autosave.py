@@ -0,0 +1,137 @@
+import os
+import threading
+import time
+import pytest
+from student import Student
+from student_store import StudentStore
+from autosave import AutoSaver
+from cli_interface import StudentCLI
+from grades_fileio import load_from_json, save_to_json, save_to_csv
+
+
+def wait_for(condition, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        if time.monotonic() > deadline:
+            return False
+        time.sleep(0.01)
+    return True
+
+
+@pytest.fixture
+def roster():
+    s1 = Student("001", "John Doe", 18, "12A")
+    s1.add_subject("Math", 90)
+    return StudentStore.from_students([s1])
+
+
+class TestAutoSaver:
+    def test_saves_only_when_dirty(self, roster, tmp_path):
+        filename = str(tmp_path / "students.json")
+        saver = AutoSaver(filename, interval=0.02)
+        saver.start(roster.copy)
+        time.sleep(0.1)
+        assert saver.saves == 0 and not os.path.exists(filename)
+
+        with saver.lock:
+            roster.append(Student("002", "Jane Smith", 17, "11B"))
+        saver.mark_dirty()
+        assert wait_for(lambda: saver.saves == 1)
+        assert not saver.dirty
+        saver.close()
+        assert saver.saves == 1
+        assert [s.student_id for s in load_from_json(filename)] == ["001", "002"]
+
+    def test_rotating_backups(self, roster, tmp_path):
+        filename = str(tmp_path / "students.json")
+        saver = AutoSaver(filename, interval=0, backups=2)
+        saver.start(roster.copy)
+        for age in (20, 21, 22, 23):
+            roster[0].age = age
+            saver.mark_dirty()
+            saver.save()
+        assert load_from_json(filename)[0].age == 23
+        assert load_from_json(f"{filename}.1")[0].age == 22
+        assert load_from_json(f"{filename}.2")[0].age == 21
+        assert not os.path.exists(f"{filename}.3")
+        assert sorted(os.listdir(tmp_path)) == ["students.json", "students.json.1", "students.json.2"]
+
+    def test_snapshot_taken_under_lock(self, roster, tmp_path):
+        saver = AutoSaver(str(tmp_path / "students.json"), interval=0)
+        snapshotted = threading.Event()
+        saver.start(lambda: (snapshotted.set(), roster.copy())[1])
+        saver.mark_dirty()
+        with saver.lock:
+            writer = threading.Thread(target=saver.save)
+            writer.start()
+            assert not snapshotted.wait(0.1)
+        writer.join()
+        assert snapshotted.is_set()
+
+    def test_failed_save_keeps_previous_file(self, roster, tmp_path):
+        filename = str(tmp_path / "students.json")
+        save_to_json(roster, filename)
+        saver = AutoSaver(filename, interval=0)
+
+        def broken():
+            raise RuntimeError("disk full")
+        saver.start(broken)
+        saver.mark_dirty()
+        with pytest.raises(RuntimeError):
+            saver.save()
+        assert saver.dirty
+        assert [s.student_id for s in load_from_json(filename)] == ["001"]
+
+
+class TestCLIAutosave:
+    def test_changes_saved_on_exit(self, monkeypatch, tmp_path):
+        filename = str(tmp_path / "roster.json")
+        cli = StudentCLI(autosave=AutoSaver(filename, interval=0))
+        inputs = ["1", "001", "Test Student", "18", "12A", "Math", "90", "", "", "0"]
+        monkeypatch.setattr('builtins.input', lambda _: inputs.pop(0))
+        cli.run()
+        assert [s.name for s in load_from_json(filename)] == ["Test Student"]
+
+    def test_changes_saved_on_interrupt(self, monkeypatch, tmp_path):
+        filename = str(tmp_path / "roster.json")
+        cli = StudentCLI(autosave=AutoSaver(filename, interval=0))
+        inputs = ["1", "001", "Test Student", "18", "12A", ""]
+
+        def interrupted(_):
+            if not inputs:
+                raise KeyboardInterrupt
+            return inputs.pop(0)
+        monkeypatch.setattr('builtins.input', interrupted)
+        with pytest.raises(KeyboardInterrupt):
+            cli.run()
+        assert len(load_from_json(filename)) == 1
+
+    def test_loads_by_suffix(self, tmp_path):
+        filename = str(tmp_path / "roster.csv")
+        save_to_csv([Student("001", "John Doe", 18, "12A")], filename)
+        cli = StudentCLI(autosave=AutoSaver(filename, interval=0))
+        assert [s.name for s in cli.students] == ["John Doe"]
+        cli.close()
+
+    def test_unreadable_file_is_not_overwritten(self, tmp_path):
+        filename = tmp_path / "roster.json"
+        filename.write_text("not json")
+        cli = StudentCLI(autosave=AutoSaver(str(filename), interval=0))
+        assert cli.autosave is None
+        cli.students.append(Student("001", "John Doe", 18, "12A"))
+        cli._changed()
+        cli.close()
+        assert filename.read_text() == "not json"
+
+    def test_loading_another_file_does_not_save_it(self, monkeypatch, tmp_path):
+        filename = str(tmp_path / "roster.json")
+        save_to_json([Student("001", "John Doe", 18, "12A")], filename)
+        other = str(tmp_path / "other.json")
+        save_to_json([Student("002", "Jane Smith", 17, "11B")], other)
+        cli = StudentCLI(autosave=AutoSaver(filename, interval=0))
+        inputs = ["1", other]
+        monkeypatch.setattr('builtins.input', lambda _: inputs.pop(0))
+        cli.load_data_menu()
+        assert [s.name for s in cli.students] == ["Jane Smith"]
+        cli.close()
+        assert [s.name for s in load_from_json(filename)] == ["John Doe"]
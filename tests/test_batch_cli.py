@@ -0,0 +1,121 @@
+import io
+import json
+import pytest
+from batch_cli import main
+from student import Student
+from grades_fileio import save_to_json, load_from_json
+
+
+@pytest.fixture
+def data_file(tmp_path):
+    s1 = Student("001", "John Doe", 18, "12A")
+    s1.add_subject("Math", 90)
+    s1.add_subject("Science", 80)
+    s2 = Student("002", "Jane Smith", 17, "11B")
+    s2.add_subject("Math", 70)
+    filename = str(tmp_path / "students.json")
+    save_to_json([s1, s2], filename)
+    return filename
+
+
+class TestBatchCLI:
+    def test_search(self, data_file, capsys):
+        assert main(['--data', data_file, 'search', 'jane']) == 0
+        out = capsys.readouterr().out
+        assert out.splitlines() == ["002\tJane Smith\t17\t11B\t70.00"]
+
+    def test_search_no_match_exit_status(self, data_file, capsys):
+        assert main(['--data', data_file, 'search', 'nobody']) == 1
+
+    def test_fuzzy_search(self, data_file, capsys):
+        assert main(['--data', data_file, 'search', 'Jon Doo', '--fuzzy']) == 0
+        out = capsys.readouterr().out
+        assert out.splitlines()[0].startswith("001\tJohn Doe\t18\t12A\t85.00\t")
+        assert main(['--data', data_file, 'search', 'Jane Smith', '--fuzzy', '--json']) == 0
+        assert json.loads(capsys.readouterr().out)[0]['score'] == 1.0
+
+    def test_apply_delta(self, data_file, tmp_path, capsys):
+        delta = tmp_path / "changes.jsonl"
+        delta.write_text('{"delta": 1, "upserts": 1, "deletes": 1}\n{"delete": "001"}\n'
+                         '{"upsert": {"student_id": "003", "name": "Bob Lee", "age": 16, "class_name": "10C"}}\n')
+        assert main(['--data', data_file, 'apply-delta', str(delta)]) == 0
+        assert [s.student_id for s in load_from_json(data_file)] == ["002", "003"]
+        assert main(['--data', data_file, 'apply-delta', str(tmp_path / "missing.jsonl")]) == 1
+
+    def test_sort_json(self, data_file, capsys):
+        assert main(['--data', data_file, 'sort', '--by', 'grade', '--descending', '--json']) == 0
+        records = json.loads(capsys.readouterr().out)
+        assert [r['student_id'] for r in records] == ["001", "002"]
+
+    def test_stats_by_subject(self, data_file, capsys):
+        main(['--data', data_file, 'stats', '--by', 'subject'])
+        lines = capsys.readouterr().out.splitlines()
+        assert lines[0].split('\t')[:3] == ["Math", "2", "80.00"]
+
+    def test_report_by_class_and_subject(self, data_file, capsys):
+        assert main(['--data', data_file, 'report', '--by', 'class', 'subject', '--json']) == 0
+        groups = json.loads(capsys.readouterr().out)
+        assert [(g['class'], g['subject'], g['mean']) for g in groups] == [
+            ("12A", "Math", 90.0), ("12A", "Science", 80.0), ("11B", "Math", 70.0)]
+
+        main(['--data', data_file, 'report', '--by'])
+        lines = capsys.readouterr().out.splitlines()
+        assert lines[0].startswith("count\tmean") and lines[1].startswith("3\t80.00")
+
+    def test_import_and_export(self, data_file, tmp_path, capsys):
+        new_file = str(tmp_path / "new.json")
+        save_to_json([Student("003", "Bob Lee", 16, "10C"), Student("001", "John D.", 18, "12A")], new_file)
+        assert main(['--data', data_file, 'import', new_file]) == 0
+        students = load_from_json(data_file)
+        assert [s.student_id for s in students] == ["001", "002", "003"]
+        assert students[0].name == "John D."
+
+        csv_file = str(tmp_path / "roster.csv")
+        assert main(['--data', data_file, 'export', csv_file]) == 0
+        assert main(['--data', str(tmp_path / "copy.json"), 'import', csv_file]) == 0
+        assert len(load_from_json(str(tmp_path / "copy.json"))) == 3
+
+    def test_bulk_grade_upload(self, data_file, tmp_path, capsys):
+        grades = tmp_path / "grades.csv"
+        grades.write_text("student_id,subject,grade\n001,Math,95\n002,Art,88\n999,Math,50\n002,Art,abc\n")
+        assert main(['--data', data_file, 'bulk-grade-upload', str(grades)]) == 1
+
+        err = capsys.readouterr().err
+        assert "grades.csv:4" in err and "grades.csv:5" in err
+        students = {s.student_id: s for s in load_from_json(data_file)}
+        assert students["001"].subjects["Math"] == 95
+        assert students["002"].subjects["Art"] == 88
+
+    def test_script_from_stdin_saves_once(self, data_file, monkeypatch, capsys):
+        script = "# grade fixes\nbulk-grade-upload grades.csv\nsearch 'John Doe'\n"
+        monkeypatch.setattr('sys.stdin', io.StringIO(script))
+        grades_file = data_file.replace("students.json", "grades.csv")
+        with open(grades_file, 'w') as f:
+            f.write("student_id,subject,grade\n001,History,60\n")
+        monkeypatch.chdir(data_file.rsplit('/', 1)[0])
+
+        assert main(['--data', data_file, 'script', '-']) == 0
+        assert "001\tJohn Doe\t18\t12A\t76.67" in capsys.readouterr().out
+        assert load_from_json(data_file)[0].subjects["History"] == 60
+
+    def test_import_bad_stdin_records(self, data_file, monkeypatch, capsys):
+        lines = ['{"student_id": "003", "name": "Bob Lee", "age": 16, "class_name": "10C"}',
+                 '{"student_id": "004", "name": "Ann", "age": "x", "class_name": "10C"}',
+                 '{"student_id": "005", "na',
+                 '']
+        monkeypatch.setattr('sys.stdin', io.StringIO('\n'.join(lines)))
+        assert main(['--data', data_file, 'import', '-']) == 1
+        err = capsys.readouterr().err
+        assert "<stdin>: line 2: invalid age 'x'" in err and "<stdin>: line 3: invalid JSON" in err
+        assert [s.student_id for s in load_from_json(data_file)] == ["001", "002", "003"]
+
+    def test_import_duplicate_error_policy(self, data_file, tmp_path, capsys):
+        new_file = str(tmp_path / "new.json")
+        save_to_json([Student("003", "Bob Lee", 16, "10C"), Student("001", "John D.", 18, "12A")], new_file)
+        assert main(['--data', data_file, 'import', '--on-duplicate', 'error', new_file]) == 1
+        assert "'001'" in capsys.readouterr().err
+        assert [s.name for s in load_from_json(data_file)] == ["John Doe", "Jane Smith"]
+
+    def test_unsupported_export_type(self, data_file, capsys):
+        assert main(['--data', data_file, 'export', 'roster.xml']) == 1
+        assert "Unsupported file type" in capsys.readouterr().err
@@ -0,0 +1,36 @@
+from benchmarks.synthetic import generate_students, subject_names
+from benchmarks.run import run_benchmarks, compare, save_baseline, load_baseline, Result
+
+
+class TestSyntheticRoster:
+    def test_seeded_generator_is_reproducible(self):
+        first = [s.to_dict() for s in generate_students(50, subjects=5, seed=7)]
+        again = [s.to_dict() for s in generate_students(50, subjects=5, seed=7)]
+        other = [s.to_dict() for s in generate_students(50, subjects=5, seed=8)]
+        assert first == again
+        assert first != other
+
+    def test_subject_count_and_ranges(self):
+        students = generate_students(200, subjects=15)
+        assert len({s.student_id for s in students}) == 200
+        names = set(subject_names(15))
+        for student in students:
+            assert set(student.subjects) <= names
+            assert all(0 <= grade <= 100 for grade in student.subjects.values())
+
+
+class TestBenchmarkHarness:
+    def test_run_and_compare(self, tmp_path):
+        results = run_benchmarks(sizes=[100], subjects=4, repeat=1,
+                                 only=['search_student', 'load_from_csv'])
+        assert [r.benchmark for r in results] == ['search_student', 'load_from_csv']
+        assert all(r.seconds > 0 and r.peak_bytes > 0 and r.students == 100 for r in results)
+
+        baseline_file = tmp_path / "baseline.json"
+        save_baseline(results, baseline_file)
+        baseline = load_baseline(baseline_file)
+        assert compare(results, baseline) == []
+
+        slower = [Result(r.benchmark, r.students, r.subjects, r.seconds * 2, 0.0, r.peak_bytes)
+                  for r in results]
+        assert len(compare(slower, baseline, threshold=1.5)) == 2
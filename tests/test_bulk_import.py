@@ -0,0 +1,76 @@
+import json
+import pytest
+from student import Student
+from bulk_import import bulk_import
+from validation import student_from_record
+from grades_fileio import save_to_json, save_to_csv
+
+
+@pytest.fixture
+def class_files(tmp_path):
+    s1 = Student("001", "John Doe", 18, "12A")
+    s1.add_subject("Math", 90)
+    s2 = Student("002", "Jane Smith", 17, "12A")
+    s2.add_subject("Math", 70)
+    first = str(tmp_path / "12a.json")
+    save_to_json([s1, s2], first)
+
+    s1_again = Student("001", "John Doe", 19, "12A")
+    s1_again.add_subject("Science", 80)
+    s3 = Student("003", "Bob Lee", 16, "10C")
+    second = str(tmp_path / "10c.csv")
+    save_to_csv([s1_again, s3], second)
+    return [first, second]
+
+
+class TestBulkImport:
+    def test_parallel_matches_serial(self, class_files):
+        serial = bulk_import(class_files, workers=1)
+        parallel = bulk_import(class_files, workers=2)
+        assert [s.to_dict() for s in parallel.students] == [s.to_dict() for s in serial.students]
+        assert [s.student_id for s in parallel.students] == ["001", "002", "003"]
+
+    @pytest.mark.parametrize("policy, age, subjects", [
+        ('first', 18, {"Math": 90}),
+        ('last', 19, {"Science": 80}),
+        ('merge', 19, {"Math": 90, "Science": 80}),
+    ])
+    def test_duplicate_policies(self, class_files, policy, age, subjects):
+        report = bulk_import(class_files, on_duplicate=policy, workers=1)
+        john = report.students[0]
+        assert (john.age, dict(john.subjects)) == (age, subjects)
+        assert report.duplicates == 1
+
+    def test_duplicate_error_policy(self, class_files):
+        with pytest.raises(ValueError, match="001"):
+            bulk_import(class_files, on_duplicate='error', workers=1)
+
+    def test_invalid_policy(self, class_files):
+        with pytest.raises(ValueError):
+            bulk_import(class_files, on_duplicate='newest')
+
+    def test_bad_records_reported_per_file(self, class_files, tmp_path):
+        bad = tmp_path / "bad.jsonl"
+        bad.write_text('\n'.join(json.dumps(record) for record in [
+            {"student_id": "004", "name": "Ann", "age": 17, "class_name": "11B", "subjects": {"Art": 88}},
+            {"student_id": "005", "name": "Tom", "age": "x", "class_name": "11B"},
+            {"student_id": "006", "name": "Sue", "age": 16, "class_name": "11B", "subjects": {"Art": 120}},
+        ]) + '\n')
+        report = bulk_import(class_files + [str(bad), str(tmp_path / "missing.csv")], workers=2)
+
+        assert [s.student_id for s in report.students] == ["001", "002", "003", "004"]
+        bad_report = report.files[2]
+        assert (bad_report.records, bad_report.imported) == (3, 1)
+        assert "line 2: invalid age 'x'" in bad_report.errors[0]
+        assert "line 3: Art" in bad_report.errors[1]
+        assert len(report.files[3].errors) == 1
+        assert "bad.jsonl" in str(report)
+
+    def test_existing_roster_comes_first(self, class_files):
+        existing = Student("002", "Jane S.", 17, "12A")
+        report = bulk_import(class_files, on_duplicate='first', workers=1, roster=[existing])
+        assert report.students[0] is existing
+
+    def test_student_from_record_missing_field(self):
+        with pytest.raises(ValueError, match="class_name"):
+            student_from_record({"student_id": "1", "name": "A", "age": 1})
@@ -1,5 +1,7 @@
 from cli_interface import StudentCLI
 from student import Student
+from journal import StudentJournal
+from grades_fileio import save_to_json, save_delta, current_revision
 
 class TestCLI:
     def test_add_student(self, monkeypatch, capsys):
@@ -48,4 +50,151 @@ class TestCLI:
         captured = capsys.readouterr()
         assert "John Doe" in captured.out
         assert "Math" in captured.out
-        assert "90" in captured.out
\ No newline at end of file
+        assert "90" in captured.out
+
+    def test_delete_student_by_id(self, monkeypatch, capsys):
+        cli = StudentCLI()
+        cli.students = [Student("001", "John Doe", 18, "12A"),
+                        Student("002", "Jane Smith", 17, "11B")]
+
+        inputs = ["#002"]
+        monkeypatch.setattr('builtins.input', lambda _: inputs.pop(0))
+        cli.delete_student()
+
+        captured = capsys.readouterr()
+        assert "Jane Smith has been deleted" in captured.out
+        assert [s.name for s in cli.students] == ["John Doe"]
+        assert cli.index.get("002") is None
+
+    def test_index_built_on_first_search(self, monkeypatch):
+        cli = StudentCLI()
+        cli.students = [Student("001", "John Doe", 18, "12A")]
+        assert cli._index is None
+        cli.students.append(Student("002", "Jane Smith", 17, "11B"))
+        cli._student_added(cli.students[-1])
+        assert cli._index is None  # nothing to keep up to date yet
+
+        inputs = ["1", "Jane"]
+        monkeypatch.setattr('builtins.input', lambda _: inputs.pop(0))
+        cli.search_student()
+        assert cli.index.get("002") is cli.students[1]
+        cli.students = [Student("003", "Alice Johnson", 19, "12A")]
+        assert cli._index is None and cli.index.get("003") is not None
+
+    def test_ranking_built_on_first_sort(self, monkeypatch):
+        cli = StudentCLI()
+        cli.students = [Student("001", "John Doe", 18, "12A"), Student("002", "Jane Smith", 17, "11B")]
+        cli.students[0].add_subject("Math", 70)
+        cli.students[1].add_subject("Math", 90)
+        cli._grade_changed(cli.students[1], "Math", 90)
+        assert cli._ranking is None
+
+        monkeypatch.setattr('builtins.input', lambda _: "3")
+        cli.sort_students()
+        assert cli._ranking is not None
+        assert [s.name for s in cli.ranking.sorted('grade', True)] == ["Jane Smith", "John Doe"]
+        cli.students = []
+        assert cli._ranking is None
+
+    def test_plain_number_is_the_list_number(self, monkeypatch, capsys):
+        cli = StudentCLI()
+        cli.students = [Student("2", "Alice Brown", 18, "12A"),
+                        Student("1", "Bob Stone", 17, "11B")]
+
+        inputs = ["1"]
+        monkeypatch.setattr('builtins.input', lambda _: inputs.pop(0))
+        cli.delete_student()
+        assert [s.name for s in cli.students] == ["Bob Stone"]
+
+        inputs = ["3", "#9", "Bob", "#1"]
+        cli.delete_student()
+        out = capsys.readouterr().out
+        assert "between 0 and 1" in out and "No student with ID 9" in out and "No student with ID Bob" in out
+        assert not cli.students and not inputs
+
+    def test_journal_mode_records_changes(self, monkeypatch, tmp_path):
+        snapshot = str(tmp_path / "students.json")
+        cli = StudentCLI(journal=StudentJournal(snapshot))
+        inputs = ["001", "Test Student", "18", "12A", "Math", "90", ""]
+        monkeypatch.setattr('builtins.input', lambda _: inputs.pop(0))
+        cli.add_student()
+
+        recovered = StudentJournal(snapshot).recover()
+        assert [s.name for s in recovered] == ["Test Student"]
+        assert recovered[0].subjects == {"Math": 90}
+
+    def test_journal_mode_records_loads_and_deltas(self, monkeypatch, tmp_path):
+        other = str(tmp_path / "other.json")
+        save_to_json([Student("001", "John Doe", 18, "12A"), Student("002", "Jane Smith", 17, "11B")], other)
+        delta = str(tmp_path / "changes.jsonl")
+        since = current_revision()
+        changed = Student("003", "Bob Stone", 20, "10C")
+        changed.add_subject("Art", 75)
+        save_delta([changed], delta, since, deleted=["001"])
+
+        snapshot = str(tmp_path / "students.json")
+        cli = StudentCLI(journal=StudentJournal(snapshot))
+        cli.journal.record_add(Student("009", "Old Roster", 18, "12A"))
+        inputs = ["1", other, "5", delta]
+        monkeypatch.setattr('builtins.input', lambda _: inputs.pop(0))
+        cli.load_data_menu()
+        assert [s.student_id for s in StudentJournal(snapshot).recover()] == ["001", "002"]
+        cli.load_data_menu()
+
+        recovered = StudentJournal(snapshot).recover()
+        assert [s.to_dict() for s in recovered] == [s.to_dict() for s in cli.students]
+        assert [s.student_id for s in recovered] == ["002", "003"]
+
+    def test_view_students_paged(self, monkeypatch, capsys):
+        cli = StudentCLI()
+        cli.students = [Student(str(i), f"Student {i}", 18, "12A") for i in range(1, 46)]
+
+        inputs = ["n", "/student 44", ""]
+        monkeypatch.setattr('builtins.input', lambda _: inputs.pop(0))
+        cli.view_students()
+
+        pages = capsys.readouterr().out.split("STUDENT LIST")[1:]
+        assert len(pages) == 3
+        assert "Page 1 of 3 (45 students)" in pages[0]
+        assert "20. Student 20" in pages[0] and "21. Student 21" not in pages[0]
+        assert "21. Student 21" in pages[1]
+        assert "Page 3 of 3" in pages[2] and "44. Student 44" in pages[2]
+        assert not inputs
+
+    def test_search_falls_back_to_fuzzy(self, monkeypatch, capsys):
+        cli = StudentCLI()
+        cli.students = [Student("001", "John Doe", 18, "12A"),
+                        Student("002", "Gavin Beterest", 16, "10C")]
+
+        inputs = ["1", "Gavn Beterest"]
+        monkeypatch.setattr('builtins.input', lambda _: inputs.pop(0))
+        cli.search_student()
+
+        out = capsys.readouterr().out
+        assert "No exact match. Closest names:" in out
+        assert "Gavin Beterest" in out and "John Doe" not in out
+
+    def test_delta_save_and_apply(self, monkeypatch, tmp_path):
+        from student_store import StudentStore
+        cli = StudentCLI()
+        cli.students = StudentStore.from_students([Student("001", "John Doe", 18, "12A"),
+                                                   Student("002", "Jane Smith", 17, "11B")])
+        snapshot = str(tmp_path / "base")
+        inputs = ["1", snapshot]
+        monkeypatch.setattr('builtins.input', lambda _: inputs.pop(0))
+        cli.save_data()
+
+        inputs = ["#002"]
+        cli.delete_student()
+        cli.students[0].add_subject("Math", 80)
+        delta = str(tmp_path / "changes")
+        inputs = ["5", delta]
+        cli.save_data()
+
+        other = StudentCLI()
+        inputs = ["1", f"{snapshot}.json"]
+        other.load_data_menu()
+        inputs = ["5", f"{delta}.delta.jsonl"]
+        other.load_data_menu()
+        assert [s.to_dict() for s in other.students] == [s.to_dict() for s in cli.students]
+        assert other.index.get("002") is None
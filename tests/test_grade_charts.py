@@ -0,0 +1,87 @@
+import numpy as np
+import pytest
+from student import Student
+from student_store import StudentStore
+from sqlite_store import SQLiteStudentStore
+from grade_charts import GradeHistogram, summarize_grades, render_grade_charts, ALL_GRADES
+from operations import visualize_grades
+
+
+@pytest.fixture
+def students():
+    s1 = Student("001", "John Doe", 18, "12A")
+    s1.add_subject("Math", 90)
+    s1.add_subject("Science", 80.5)
+    s2 = Student("002", "Jane Smith", 17, "11B")
+    s2.add_subject("Math", 70)
+    s2.add_subject("History", 65)
+    s3 = Student("003", "Bob Lee", 18, "12A")
+    s3.add_subject("Math", 85)
+    return [s1, s2, s3]
+
+
+class TestGradeHistogram:
+    def test_quantiles_match_numpy(self):
+        grades = np.random.default_rng(0).integers(0, 101, 5000).astype(float)
+        histogram = GradeHistogram.from_grades(grades)
+        for q in (0.0, 0.25, 0.5, 0.9, 1.0):
+            assert histogram.quantile(q) == pytest.approx(np.quantile(grades, q))
+        assert histogram.mean == pytest.approx(grades.mean())
+        assert histogram.count == 5000
+
+    def test_merge(self):
+        histogram = GradeHistogram.from_grades([10, 20])
+        histogram.merge(GradeHistogram.from_grades([30]))
+        assert histogram.count == 3
+        assert histogram.quantile(0.5) == 20
+        assert (histogram.min, histogram.max) == (10, 30)
+
+    def test_coarse_bins(self):
+        edges, counts = GradeHistogram.from_grades([5, 15, 15, 100]).coarse(10)
+        assert len(edges) == 11
+        assert list(counts) == [1, 2, 0, 0, 0, 0, 0, 0, 0, 1]
+
+    def test_box_stats_whiskers_within_data(self):
+        stats = GradeHistogram.from_grades([0, 50, 51, 52, 53, 100]).box_stats("x")
+        assert stats['whislo'] == 50 and stats['whishi'] == 53
+        assert stats['fliers'] == []
+
+
+class TestSummarizeGrades:
+    @pytest.mark.parametrize("by", [None, 'class', 'subject'])
+    def test_backends_agree(self, students, tmp_path, by):
+        expected = summarize_grades(students, by)
+        store = summarize_grades(StudentStore.from_students(students), by)
+        with SQLiteStudentStore(str(tmp_path / "s.db")) as db:
+            db.extend(students)
+            sqlite = summarize_grades(db, by)
+        for result in (store, sqlite):
+            assert set(result) == set(expected)
+            for label, histogram in expected.items():
+                assert np.array_equal(result[label].counts, histogram.counts)
+                assert result[label].mean == pytest.approx(histogram.mean)
+
+    def test_groups(self, students):
+        assert list(summarize_grades(students)) == [ALL_GRADES]
+        assert summarize_grades(students, 'class')["12A"].count == 3
+        assert summarize_grades(students, 'subject')["Math"].quantile(0.5) == 85
+
+    def test_invalid_grouping(self, students):
+        with pytest.raises(ValueError):
+            summarize_grades(students, 'age')
+
+
+class TestRenderGradeCharts:
+    def test_writes_png_headless(self, students, tmp_path):
+        path = render_grade_charts(summarize_grades(students, 'subject'), str(tmp_path / "chart.png"))
+        with open(path, 'rb') as f:
+            assert f.read(8) == b'\x89PNG\r\n\x1a\n'
+
+    def test_visualize_grades_output_path(self, students, tmp_path):
+        output = tmp_path / "classes.png"
+        assert visualize_grades(students, by='class', output_path=str(output)) == str(output)
+        assert output.exists()
+
+    def test_no_grades(self):
+        with pytest.raises(ValueError):
+            render_grade_charts({})
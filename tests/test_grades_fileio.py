@@ -1,7 +1,14 @@
+import pytest
 import os
 import tempfile
 from student import Student
-from grades_fileio import save_to_json, load_from_json, save_to_csv, load_from_csv
+from grades_fileio import (save_to_json, load_from_json, save_to_csv, load_from_csv,
+                           iter_from_json, save_to_jsonl, load_from_jsonl, iter_from_csv,
+                           save_to_snapshot, load_from_snapshot, save_delta, apply_delta,
+                           current_revision, iter_records, save_to_file, load_store_from_file)
+from student_store import StudentStore
+from student_index import StudentIndex
+from validation import InvalidRecordsError
 
 class TestFileIO:
     @pytest.fixture
@@ -50,4 +57,181 @@ class TestFileIO:
                 assert loaded[1].subjects["Science"] == 92.0
                 assert loaded[1].subjects["Math"] == 85.0
             finally:
-                os.unlink(tmp.name)
\ No newline at end of file
+                os.unlink(tmp.name)
+
+    def test_csv_subject_appearing_late(self, tmp_path):
+        students = [Student(f"{i:04d}", f"Student {i}", 15, "10A") for i in range(1500)]
+        students[-1].add_subject("Latin", 80)
+        filename = str(tmp_path / "big.csv")
+        save_to_csv(students, filename, sample_size=10)
+        assert load_from_csv(filename)[-1].subjects["Latin"] == 80
+
+        # A one-shot iterator is only sampled; a failure keeps the old file whole
+        with pytest.raises(ValueError, match="Latin"):
+            save_to_csv(iter(students), filename, sample_size=10)
+        assert len(load_from_csv(filename)) == 1500
+        assert os.listdir(tmp_path) == ["big.csv"]
+
+    def test_csv_records_skip_blank_lines(self, tmp_path):
+        filename = tmp_path / "blank.csv"
+        filename.write_text("student_id,name,age,class_name,Math\n001,John Doe,18,12A,90\n\n  ,\n")
+        assert [record['student_id'] for record in iter_records(str(filename))] == ["001"]
+
+    def test_json_streaming(self, sample_students):
+        with tempfile.NamedTemporaryFile(delete=False) as tmp:
+            try:
+                # The writer accepts a generator and never needs the full list
+                save_to_json((s for s in sample_students), tmp.name)
+                loaded = list(iter_from_json(tmp.name, chunk_size=5))
+                assert [s.to_dict() for s in loaded] == [s.to_dict() for s in sample_students]
+
+                # The first record is available before the rest of the file is parsed
+                with open(tmp.name) as f:
+                    text = f.read()
+                with open(tmp.name, 'w') as f:
+                    f.write(text[:text.index('"Jane Smith"')])
+                reader = iter_from_json(tmp.name, chunk_size=16)
+                assert next(reader).name == "John Doe"
+                with pytest.raises(ValueError):
+                    next(reader)
+            finally:
+                os.unlink(tmp.name)
+
+    def test_jsonl_roundtrip(self, sample_students):
+        with tempfile.NamedTemporaryFile(delete=False) as tmp:
+            try:
+                save_to_jsonl(sample_students, tmp.name)
+                with open(tmp.name) as f:
+                    assert len(f.readlines()) == 2
+                loaded = load_from_jsonl(tmp.name)
+                assert loaded[1].subjects == {"Math": 85, "Science": 92}
+            finally:
+                os.unlink(tmp.name)
+
+    def test_csv_streaming_schema(self, sample_students):
+        with tempfile.NamedTemporaryFile(delete=False) as tmp:
+            try:
+                # Declared schema: a generator is written without a pre-scan
+                save_to_csv((s for s in sample_students), tmp.name, subjects=["Science", "Math"])
+                with open(tmp.name) as f:
+                    assert f.readline().strip() == "student_id,name,age,class_name,Science,Math"
+                loaded = list(iter_from_csv(tmp.name))
+                assert loaded[0].subjects == {"Math": 90.0}
+
+                # Sampled schema that misses a later subject fails loudly
+                with pytest.raises(ValueError):
+                    save_to_csv(iter(sample_students), tmp.name, sample_size=1)
+
+                # A StudentStore supplies its own subject vocabulary
+                save_to_csv(StudentStore.from_students(sample_students), tmp.name, sample_size=1)
+                assert load_from_csv(tmp.name)[1].subjects == {"Math": 85.0, "Science": 92.0}
+            finally:
+                os.unlink(tmp.name)
+
+    def test_snapshot_roundtrip(self, sample_students):
+        with tempfile.TemporaryDirectory() as tmp:
+            filename = os.path.join(tmp, "students.snap")
+            save_to_snapshot(sample_students, filename)
+            loaded = load_from_snapshot(filename)
+            assert isinstance(loaded, StudentStore)
+            assert [s.to_dict() for s in loaded] == [s.to_dict() for s in sample_students]
+            assert len(load_from_snapshot(os.path.join(tmp, "missing.snap"))) == 0
+
+    def test_whole_grades_written_as_integers(self, sample_students, tmp_path):
+        sample_students[1].add_subject("Art", 72.5)
+        store = StudentStore.from_students(sample_students)
+        for suffix in ('.json', '.jsonl', '.csv'):
+            for roster in (sample_students, store):
+                filename = tmp_path / f"roster{suffix}"
+                save_to_file(roster, str(filename))
+                text = filename.read_text()
+                assert "90" in text and "90.0" not in text and "72.5" in text
+        assert sample_students[0].to_dict()['subjects'] == {"Math": 90}
+        assert type(sample_students[0].to_dict()['subjects']["Math"]) is int
+
+    def test_store_csv_skips_subjects_nobody_has(self, sample_students, tmp_path):
+        sample_students[0].add_subject("Art", 60)
+        store = StudentStore.from_students(sample_students)
+        del store[0].subjects["Art"]
+        del store[1]
+        filename = tmp_path / "roster.csv"
+        save_to_csv(store, str(filename))
+        assert filename.read_text().splitlines()[0] == "student_id,name,age,class_name,Math"
+
+    def test_load_store_from_file(self, sample_students, tmp_path):
+        for suffix in ('.json', '.jsonl', '.csv', '.snap', '.db'):
+            filename = str(tmp_path / f"roster{suffix}")
+            save_to_file(sample_students, filename)
+            store = load_store_from_file(filename)
+            assert [s.to_dict() for s in store] == [s.to_dict() for s in sample_students]
+
+        bad = tmp_path / "bad.jsonl"
+        bad.write_text('{"student_id": "1", "name": "A", "age": "x", "class_name": "1A"}\n'
+                       '{"student_id": "2", "name": "B", "age": 3, "class_name": "1A", "subjects": {"Art": 101}}\n')
+        with pytest.raises(InvalidRecordsError) as info:
+            load_store_from_file(str(bad))
+        assert len(info.value.errors) == 2
+
+    def test_delta_brings_snapshot_up_to_date(self, sample_students, tmp_path):
+        store = StudentStore.from_students(sample_students + [Student("003", "Bob Lee", 16, "10C")])
+        save_to_json(store, str(tmp_path / "base.json"))
+        since = current_revision()
+
+        store[0].add_subject("Art", 70)
+        store[2].student_id = "003b"
+        del store[1]
+        store.append(Student("004", "New Kid", 12, "7A"))
+        delta = str(tmp_path / "changes.jsonl")
+        until = save_delta(store, delta, since)
+        with open(delta) as f:
+            assert len(f.readlines()) == 1 + 2 + 3  # header, 2 deletes, 3 upserts
+
+        expected = {s.student_id: s.to_dict() for s in store}
+        base = StudentStore.from_students(load_from_json(str(tmp_path / "base.json")))
+        assert apply_delta(base, delta, index=StudentIndex(base)) == (3, 2)
+        assert {s.student_id: s.to_dict() for s in base} == expected
+
+        plain = load_from_json(str(tmp_path / "base.json"))
+        apply_delta(plain, delta)
+        assert {s.student_id: s.to_dict() for s in plain} == expected
+
+        # Nothing changed since: an empty delta that changes nothing
+        save_delta(store, delta, until)
+        assert apply_delta(plain, delta) == (0, 0)
+
+    def test_delta_tracks_plain_students(self, sample_students, tmp_path):
+        since = current_revision()
+        sample_students[1].edit_info(age=18)
+        delta = str(tmp_path / "changes.jsonl")
+        save_delta(sample_students, delta, since, deleted=["009"])
+        with open(delta) as f:
+            lines = f.readlines()
+        assert '"delete": "009"' in lines[1] and '"002"' in lines[2] and len(lines) == 3
+
+    def test_delta_tracks_direct_grade_edits(self, sample_students, tmp_path):
+        delta = str(tmp_path / "changes.jsonl")
+        since = current_revision()
+        sample_students[0].subjects['Math'] = 80
+        since = save_delta(sample_students, delta, since)
+        assert apply_delta([], delta) == (1, 0)
+        del sample_students[1].subjects['Science']
+        since = save_delta(sample_students, delta, since)
+        upserted = []
+        assert apply_delta(upserted, delta) == (1, 0) and upserted[0].subjects.as_dict() == {"Math": 85}
+        sample_students[0].subjects.clear()
+        save_delta(sample_students, delta, since)
+        upserted = []
+        assert apply_delta(upserted, delta) == (1, 0)
+        assert upserted[0].student_id == "001" and not upserted[0].subjects
+
+    def test_invalid_delta_changes_nothing(self, sample_students, tmp_path):
+        delta = tmp_path / "changes.jsonl"
+        delta.write_text('{"delta": 1}\n{"delete": "001"}\n{"upsert": {"student_id": "005", "name": "X"}}\n')
+        with pytest.raises(InvalidRecordsError) as info:
+            apply_delta(sample_students, str(delta))
+        assert "line 3: missing field 'age'" in str(info.value.errors[0])
+        assert len(sample_students) == 2
+
+        delta.write_text('[]\n')
+        with pytest.raises(ValueError):
+            apply_delta(sample_students, str(delta))
@@ -0,0 +1,81 @@
+import json
+import os
+import subprocess
+import sys
+from pathlib import Path
+import pytest
+import instrumentation
+from instrumentation import LatencyHistogram, instrumented
+
+ROOT = Path(__file__).resolve().parent.parent
+
+
+@pytest.fixture
+def enabled(monkeypatch):
+    monkeypatch.setattr(instrumentation, 'ENABLED', True)
+    instrumentation.METRICS.clear()
+    yield instrumentation.METRICS
+    instrumentation.METRICS.clear()
+
+
+class TestInstrumentation:
+    def test_disabled_returns_function_unchanged(self, monkeypatch):
+        monkeypatch.setattr(instrumentation, 'ENABLED', False)
+
+        def work():
+            return 1
+        assert instrumented('work')(work) is work
+
+    def test_timing_records_and_bytes(self, enabled, tmp_path):
+        @instrumented('write', io='write')
+        def write(lines, filename):
+            with open(filename, 'w') as f:
+                f.writelines(lines)
+
+        @instrumented('read', io='read', filename_arg=0)
+        def read(filename):
+            with open(filename) as f:
+                yield from f
+
+        path = str(tmp_path / "data.txt")
+        write(["a\n", "b\n", "c\n"], path)
+        assert list(read(path)) == ["a\n", "b\n", "c\n"]
+
+        snapshot = enabled.snapshot()
+        assert snapshot['timers']['write']['count'] == 1
+        assert snapshot['counters'] == {'write.records': 3, 'write.bytes_write': 6,
+                                        'read.records': 3, 'read.bytes_read': 6}
+
+    def test_errors_counted(self, enabled):
+        @instrumented('fails')
+        def fails():
+            raise ValueError("boom")
+
+        with pytest.raises(ValueError):
+            fails()
+        assert enabled.counters['fails.errors'] == 1
+        assert enabled.timers['fails'].count == 1
+
+    def test_latency_histogram(self):
+        histogram = LatencyHistogram()
+        for seconds in [0.0000005] * 90 + [0.01] * 10:
+            histogram.observe(seconds)
+        assert histogram.percentile(0.5) <= 0.000001
+        assert 0.01 <= histogram.percentile(0.99) <= 0.02
+        assert histogram.to_dict()['count'] == 100
+
+    def test_metrics_dump_at_exit(self, tmp_path):
+        data = tmp_path / "students.json"
+        data.write_text('[{"student_id": "1", "name": "Ann", "age": 17, "class_name": "11B", '
+                        '"subjects": {"Math": 80}}]')
+        metrics = tmp_path / "metrics.json"
+        env = dict(os.environ, SMARTSTUDENT_METRICS=str(metrics), SMARTSTUDENT_PROFILE='cpu',
+                   SMARTSTUDENT_PROFILE_DIR=str(tmp_path))
+        subprocess.run([sys.executable, 'main.py', '--data', str(data), 'search', 'ann'],
+                       cwd=ROOT, env=env, check=True, capture_output=True)
+
+        dump = json.loads(metrics.read_text())
+        assert dump['timers']['batch.search']['count'] == 1
+        assert dump['counters']['fileio.load_from_json.records'] == 1
+        assert dump['counters']['fileio.load_from_json.bytes_read'] == data.stat().st_size
+        assert Path(dump['profile']['cpu_profile']).exists()
@@ -0,0 +1,131 @@
+import os
+import tempfile
+import threading
+import pytest
+from student import Student
+from journal import StudentJournal
+from grades_fileio import save_to_json, load_from_json
+
+class TestJournal:
+    @pytest.fixture
+    def snapshot(self):
+        s1 = Student("001", "John Doe", 18, "12A")
+        s1.add_subject("Math", 90)
+        s2 = Student("002", "Jane Smith", 17, "11B")
+        s2.add_subject("Math", 85)
+        with tempfile.TemporaryDirectory() as tmp:
+            filename = os.path.join(tmp, "students.json")
+            save_to_json([s1, s2], filename)
+            yield filename
+
+    def record_session(self, journal):
+        new = Student("003", "Alice Johnson", 19, "12A")
+        new.add_subject("History", 88)
+        journal.record_add(new)
+        journal.record_grade("001", "Science", 70)
+        journal.record_grade("001", "Math", None)
+        edited = Student("002", "Jane Doe", 18, "11B")
+        edited.subjects = {"Math": 85}
+        journal.record_edit("002", edited)
+        journal.record_delete("003")
+
+    def assert_session_applied(self, students):
+        assert [s.name for s in students] == ["John Doe", "Jane Doe"]
+        assert students[0].subjects == {"Science": 70}
+        assert students[1].age == 18
+
+    def test_recover_after_crash(self, snapshot):
+        journal = StudentJournal(snapshot, sync_every=2)
+        self.record_session(journal)
+        # No close(): a fresh journal must still see every entry
+        self.assert_session_applied(StudentJournal(snapshot).recover())
+        assert len(load_from_json(snapshot)) == 2
+
+    def test_torn_last_line_is_ignored(self, snapshot):
+        journal = StudentJournal(snapshot)
+        journal.record_grade("001", "Art", 60)
+        journal.close()
+        with open(journal.filename, 'a') as f:
+            f.write('{"op": "delete", "stud')
+        students = StudentJournal(snapshot).recover()
+        assert students[0].subjects == {"Math": 90, "Art": 60}
+
+    def test_entries_after_a_torn_line_are_kept(self, snapshot):
+        journal = StudentJournal(snapshot)
+        journal.record_grade("001", "Art", 60)
+        journal.close()
+        with open(journal.filename, 'a') as f:
+            f.write('{"op": "delete", "stud')
+
+        journal = StudentJournal(snapshot)
+        journal.record_add(Student("004", "Bob Stone", 20, "10C"))
+        journal.record_add(Student("005", "Eve Adams", 16, "10C"))
+        journal.close()
+        journal = StudentJournal(snapshot)
+        students = journal.recover()
+        assert [s.student_id for s in students] == ["001", "002", "004", "005"]
+        assert students[0].subjects == {"Math": 90, "Art": 60} and journal.skipped_entries == 0
+        journal.close()
+
+    def test_unreadable_line_is_skipped(self, snapshot):
+        journal = StudentJournal(snapshot)
+        journal.record_grade("001", "Art", 60)
+        journal.close()
+        with open(journal.filename, 'a') as f:
+            f.write('{"op": "delete", "stud{"op": "grade"}\n')
+        journal = StudentJournal(snapshot)
+        journal.record_grade("002", "Art", 55)
+        students = journal.recover()
+        assert journal.skipped_entries == 1
+        assert students[0].subjects == {"Math": 90, "Art": 60}
+        assert students[1].subjects == {"Math": 85, "Art": 55}
+        journal.close()
+
+    def test_background_compaction(self, snapshot):
+        journal = StudentJournal(snapshot, compact_after=3)
+        self.record_session(journal)
+        assert journal.needs_compaction()
+        journal.compact(journal.recover())
+        journal.record_grade("002", "Art", 55)
+        journal.wait()
+
+        self.assert_session_applied(load_from_json(snapshot))
+        with open(journal.filename) as f:
+            assert len(f.readlines()) == 1
+        assert StudentJournal(snapshot).recover()[1].subjects == {"Math": 85, "Art": 55}
+        journal.close()
+
+    def test_compaction_skipped_while_one_is_running(self, snapshot, monkeypatch):
+        journal = StudentJournal(snapshot, compact_after=3)
+        self.record_session(journal)
+        students = journal.recover()
+        release = threading.Event()
+        write_snapshot = journal._write_snapshot
+        monkeypatch.setattr(journal, '_write_snapshot',
+                            lambda records: release.wait() and write_snapshot(records))
+        assert journal.compact(students)
+        self.record_session(journal)
+        assert not journal.needs_compaction()
+        assert journal.compact(students) is False  # returns at once instead of waiting
+        assert journal.entries > 0
+        release.set()
+        journal.wait()
+        assert journal.needs_compaction()
+        self.assert_session_applied(StudentJournal(snapshot).recover())
+        journal.close()
+
+    def test_unfinished_compaction_segment(self, snapshot):
+        journal = StudentJournal(snapshot)
+        self.record_session(journal)
+        journal.close()
+        # Simulate a crash after rotating the log but before the snapshot was written
+        os.replace(journal.filename, journal.filename + ".compacting")
+        journal = StudentJournal(snapshot)
+        journal.record_grade("002", "Art", 55)
+        students = journal.recover()
+        self.assert_session_applied(students)
+
+        journal.compact(students, background=False)
+        assert not os.path.exists(journal.filename + ".compacting")
+        assert load_from_json(snapshot)[1].subjects == {"Math": 85, "Art": 55}
+        journal.close()
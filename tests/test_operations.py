@@ -1,5 +1,9 @@
+import pytest
 from student import Student
-from operations import search_student, sort_students, calculate_average_grade
+from operations import (search_student, sort_students, calculate_average_grade,
+                        calculate_grade_stats, calculate_average_grades,
+                        calculate_batch_grade_stats, calculate_subject_stats,
+                        calculate_class_stats)
 
 class TestOperations:
     @pytest.fixture
@@ -43,4 +47,38 @@ class TestOperations:
     def test_calculate_average(self, sample_students):
         assert calculate_average_grade(sample_students[0]) == 90.0
         assert calculate_average_grade(sample_students[1]) == 88.5
-        assert calculate_average_grade(sample_students[2]) == 88.0
\ No newline at end of file
+        assert calculate_average_grade(sample_students[2]) == 88.0
+
+    def test_batch_stats_match_single(self, sample_students):
+        sample_students.append(Student("004", "No Grades", 18, "11B"))
+        batch = calculate_batch_grade_stats(sample_students)
+        assert len(batch) == 4
+        for i, student in enumerate(sample_students):
+            assert batch[i] == calculate_grade_stats(student)
+        assert list(calculate_average_grades(sample_students)) == [90.0, 88.5, 88.0, 0.0]
+
+    def test_batch_stats_break_ties_like_single(self, sample_students):
+        # Store columns run Math, Science, History, Art, ...; each tie must still go to the first name
+        sample_students[0].add_subject("Science", 90)
+        sample_students[2].add_subject("Art", 88)
+        sample_students[2].add_subject("Biology", 70)
+        sample_students[2].add_subject("Geography", 70)
+        batch = calculate_batch_grade_stats(sample_students)
+        for i, student in enumerate(sample_students):
+            assert batch[i] == calculate_grade_stats(student)
+        assert batch[0].best_subject == ("Math", 90.0)
+        assert batch[2].best_subject == ("Art", 88.0)
+        assert batch[2].worst_subject == ("Biology", 70.0)
+
+    def test_subject_and_class_stats(self, sample_students):
+        subjects = calculate_subject_stats(sample_students)
+        assert subjects["Math"].count == 2
+        assert subjects["Math"].average == 87.5
+        assert subjects["Math"].highest == 90
+        assert subjects["History"].median == 88
+
+        classes = calculate_class_stats(sample_students)
+        assert classes["12A"].student_count == 2
+        assert classes["12A"].average == 89.0
+        assert classes["12A"].lowest_average == 88.0
+        assert classes["11B"].grade_count == 2
@@ -0,0 +1,74 @@
+import random
+import pytest
+from student import Student
+from ranking import StudentRanking
+from operations import sort_students, top_students, bottom_students, student_rank
+
+class TestRanking:
+    @pytest.fixture
+    def sample_students(self):
+        s1 = Student("001", "John Doe", 18, "12A")
+        s1.add_subject("Math", 90)
+
+        s2 = Student("002", "Jane Smith", 17, "11B")
+        s2.add_subject("Math", 85)
+        s2.add_subject("Science", 92)
+
+        s3 = Student("003", "Alice Johnson", 19, "12A")
+        s3.add_subject("History", 88)
+
+        s4 = Student("004", "Bob Stone", 20, "12A")
+        s4.add_subject("Math", 90)
+
+        return [s1, s2, s3, s4]
+
+    def test_sorted_views_match_sort(self, sample_students):
+        ranking = StudentRanking(sample_students)
+        for by in ('name', 'grade'):
+            for descending in (False, True):
+                assert ranking.sorted(by, descending) == sort_students(sample_students, by, descending)
+                assert sort_students([], by, descending, ranking=ranking) == ranking.sorted(by, descending)
+
+    def test_top_bottom_and_rank(self, sample_students):
+        ranking = StudentRanking(sample_students)
+        john, jane, alice, bob = sample_students
+        assert ranking.top_k(2) == top_students(sample_students, 2) == [john, bob]
+        assert ranking.bottom_k(1) == bottom_students(sample_students, 1) == [alice]
+        assert ranking.top_k(5, class_name="12A") == [john, bob, alice]
+        assert ranking.rank_of(jane) == student_rank(sample_students, jane) == 3
+        assert ranking.rank_of(bob) == ranking.rank_of(john) == 1
+        assert ranking.rank_of(alice, "12A") == student_rank(sample_students, alice, "12A") == 3
+        assert ranking.class_size("12A") == 3
+
+    def test_updates(self, sample_students):
+        ranking = StudentRanking(sample_students)
+        john, jane, alice, bob = sample_students
+        alice.add_subject("Math", 100)
+        alice.edit_info(class_name="11B")
+        ranking.update(alice)
+        assert ranking.top_k(1) == [alice]
+        assert ranking.rank_of(jane, "11B") == 2
+        assert ranking.top_k(5, class_name="12A") == [john, bob]
+
+        ranking.remove(john)
+        assert john not in ranking
+        assert ranking.sorted('name') == [alice, bob, jane]
+
+    def test_many_updates_stay_sorted(self):
+        rng = random.Random(7)
+        students = []
+        for i in range(3000):
+            s = Student(str(i), f"Student {rng.randrange(10000)}", 18, f"C{i % 7}")
+            s.add_subject("Math", rng.randrange(101))
+            students.append(s)
+        ranking = StudentRanking(students)
+        for s in rng.sample(students, 500):
+            s.add_subject("Math", rng.randrange(101))
+            ranking.update(s)
+        for s in rng.sample(students, 1000):
+            ranking.remove(s)
+            students.remove(s)
+        assert ranking.sorted('grade') == sort_students(students, 'grade')
+        assert ranking.sorted('name', True) == sort_students(students, 'name', True)
+        s = students[123]
+        assert ranking.rank_of(s, s.class_name) == student_rank(students, s, s.class_name)
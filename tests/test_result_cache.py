@@ -0,0 +1,137 @@
+import pytest
+from student import Student, MUTATIONS
+from student_store import StudentStore
+from result_cache import ResultCache
+from operations import calculate_grade_stats, sort_students, visualize_grades
+from cli_interface import StudentCLI
+
+
+@pytest.fixture
+def sample_students():
+    s1 = Student("001", "John Doe", 18, "12A")
+    s1.add_subject("Math", 90)
+    s1.add_subject("Science", 60)
+    s2 = Student("002", "Jane Smith", 17, "11B")
+    s2.add_subject("Math", 70)
+    return [s1, s2]
+
+
+class TestResultCache:
+    def test_hits_until_version_moves(self):
+        version = [0]
+        cache = ResultCache(version=lambda: version[0])
+        calls = []
+        compute = lambda: calls.append(1) or len(calls)
+        assert cache.get_or_compute('key', compute) == 1
+        assert cache.get_or_compute('key', compute) == 1
+        version[0] += 1
+        assert cache.get_or_compute('key', compute) == 2
+        stats = cache.stats()
+        assert (stats.hits, stats.misses, stats.entries) == (1, 2, 1)
+        assert stats.hit_rate == pytest.approx(1 / 3)
+
+    def test_lru_eviction_and_memory_cap(self):
+        cache = ResultCache(version=lambda: 0, max_entries=2)
+        cache.put('a', 1)
+        cache.put('b', 2)
+        assert cache.get('a') == 1  # 'b' is now least recently used
+        cache.put('c', 3)
+        assert cache.get('b') is None and cache.get('a') == 1 and cache.get('c') == 3
+        assert cache.evictions == 1
+
+        capped = ResultCache(version=lambda: 0, max_bytes=10_000)
+        capped.put('small', list(range(100)))
+        capped.put('large', list(range(10_000)))
+        assert capped.get('large') is None and capped.get('small') is not None
+        capped.put('medium', list(range(1000)))
+        assert capped.bytes <= 10_000 and len(capped) >= 1
+
+    def test_invalidate(self):
+        cache = ResultCache(version=lambda: 0)
+        cache.put('a', 1)
+        cache.put('b', [1, 2, 3])
+        cache.invalidate('a')
+        assert cache.get('a') is None and cache.get('b') == [1, 2, 3]
+        cache.invalidate()
+        assert len(cache) == 0 and cache.bytes == 0
+
+    def test_student_mutations_move_default_version(self, sample_students):
+        cache = ResultCache()
+        first = calculate_grade_stats(sample_students[0], cache=cache)
+        assert calculate_grade_stats(sample_students[0], cache=cache) is first
+        before = MUTATIONS.value
+        sample_students[0].add_subject("Art", 100)
+        assert MUTATIONS.value > before
+        assert calculate_grade_stats(sample_students[0], cache=cache).best_subject == ("Art", 100)
+        sample_students[0].remove_subject("Art")
+        sample_students[0].edit_info(name="Johnny Doe")
+        assert calculate_grade_stats(sample_students[0], cache=cache).best_subject == ("Math", 90)
+
+    def test_sort_and_chart_memoized(self, sample_students, tmp_path, monkeypatch):
+        cache = ResultCache()
+        ordered = sort_students(sample_students, by='grade', descending=True, cache=cache)
+        assert sort_students(sample_students, by='grade', descending=True, cache=cache) is ordered
+        assert sort_students(sample_students, by='name', cache=cache) is not ordered
+
+        import grade_charts
+        renders = []
+        real = grade_charts.render_grade_charts
+        monkeypatch.setattr(grade_charts, 'render_grade_charts',
+                            lambda *args, **kwargs: renders.append(1) or real(*args, **kwargs))
+        output = str(tmp_path / "chart.png")
+        path = visualize_grades(sample_students, output_path=output, cache=cache)
+        assert visualize_grades(sample_students, output_path=output, cache=cache) == path
+        assert len(renders) == 1
+        sample_students[1].add_subject("Art", 40)
+        visualize_grades(sample_students, output_path=output, cache=cache)
+        assert len(renders) == 2
+
+    def test_results_are_kept_per_roster_and_student(self, sample_students):
+        cache = ResultCache()
+        other = [Student("003", "Alice Johnson", 19, "12A")]
+        assert sort_students(sample_students, by='name', cache=cache) == [sample_students[1], sample_students[0]]
+        assert sort_students(other, by='name', cache=cache) == other
+
+        duplicate = Student("001", "John Duplicate", 18, "12A")
+        duplicate.add_subject("Art", 50)
+        assert calculate_grade_stats(sample_students[0], cache=cache).best_subject == ("Math", 90)
+        assert calculate_grade_stats(duplicate, cache=cache).best_subject == ("Art", 50)
+
+        store = StudentStore.from_students(sample_students)
+        first = calculate_grade_stats(store[0], cache=cache)
+        assert calculate_grade_stats(store[0], cache=cache) is first  # a fresh view of the same row
+        assert calculate_grade_stats(store[1], cache=cache) is not first
+
+    def test_chart_redrawn_after_another_render_to_same_path(self, sample_students, tmp_path, monkeypatch):
+        import grade_charts
+        rendered = []
+        real = grade_charts.render_grade_charts
+        monkeypatch.setattr(grade_charts, 'render_grade_charts',
+                            lambda summary, *args, **kwargs: rendered.append(summary) or real(summary, *args, **kwargs))
+        cache = ResultCache()
+        output = str(tmp_path / "chart.png")
+        for by in (None, 'class', None):
+            visualize_grades(sample_students, by=by, output_path=output, cache=cache)
+        assert [list(summary) for summary in rendered] == [["All grades"], ["12A", "11B"], ["All grades"]]
+        visualize_grades(sample_students, output_path=output, cache=cache)
+        assert len(rendered) == 3
+
+
+class TestCLICache:
+    def test_menu_changes_invalidate(self, sample_students, monkeypatch):
+        cli = StudentCLI()
+        cli.students = StudentStore.from_students(sample_students)
+        version = cli.version
+        ordered = sort_students(cli.students, by='grade', ranking=cli.ranking, cache=cli.cache)
+        assert sort_students(cli.students, by='grade', ranking=cli.ranking, cache=cli.cache) is ordered
+
+        inputs = ["#001", "", "", "", "1", "History", "10", "3"]
+        monkeypatch.setattr('builtins.input', lambda _: inputs.pop(0))
+        cli.edit_student()
+        assert cli.version != version
+        resorted = sort_students(cli.students, by='grade', ranking=cli.ranking, cache=cli.cache)
+        assert resorted is not ordered
+        assert [s.student_id for s in resorted] == ["001", "002"]
+
+        cli.students[1].age = 18  # store views bump the store's version too
+        assert sort_students(cli.students, by='grade', ranking=cli.ranking, cache=cli.cache) is not resorted
@@ -0,0 +1,69 @@
+import pytest
+from student import Student
+from sqlite_store import SQLiteStudentStore
+from grades_fileio import save_to_sqlite, load_from_sqlite
+from operations import (search_student, sort_students, calculate_average_grades,
+                        calculate_class_stats, calculate_subject_stats)
+
+class TestSQLiteStore:
+    @pytest.fixture
+    def sample_students(self):
+        s1 = Student("001", "John Doe", 18, "12A")
+        s1.add_subject("Math", 90)
+
+        s2 = Student("002", "Jane Smith", 17, "11B")
+        s2.add_subject("Math", 85)
+        s2.add_subject("Science", 92)
+
+        s3 = Student("003", "Alice Johnson", 19, "12A")
+        s3.add_subject("History", 88)
+
+        return [s1, s2, s3]
+
+    @pytest.fixture
+    def store(self, sample_students, tmp_path):
+        store = SQLiteStudentStore(str(tmp_path / "students.db"))
+        store.extend(sample_students)
+        yield store
+        store.close()
+
+    def test_roundtrip(self, sample_students, tmp_path):
+        filename = str(tmp_path / "roster.db")
+        save_to_sqlite(sample_students, filename)
+        save_to_sqlite(sample_students, filename)  # saving again replaces the contents
+        loaded = load_from_sqlite(filename)
+        assert [s.to_dict() for s in loaded] == [s.to_dict() for s in sample_students]
+        assert load_from_sqlite(str(tmp_path / "missing.db")) == []
+
+    def test_pushed_down_queries(self, store, sample_students):
+        assert len(store) == 3
+        assert [s.name for s in search_student(store, "JOHN")] == ["John Doe", "Alice Johnson"]
+        assert [s.name for s in search_student(store, "02", by_id=True)] == ["Jane Smith"]
+        assert [s.name for s in sort_students(store, by='name')] == \
+            [s.name for s in sort_students(sample_students, by='name')]
+        assert [s.name for s in sort_students(store, by='grade', descending=True)] == \
+            ["John Doe", "Jane Smith", "Alice Johnson"]
+        assert [s.name for s in store.sort('grade', limit=1, offset=1)] == ["Jane Smith"]
+        assert list(calculate_average_grades(store)) == [90.0, 88.5, 88.0]
+        assert calculate_class_stats(store) == calculate_class_stats(sample_students)
+        assert calculate_subject_stats(store) == calculate_subject_stats(sample_students)
+
+    def test_writes_keep_averages_current(self, store):
+        store.set_grade("003", "Math", 70)
+        assert store.average_grade("003") == 79.0
+        store.set_grade("003", "Math", 80)
+        store.remove_grade("003", "History")
+        assert store.average_grade("003") == 80.0
+        with pytest.raises(ValueError):
+            store.set_grade("003", "Math", 101)
+
+        edited = store.get("002")
+        edited.edit_info(name="Jane Doe")
+        edited.subjects = {"Art": 60}
+        store.update("002", edited)
+        assert store.get("002").subjects == {"Art": 60}
+        assert store.average_grade("002") == 60.0
+
+        store.delete("001")
+        assert store.get("001") is None
+        assert [s.name for s in store] == ["Jane Doe", "Alice Johnson"]
@@ -0,0 +1,112 @@
+import json
+import subprocess
+import sys
+import time
+from pathlib import Path
+import pytest
+
+ROOT = Path(__file__).resolve().parent.parent
+
+# Seconds each entry module may take to import in a fresh interpreter beyond
+# BASELINE, the libraries it leans on anyway; comparing against a baseline
+# timed alongside it keeps a slow or busy machine from failing the budget
+BASELINE = "argparse, csv, json, sqlite3, concurrent.futures, dataclasses, colorama"
+IMPORT_BUDGET = 0.1
+# Seconds for the interactive CLI to open a SNAPSHOT_ROWS-row snapshot; a
+# roster-wide index or ranking built at startup takes well over a second
+SNAPSHOT_ROWS = 20000
+SNAPSHOT_OPEN_BUDGET = 0.25
+# Peak memory the CLI may add loading a JSON roster, in multiples of the
+# StudentStore it ends up holding (plus a fixed allowance)
+LOAD_MEMORY_FACTOR = 2
+LOAD_MEMORY_ALLOWANCE = 4 * 1024 * 1024
+
+_RSS_PROBE = """
+import json, resource, sys
+import numpy
+from autosave import AutoSaver
+from cli_interface import StudentCLI
+before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+autosave = AutoSaver({filename!r}, interval=3600)
+cli = StudentCLI(autosave=autosave)
+grown = (resource.getrusage(resource.RUSAGE_SELF).ru_maxrss - before) * 1024
+autosave.close()
+print(json.dumps({{'grown': grown, 'store': cli.students.nbytes, 'students': len(cli.students)}}))
+"""
+
+_PROBE = """
+import json, sys, time
+start = time.perf_counter()
+import {module}
+elapsed = time.perf_counter() - start
+print(json.dumps({{'elapsed': elapsed, 'modules': sorted(sys.modules)}}))
+"""
+
+
+def _probe(module: str) -> dict:
+    output = subprocess.run([sys.executable, '-c', _PROBE.format(module=module)],
+                            cwd=ROOT, capture_output=True, text=True, check=True).stdout
+    return json.loads(output)
+
+
+def _import_cost(module: str, runs: int = 5) -> float:
+    """Best-of-runs import time of module, less the baseline's best over the same runs"""
+    times, baselines = [], []
+    for _ in range(runs):
+        times.append(_probe(module)['elapsed'])
+        baselines.append(_probe(BASELINE)['elapsed'])
+    return min(times) - min(baselines)
+
+
+class TestStartup:
+    @pytest.mark.parametrize("module", ["cli_interface", "batch_cli", "operations"])
+    def test_plotting_libraries_not_imported(self, module):
+        modules = _probe(module)['modules']
+        assert 'matplotlib' not in modules
+        assert 'seaborn' not in modules
+
+    @pytest.mark.parametrize("module", ["cli_interface", "batch_cli"])
+    def test_numpy_not_imported(self, module):
+        assert 'numpy' not in _probe(module)['modules']
+
+    @pytest.mark.parametrize("module", ["cli_interface", "batch_cli"])
+    def test_import_budget(self, module):
+        assert _import_cost(module) < IMPORT_BUDGET
+
+    def test_cli_opens_snapshot_without_building_indexes(self, tmp_path):
+        from student import Student
+        from student_store import StudentStore
+        from autosave import AutoSaver
+        from cli_interface import StudentCLI
+        students = [Student(f"{i:05d}", f"Student {i}", 15 + i % 4, "10A") for i in range(SNAPSHOT_ROWS)]
+        filename = str(tmp_path / "students.snap")
+        StudentStore.from_students(students).save_snapshot(filename)
+
+        autosave = AutoSaver(filename, interval=3600)
+        start = time.perf_counter()
+        cli = StudentCLI(autosave=autosave)
+        elapsed = time.perf_counter() - start
+        autosave.close()
+        assert len(cli.students) == SNAPSHOT_ROWS
+        assert cli._index is None and cli._ranking is None
+        assert elapsed < SNAPSHOT_OPEN_BUDGET
+
+    def test_cli_load_memory(self, tmp_path):
+        pytest.importorskip('resource')
+        if sys.platform == 'darwin':
+            pytest.skip("ru_maxrss is in bytes on macOS")
+        from student import Student
+        from grades_fileio import save_to_json
+        filename = str(tmp_path / "students.json")
+        students = []
+        for i in range(SNAPSHOT_ROWS * 2):
+            student = Student(f"{i:05d}", f"Student Number {i}", 15 + i % 4, f"1{i % 3}A")
+            student.subjects = {"Math": 50 + i % 50, "Science": 40 + i % 60, "History": 30 + i % 70}
+            students.append(student)
+        save_to_json(students, filename)
+
+        output = subprocess.run([sys.executable, '-c', _RSS_PROBE.format(filename=filename)],
+                                cwd=ROOT, capture_output=True, text=True, check=True).stdout
+        result = json.loads(output.splitlines()[-1])
+        assert result['students'] == len(students)
+        assert result['grown'] < LOAD_MEMORY_FACTOR * result['store'] + LOAD_MEMORY_ALLOWANCE
@@ -1,3 +1,4 @@
+import pickle
 import pytest
 from student import Student
 
@@ -35,4 +36,57 @@ class TestStudent:
         data = s.to_dict()
         new_s = Student.from_dict(data)
         assert new_s.name == s.name
-        assert new_s.subjects == s.subjects
\ No newline at end of file
+        assert new_s.subjects == s.subjects
+    
+    def test_cached_average_and_median(self):
+        s = Student("001", "John Doe", 18, "12A")
+        assert s.average_grade == 0.0
+        assert s.median_grade == 0.0
+        s.add_subject("Math", 90)
+        s.add_subject("Science", 70)
+        assert s.median_grade == 80
+        s.add_subject("History", 50)
+        assert s.average_grade == 70
+        assert s.median_grade == 70
+
+        s.add_subject("Math", 60)  # replacing a grade
+        assert s.average_grade == 60
+        assert s.median_grade == 60
+        s.remove_subject("History")
+        assert s.average_grade == 65
+        assert s.median_grade == 65
+        with pytest.raises(KeyError):
+            s.remove_subject("History")
+
+        s.subjects.update({"Art": 0.1, "Music": 0.2})
+        assert s.average_grade == sum(s.subjects.values()) / len(s.subjects)
+        s.subjects.pop("Art")
+        s.subjects.clear()
+        assert s.average_grade == 0.0
+        assert s.median_grade == 0.0
+    
+    def test_subjects_assignment_and_pickle(self):
+        s = Student.from_dict({"student_id": "001", "name": "John Doe", "age": 18,
+                               "class_name": "12A", "subjects": {"Math": 90, "Art": 80}})
+        assert s.average_grade == 85
+        copy = pickle.loads(pickle.dumps(s))
+        assert copy.subjects == {"Math": 90, "Art": 80}
+        copy.add_subject("Science", 100)
+        assert copy.average_grade == 90
+    
+    def test_compact_representation(self):
+        records = [{"student_id": str(i), "name": "N", "age": 18, "class_name": "12A",
+                    "subjects": {"".join(["Ma", "ths"]): 80, "Art": 70.5}} for i in range(2)]
+        a, b = (Student.from_dict(record) for record in records)
+        assert not hasattr(a, '__dict__')
+        # Subject names come from the shared vocabulary, not each record
+        assert next(iter(a.subjects)) is next(iter(b.subjects))
+        assert a.to_dict()['subjects'] == {"Maths": 80, "Art": 70.5}
+        assert type(a.to_dict()['subjects']) is dict
+        
+        a.subjects["Maths"] = 85
+        assert list(a.subjects.items()) == [("Maths", 85), ("Art", 70.5)]
+        assert b.subjects["Maths"] == 80
+        assert "History" not in a.subjects
+        with pytest.raises(KeyError):
+            a.subjects["History"]
@@ -0,0 +1,78 @@
+import pytest
+from student import Student
+from student_index import StudentIndex
+from student_store import StudentStore
+from operations import search_student
+
+class TestStudentIndex:
+    @pytest.fixture
+    def sample_students(self):
+        return [
+            Student("001", "John Doe", 18, "12A"),
+            Student("002", "Jane Smith", 17, "11B"),
+            Student("003", "Alice Johnson", 19, "12A"),
+        ]
+
+    def test_matches_linear_search(self, sample_students):
+        index = StudentIndex(sample_students)
+        for query in ["john", "JOHN", "j", "", "smith", "e s", "xyz", "ohnso"]:
+            assert index.search(query) == search_student(sample_students, query)
+        for query in ["002", "00", "3", "004"]:
+            assert index.search(query, by_id=True) == search_student(sample_students, query, by_id=True)
+        assert search_student([], "john", index=index) == index.search("john")
+
+    def test_get_by_id(self, sample_students):
+        index = StudentIndex(sample_students)
+        assert index.get("002") is sample_students[1]
+        assert index.get("02") is None
+
+    def test_add_update_remove(self, sample_students):
+        index = StudentIndex(sample_students)
+        new = Student("004", "Bob Johns", 20, "10C")
+        index.add(new)
+        assert index.search("johns") == [sample_students[2], new]
+
+        sample_students[0].edit_info(name="Johnny Walker")
+        sample_students[0].student_id = "101"
+        index.update(sample_students[0])
+        assert index.get("001") is None
+        assert index.get("101") is sample_students[0]
+        assert index.search("walker") == [sample_students[0]]
+
+        index.remove(sample_students[2])
+        assert index.search("johns") == [new]
+        assert sample_students[2] not in index
+        assert len(index) == 3
+
+    def test_store_views(self, sample_students):
+        store = StudentStore.from_students(sample_students)
+        index = StudentIndex(store)
+        found = index.get("003")
+        assert found == store[2]
+        index.remove(store[2])
+        assert index.search("alice") == []
+
+    def test_fuzzy_search_ranks_typos(self, sample_students):
+        sample_students += [Student("004", "Gavin Beterest", 16, "10C"),
+                            Student("005", "Kevin Peterson", 17, "11B")]
+        index = StudentIndex(sample_students)
+        assert index.search("Gavn Beterest") == []
+        ranked = index.fuzzy_search("Gavn Beterest")
+        assert ranked[0][0] is sample_students[3]
+        assert [score for _, score in ranked] == sorted((score for _, score in ranked), reverse=True)
+        assert index.fuzzy_search("Jon Smyth")[0][0] is sample_students[1]
+        assert index.fuzzy_search("Jane Smith") == [(sample_students[1], 1.0)]
+        assert index.fuzzy_search("Zzzz Qqqq") == []
+        assert len(index.fuzzy_search("john", limit=1)) == 1
+
+    def test_fuzzy_index_maintained(self, sample_students):
+        index = StudentIndex(sample_students)
+        assert index.fuzzy_search("Alise")[0][0] is sample_students[2]
+        new = Student("004", "Alyse Walker", 20, "10C")
+        index.add(new)
+        assert new in [student for student, _ in index.fuzzy_search("Alise Walker")][:1]
+        index.remove(new)
+        sample_students[2].edit_info(name="Mary Brown")
+        index.update(sample_students[2])
+        assert index.fuzzy_search("Alise") == []
+        assert index.fuzzy_search("Marry Brwn")[0][0] is sample_students[2]
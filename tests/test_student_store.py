@@ -0,0 +1,142 @@
+import math
+import os
+import tempfile
+import pytest
+from student import Student
+from student_store import StudentStore
+from operations import search_student, sort_students, calculate_average_grade
+from grades_fileio import save_to_snapshot, load_from_snapshot
+
+class TestStudentStore:
+    @pytest.fixture
+    def store(self):
+        s1 = Student("001", "John Doe", 18, "12A")
+        s1.add_subject("Math", 90)
+
+        s2 = Student("002", "Jane Smith", 17, "11B")
+        s2.add_subject("Math", 85)
+        s2.add_subject("Science", 92)
+
+        s3 = Student("003", "Alice Johnson", 19, "12A")
+        s3.add_subject("History", 88)
+
+        return StudentStore.from_students([s1, s2, s3])
+
+    def test_columns(self, store):
+        assert len(store) == 3
+        assert store.subjects == ["Math", "Science", "History"]
+        assert store.classes == ["12A", "11B"]
+        assert list(store.class_codes) == [0, 1, 0]
+        assert list(store.ages) == [18, 17, 19]
+        matrix = store.grade_matrix
+        assert matrix.shape == (3, 3)
+        assert matrix[1, 1] == 92
+        assert math.isnan(matrix[0, 1])
+
+    def test_views_behave_like_students(self, store):
+        s = store[1]
+        assert isinstance(s, Student)
+        assert s.name == "Jane Smith"
+        assert s.subjects == {"Math": 85, "Science": 92}
+        assert "History" not in s.subjects
+        assert s.to_dict()["subjects"] == {"Math": 85, "Science": 92}
+
+        s.add_subject("History", 70)
+        s.edit_info(name="Jane Doe", class_name="12A")
+        del s.subjects["Math"]
+        assert store[1].name == "Jane Doe"
+        assert store[1].class_name == "12A"
+        assert store[1].subjects == {"Science": 92, "History": 70}
+        with pytest.raises(ValueError):
+            s.add_subject("Math", 150)
+
+    def test_append_and_pop(self, store):
+        view = store[2]
+        new = Student("004", "Bob Stone", 20, "10C")
+        new.add_subject("Art", 60)
+        store.append(new)
+
+        removed = store.pop(0)
+        assert removed.name == "John Doe"
+        assert removed.subjects == {"Math": 90}
+        assert len(store) == 3
+        # Views keep pointing at the same student after earlier rows shift
+        assert view.name == "Alice Johnson"
+        assert store.index(view) == 1
+        assert store[-1].subjects == {"Art": 60}
+
+        store.remove(view)
+        assert [s.name for s in store] == ["Jane Smith", "Bob Stone"]
+        with pytest.raises(KeyError):
+            view.name
+
+    def test_operations_accept_store(self, store):
+        assert [s.name for s in search_student(store, "john")] == ["John Doe", "Alice Johnson"]
+        assert sort_students(store, by='name')[0].name == "Alice Johnson"
+        assert calculate_average_grade(store[1]) == 88.5
+
+    def test_roundtrip_and_memory(self, store):
+        students = store.to_students()
+        assert [s.to_dict() for s in students] == [s.to_dict() for s in store]
+
+        big = StudentStore.from_students(
+            Student(str(i), f"Student {i}", 18, "12A") for i in range(1000))
+        assert len(big) == 1000
+        assert big.nbytes < 100 * 1000
+
+    def test_copy_is_independent(self, store):
+        del store[0]
+        copy = store.copy()
+        assert [s.to_dict() for s in copy] == [s.to_dict() for s in store]
+
+        copy[0].name = "Jane Doe"
+        copy[0].add_subject("Art", 75)
+        copy.append(Student("004", "Bob Stone", 20, "10C"))
+        assert [s.name for s in store] == ["Jane Smith", "Alice Johnson"]
+        assert "Art" not in store[0].subjects
+
+    def test_rewritten_strings_are_compacted(self, store):
+        for i in range(5000):
+            store[1].name = f"Jane Smith the {i}th, renamed"
+            store.append(Student(f"{i:05d}", f"Temporary student number {i}", 18, "12A"))
+            del store[-1]
+        assert len(store._names.data) < 4 * 64 * 1024
+        assert [s.name for s in store] == ["John Doe", "Jane Smith the 4999th, renamed", "Alice Johnson"]
+        assert [s.student_id for s in store] == ["001", "002", "003"]
+        store.append(Student("004", "Bob Stone", 20, "10C"))
+        assert store[3].name == "Bob Stone" and store[1].student_id == "002"
+
+    def test_empty_snapshot_roundtrip(self, tmp_path):
+        filename = str(tmp_path / "empty.snap")
+        save_to_snapshot([], filename)
+        opened = load_from_snapshot(filename)
+        assert len(opened) == 0
+        opened.append(Student("001", "John Doe", 18, "12A"))
+        opened[0].add_subject("Math", 90)
+        copied = opened.copy()
+        copied.append(Student("002", "Jane Smith", 17, "11B"))
+        assert [s.student_id for s in copied] == ["001", "002"]
+        assert copied[0].subjects["Math"] == 90
+        assert [s.to_dict() for s in StudentStore().copy()] == []
+
+    def test_snapshot_roundtrip(self, store):
+        store[0].name = "Johnny Doe"  # leaves a dead string in the name buffer
+        with tempfile.TemporaryDirectory() as tmp:
+            filename = os.path.join(tmp, "roster.snap")
+            store.save_snapshot(filename)
+            opened = StudentStore.open_snapshot(filename)
+            assert [s.to_dict() for s in opened] == [s.to_dict() for s in store]
+            assert opened.subjects == store.subjects
+
+            # Edits stay in memory and never reach the mapped file
+            opened[1].name = "Jane Doe"
+            opened[1].add_subject("Art", 75)
+            opened.append(Student("004", "Bob Stone", 20, "10C"))
+            del opened[0]
+            assert [s.name for s in opened] == ["Jane Doe", "Alice Johnson", "Bob Stone"]
+            assert StudentStore.open_snapshot(filename)[1].name == "Jane Smith"
+
+            # Saving over a file that is still mapped is safe
+            opened.save_snapshot(filename)
+            assert opened[0].subjects["Art"] == 75
+            assert len(StudentStore.open_snapshot(filename)) == 3
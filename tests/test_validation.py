@@ -0,0 +1,118 @@
+import json
+import pytest
+from student import Student
+from grades_fileio import save_to_csv, load_from_csv, iter_from_csv, load_from_jsonl
+from validation import CSVDecoder, RecordDecoder, InvalidRecordsError, decode_file
+
+HEADER = ['student_id', 'name', 'age', 'class_name', 'Math', 'Art']
+
+
+@pytest.fixture
+def bad_csv(tmp_path):
+    path = tmp_path / "roster.csv"
+    path.write_text('\n'.join([
+        ','.join(HEADER),
+        '001,John Doe,18,12A,90,',
+        '002,Jane Smith,x,12A,70,101',
+        ',Nobody,17,12A,,',
+        '004,Bob Lee,16,10C,abc,nan',
+    ]) + '\n')
+    return str(path)
+
+
+class TestCSVDecoder:
+    def test_valid_rows(self):
+        result = CSVDecoder(HEADER).decode([['001', 'John', '18', '12A', '90', ''],
+                                            ['002', 'Jane', '17', '12B', '', '75.5']])
+        assert result.records == 2 and not result.errors
+        assert [s.to_dict() for s in result.students] == [
+            {'student_id': '001', 'name': 'John', 'age': 18, 'class_name': '12A', 'subjects': {'Math': 90.0}},
+            {'student_id': '002', 'name': 'Jane', 'age': 17, 'class_name': '12B', 'subjects': {'Art': 75.5}},
+        ]
+
+    def test_all_errors_collected_with_row_numbers(self, bad_csv):
+        result = decode_file(bad_csv)
+        assert [s.student_id for s in result.students] == ['001']
+        assert [str(error) for error in result.errors] == [
+            "line 3: invalid age 'x'",
+            "line 3: Art: grade 101.0 is not between 0 and 100",
+            "line 4: student_id is empty",
+            "line 5: Math: invalid grade 'abc'",
+            "line 5: Art: invalid grade nan",
+        ]
+
+    def test_missing_columns(self):
+        with pytest.raises(ValueError, match="class_name"):
+            CSVDecoder(['student_id', 'name', 'age'])
+
+    def test_load_from_csv_reports_every_row(self, bad_csv):
+        with pytest.raises(InvalidRecordsError) as info:
+            load_from_csv(bad_csv)
+        assert len(info.value.errors) == 5
+        assert "line 4" in str(info.value)
+        with pytest.raises(InvalidRecordsError):
+            list(iter_from_csv(bad_csv))
+
+    def test_blank_lines_are_skipped(self, tmp_path):
+        path = tmp_path / "blank.csv"
+        path.write_text("student_id,name,age,class_name,Math\n\n001,John Doe,18,12A,90\n ,\n\n")
+        assert [s.student_id for s in load_from_csv(str(path))] == ["001"]
+        assert [s.student_id for s in iter_from_csv(str(path))] == ["001"]
+
+    def test_errors_report_file_lines_past_blank_lines(self, tmp_path):
+        path = tmp_path / "blank.csv"
+        path.write_text(','.join(HEADER) + '\n\n001,John Doe,18,12A,90,\n\n\n002,Jane,x,12A,,\n'
+                        '003,"Bob\nLee",y,12A,,\n')
+        assert [(error.record, error.line) for error in decode_file(str(path)).errors] == [(2, 6), (3, 7)]
+
+        path = tmp_path / "blank.jsonl"
+        path.write_text('\n{"student_id": "1", "name": "A", "age": 1, "class_name": "1A"}\n\n'
+                        '{"student_id": "2", "name": "B", "age": "x", "class_name": "1A"}\n')
+        with pytest.raises(InvalidRecordsError, match="line 4: invalid age 'x'"):
+            load_from_jsonl(str(path))
+        assert [str(error) for error in decode_file(str(path)).errors] == ["line 4: invalid age 'x'"]
+
+    def test_round_trip_matches_add_subject(self, tmp_path):
+        student = Student("001", "John Doe", 18, "12A")
+        student.add_subject("Math", 90)
+        student.add_subject("Science", 72.5)
+        path = str(tmp_path / "roster.csv")
+        save_to_csv([student], path)
+        loaded = load_from_csv(path)[0]
+        assert loaded.to_dict() == student.to_dict()
+        assert loaded.average_grade == student.average_grade
+
+
+class TestRecordDecoder:
+    def test_rejects_wrong_types(self):
+        result = RecordDecoder().decode([
+            {'student_id': '001', 'name': 'John', 'age': 18, 'class_name': '12A', 'subjects': {'Math': 90}},
+            {'student_id': '002', 'name': 'Jane', 'age': True, 'class_name': '12A', 'subjects': {'Math': '90'}},
+            {'student_id': '003', 'name': 'Bob', 'age': 16},
+            ['not', 'a', 'record'],
+        ])
+        assert [s.student_id for s in result.students] == ['001']
+        assert [str(error) for error in result.errors] == [
+            "record 2: invalid age True",
+            "record 2: Math: invalid grade '90'",
+            "record 3: missing field 'class_name'",
+            "record 4: record is not an object",
+        ]
+
+    def test_load_from_jsonl_reports_every_record(self, tmp_path):
+        path = tmp_path / "roster.jsonl"
+        path.write_text('\n'.join(json.dumps(record) for record in [
+            {'student_id': '001', 'name': 'John', 'age': 18, 'class_name': '12A', 'subjects': {'Math': -1}},
+            {'student_id': '002', 'name': 'Jane', 'age': 17, 'class_name': '12A'},
+            {'student_id': '003', 'name': 'Bob', 'age': '16', 'class_name': '12A'},
+        ]) + '\n')
+        with pytest.raises(InvalidRecordsError) as info:
+            load_from_jsonl(str(path))
+        assert [error.record for error in info.value.errors] == [1, 3]
+
+    def test_from_dict_validates(self):
+        with pytest.raises(ValueError):
+            Student.from_dict({'student_id': '001', 'name': 'John', 'age': '18', 'class_name': '12A'})
+        with pytest.raises(ValueError):
+            Student.from_dict({'student_id': '001', 'name': 'John', 'age': 18, 'class_name': '12A',
+                               'subjects': {'Math': 150}})
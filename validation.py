@@ -0,0 +1,246 @@
+import csv
+import math
+from dataclasses import dataclass, field
+from itertools import islice
+from pathlib import Path
+from typing import Iterable, Iterator, List, Optional, Sequence, Tuple
+from student import Student, GradeBook, SUBJECTS
+
+_CSV_FIELDS = ('student_id', 'name', 'age', 'class_name')
+BATCH_SIZE = 4096
+_NUMBER_TYPES = (int, float)
+
+
+@dataclass
+class RecordError:
+    record: int  # 1-based position of the record in its source
+    message: str
+    line: Optional[int] = None  # physical line it starts on, for line-based files
+
+    def __str__(self):
+        if self.line is not None:
+            return f"line {self.line}: {self.message}"
+        return f"record {self.record}: {self.message}"
+
+
+@dataclass
+class DecodeResult:
+    students: List[Student] = field(default_factory=list)
+    errors: List[RecordError] = field(default_factory=list)
+    records: int = 0
+
+    def extend(self, other: 'DecodeResult'):
+        self.students.extend(other.students)
+        self.errors.extend(other.errors)
+        self.records += other.records
+
+
+class InvalidRecordsError(ValueError):
+    """Raised by strict loaders; carries every RecordError found"""
+
+    def __init__(self, source: str, errors: List[RecordError]):
+        self.source = source
+        self.errors = errors
+        shown = '; '.join(str(error) for error in errors[:5])
+        more = f" (and {len(errors) - 5} more)" if len(errors) > 5 else ""
+        super().__init__(f"{len(errors)} invalid records in {source}: {shown}{more}")
+
+
+def _grade_error(subject: str, grade) -> Optional[str]:
+    if isinstance(grade, bool) or not isinstance(grade, (int, float)) or math.isnan(grade):
+        return f"{subject}: invalid grade {grade!r}"
+    if not 0 <= grade <= 100:
+        return f"{subject}: grade {grade!r} is not between 0 and 100"
+    return None
+
+
+class CSVDecoder:
+    """
+    Decoder compiled for one CSV header: column positions and subject ids
+    are resolved once, then rows are converted in batches. The fast path
+    assumes a row is valid and checks its grades together; only rows that
+    fail are diagnosed field by field.
+    """
+
+    def __init__(self, header: Sequence[str]):
+        missing = [name for name in _CSV_FIELDS if name not in header]
+        if missing:
+            raise ValueError(f"CSV header is missing columns: {', '.join(missing)}")
+        self.width = len(header)
+        self.id_col, self.name_col, self.age_col, self.class_col = (header.index(name) for name in _CSV_FIELDS)
+        self.subject_cols = [(col, name) for col, name in enumerate(header) if name not in _CSV_FIELDS]
+        self.subject_ids = [(col, SUBJECTS.id_of(name)) for col, name in self.subject_cols]
+
+    def decode(self, rows: Iterable[List[str]], first_record: int = 1,
+               lines: Optional[Sequence[int]] = None) -> DecodeResult:
+        """Decode rows numbered from first_record; lines, when given, are their file lines"""
+        result = DecodeResult()
+        id_col, name_col, age_col, class_col = self.id_col, self.name_col, self.age_col, self.class_col
+        subject_ids, width = self.subject_ids, self.width
+        students, build, from_ids = result.students, Student.from_parts, GradeBook.from_ids
+        number = first_record - 1
+        for number, row in enumerate(rows, first_record):
+            try:
+                if len(row) < width:
+                    row = row + [''] * (width - len(row))
+                ids = [subject_id for col, subject_id in subject_ids if row[col]]
+                grades = [float(row[col]) for col, _ in subject_ids if row[col]]
+                if not row[id_col].strip() or not all(0 <= grade <= 100 for grade in grades):
+                    raise ValueError  # NaN fails the comparison too
+                students.append(build(row[id_col], row[name_col], int(row[age_col]), row[class_col],
+                                      from_ids(ids, grades)))
+            except ValueError:
+                line = lines[number - first_record] if lines is not None else None
+                result.errors.extend(RecordError(number, message, line) for message in self._diagnose(row))
+        result.records = number - first_record + 1
+        return result
+
+    def _diagnose(self, row: List[str]) -> List[str]:
+        messages = []
+        if not row[self.id_col].strip():
+            messages.append("student_id is empty")
+        try:
+            int(row[self.age_col])
+        except ValueError:
+            messages.append(f"invalid age {row[self.age_col]!r}")
+        for col, subject in self.subject_cols:
+            if row[col]:
+                try:
+                    grade = float(row[col])
+                except ValueError:
+                    messages.append(f"{subject}: invalid grade {row[col]!r}")
+                    continue
+                message = _grade_error(subject, grade)
+                if message:
+                    messages.append(message)
+        return messages or ["invalid record"]
+
+
+class RecordDecoder:
+    """
+    Decoder for student records shaped like Student.to_dict, as parsed from
+    JSON or JSON Lines. Valid records take one type check per field and one
+    range check over all their grades.
+    """
+
+    def decode(self, records: Iterable[dict], first_record: int = 1,
+               lines: Optional[Sequence[int]] = None) -> DecodeResult:
+        """Decode records numbered from first_record; lines, when given, are their file lines"""
+        result = DecodeResult()
+        students, build, from_ids, id_of = result.students, Student.from_parts, GradeBook.from_ids, SUBJECTS.id_of
+        number = first_record - 1
+        for number, record in enumerate(records, first_record):
+            try:
+                student_id, name, age, class_name = (record['student_id'], record['name'],
+                                                     record['age'], record['class_name'])
+                subjects = record.get('subjects') or {}
+                grades = list(subjects.values())
+                if (type(student_id) is not str or not student_id.strip() or type(name) is not str
+                        or type(age) is not int or type(class_name) is not str
+                        or not all(type(grade) in _NUMBER_TYPES and 0 <= grade <= 100 for grade in grades)):
+                    raise ValueError
+                students.append(build(student_id, name, age, class_name,
+                                      from_ids(list(map(id_of, subjects)), grades)))
+            except (KeyError, TypeError, ValueError, AttributeError):
+                line = lines[number - first_record] if lines is not None else None
+                result.errors.extend(RecordError(number, message, line) for message in self._diagnose(record))
+        result.records = number - first_record + 1
+        return result
+
+    def _diagnose(self, record) -> List[str]:
+        if not isinstance(record, dict):
+            return ["record is not an object"]
+        messages = [f"missing field {name!r}" for name in _CSV_FIELDS if name not in record]
+        student_id = record.get('student_id')
+        if 'student_id' in record and (not isinstance(student_id, str) or not student_id.strip()):
+            messages.append("student_id must be a non-empty string")
+        for name in ('name', 'class_name'):
+            if name in record and not isinstance(record[name], str):
+                messages.append(f"{name} must be a string")
+        age = record.get('age')
+        if 'age' in record and (not isinstance(age, int) or isinstance(age, bool)):
+            messages.append(f"invalid age {age!r}")
+        subjects = record.get('subjects') or {}
+        if not isinstance(subjects, dict):
+            messages.append("subjects must be an object")
+        else:
+            messages.extend(filter(None, (_grade_error(subject, grade) for subject, grade in subjects.items())))
+        return messages or ["invalid record"]
+
+
+def _batches(items: Iterable, size: int) -> Iterator[list]:
+    items = iter(items)
+    while True:
+        batch = list(islice(items, size))
+        if not batch:
+            return
+        yield batch
+
+
+def iter_decoded_csv(filename: str, batch_size: int = BATCH_SIZE) -> Iterator[DecodeResult]:
+    """Decode a CSV file one batch of rows at a time; a missing file yields nothing"""
+    if not Path(filename).exists():
+        return
+    with open(filename, 'r', newline='') as f:
+        reader = csv.reader(f)
+        header = next(reader, None)
+        if header is None:
+            return
+        try:
+            decoder = CSVDecoder(header)
+        except ValueError as e:
+            raise ValueError(f"CSV file {filename}: {e}") from None
+        first = 1
+        for batch in _batches(_numbered_rows(reader), batch_size):
+            lines, rows = zip(*batch)
+            yield decoder.decode(rows, first, lines)
+            first += len(batch)
+
+
+def _numbered_rows(reader) -> Iterator[Tuple[int, List[str]]]:
+    """(first file line, row) for each row, skipping blank lines as csv.DictReader does"""
+    line = reader.line_num + 1
+    for row in reader:
+        if any(value.strip() for value in row):
+            yield line, row
+        line = reader.line_num + 1  # a quoted field can span several lines
+
+
+def iter_decoded_records(records: Iterable, batch_size: int = BATCH_SIZE,
+                         numbered: bool = False) -> Iterator[DecodeResult]:
+    """
+    Decode parsed JSON records one batch at a time. With numbered, records
+    are (file line, record) pairs and errors report those lines.
+    """
+    decoder = RecordDecoder()
+    first = 1
+    for batch in _batches(records, batch_size):
+        if numbered:
+            lines, batch = zip(*batch)
+            yield decoder.decode(batch, first, lines)
+        else:
+            yield decoder.decode(batch, first)
+        first += len(batch)
+
+
+def decode_file(filename: str, batch_size: int = BATCH_SIZE) -> DecodeResult:
+    """
+    Validate and decode a whole CSV, JSON or JSON Lines file, collecting
+    every invalid record instead of stopping at the first
+    """
+    from grades_fileio import iter_decoded_file
+    result = DecodeResult()
+    if not Path(filename).exists():
+        return result
+    for batch in iter_decoded_file(filename, batch_size):
+        result.extend(batch)
+    return result
+
+
+def student_from_record(record: dict) -> Student:
+    """Build one Student from an untrusted record, raising ValueError on bad data"""
+    result = RecordDecoder().decode([record])
+    if result.errors:
+        raise ValueError('; '.join(error.message for error in result.errors))
+    return result.students[0]
+